@@ -16,4 +16,17 @@ class Settings:
         self.arg_timezone = pytz.timezone("America/Argentina/Buenos_Aires")
         self.cron_secret = os.getenv("CRON_SECRET_TOKEN")
         self.gemini_model_name = os.getenv("GEMINI_MODEL", "gemini-flash-lite-latest")
+        self.optimizer_engine = os.getenv("OPTIMIZER_ENGINE", "auto")
+        self.optimizer_workers = int(os.getenv("OPTIMIZER_WORKERS", "1"))
+        self.optimizer_time_budget = float(os.getenv("OPTIMIZER_TIME_BUDGET", "2.0"))
+        self.build_teams_max_options = int(os.getenv("BUILD_TEAMS_MAX_OPTIONS", "10"))
+        self.build_teams_max_teams = int(os.getenv("BUILD_TEAMS_MAX_TEAMS", "4"))
+        self.build_teams_max_batch = int(os.getenv("BUILD_TEAMS_MAX_BATCH", "10"))
+        self.build_teams_max_concurrency = int(os.getenv("BUILD_TEAMS_MAX_CONCURRENCY", "2"))
+        self.build_teams_max_queue = int(os.getenv("BUILD_TEAMS_MAX_QUEUE", "8"))
+        self.build_teams_job_ttl = float(os.getenv("BUILD_TEAMS_JOB_TTL", "300"))
+        self.optimizer_job_time_budget = float(os.getenv("OPTIMIZER_JOB_TIME_BUDGET", "30.0"))
+        self.optimizer_cache_max_entries = int(os.getenv("OPTIMIZER_CACHE_MAX_ENTRIES", "256"))
+        self.optimizer_cache_ttl = float(os.getenv("OPTIMIZER_CACHE_TTL", "600"))
+        self.optimizer_cache_max_bytes = int(os.getenv("OPTIMIZER_CACHE_MAX_BYTES", str(8 * 1024 * 1024)))
 
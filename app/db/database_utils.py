@@ -1,3 +1,7 @@
+import base64
+import json
+
+from sqlalchemy import and_, func, or_
 from sqlalchemy.exc import OperationalError, DatabaseError
 from sqlalchemy.orm import Session
 from tenacity import retry, stop_after_attempt, wait_fixed
@@ -50,9 +54,151 @@ def query_players(db: Session, current_user_id: int, club_id: int = None, scale:
         else:
             return db.query(Player).filter(Player.club_id == club_id).all()
 
+def query_players_version(db: Session, current_user_id: int, club_id: int = None, scale: str = "1-5"):
+    """(cantidad, último updated_at) de los jugadores de `query_players`, sin leer las filas.
+
+    Crear, editar o borrar un jugador cambia alguno de los dos valores: sirven como
+    validador de la lista para las respuestas condicionales.
+    """
+    PlayerModel = PlayerV2 if scale == "1-10" else Player
+    query = db.query(func.count(PlayerModel.id), func.max(PlayerModel.updated_at))
+    if club_id is None:
+        query = query.filter(PlayerModel.user_id == current_user_id, PlayerModel.club_id.is_(None))
+    else:
+        query = query.filter(PlayerModel.club_id == club_id)
+    return tuple(query.one())
+
+# Columnas de puntaje que usa el armado de equipos, en el orden del vector de cada jugador
+RATING_COLUMNS = (
+    "velocidad",
+    "resistencia",
+    "control",
+    "pases",
+    "tiro",
+    "defensa",
+    "habilidad_arquero",
+    "fuerza_cuerpo",
+    "vision",
+)
+
+def query_selected_players(db: Session, current_user_id: int, player_ids, club_id: int = None, scale: str = "1-5"):
+    """Como `query_players`, pero solo los jugadores de `player_ids` y solo id, nombre y puntajes.
+
+    El filtro y la proyección se resuelven en SQL: no se leen las fotos ni los jugadores no
+    seleccionados. Mismo criterio de acceso que `query_players` (del club o propios del usuario).
+    """
+    PlayerModel = PlayerV2 if scale == "1-10" else Player
+    columns = [PlayerModel.id, PlayerModel.name] + [getattr(PlayerModel, name) for name in RATING_COLUMNS]
+    query = db.query(*columns).filter(PlayerModel.id.in_(player_ids))
+    if club_id is None:
+        query = query.filter(PlayerModel.user_id == current_user_id, PlayerModel.club_id.is_(None))
+    else:
+        query = query.filter(PlayerModel.club_id == club_id)
+    return query.order_by(PlayerModel.id).all()
+
+# Campos de PlayerResponse que se pueden pedir con `fields` (photo_url se deriva de photo_id)
+PLAYER_FIELDS = ("id", "name", *RATING_COLUMNS, "photo_id", "updated_at", "user_id", "club_id", "photo_url")
+
+def encode_cursor(sort_name: str, player_id: int) -> str:
+    """Cursor opaco de paginación: la clave (nombre en minúsculas, id) del último jugador de la página.
+
+    El nombre es el que calculó la base con `lower()`, que no siempre coincide con `str.lower()`
+    (SQLite solo pasa a minúsculas ASCII), así que se compara tal cual, sin volver a convertirlo.
+    """
+    return base64.urlsafe_b64encode(json.dumps([sort_name, player_id]).encode()).decode()
+
+def decode_cursor(cursor: str):
+    """Clave (nombre en minúsculas, id) de un cursor de `encode_cursor`; lanza ValueError si no es válido."""
+    try:
+        name, player_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except (ValueError, TypeError):
+        raise ValueError("Cursor inválido")
+    if not isinstance(name, str) or not isinstance(player_id, int):
+        raise ValueError("Cursor inválido")
+    return name, player_id
+
+def query_players_page(
+        db: Session,
+        current_user_id: int,
+        club_id: int = None,
+        scale: str = "1-5",
+        fields=PLAYER_FIELDS,
+        name: str = None,
+        descending: bool = False,
+        after=None,
+        limit: int = None,
+    ):
+    """Página de jugadores ordenada por (nombre sin mayúsculas, id), con paginación por clave.
+
+    Mismo criterio de acceso que `query_players`. Solo se leen las columnas de `fields`
+    (más nombre e id, que forman la clave); `name` filtra por nombre sin distinguir
+    mayúsculas y `after` es la clave del último jugador de la página anterior. Devuelve
+    (filas, clave del último jugador si hay más páginas o None); cada fila trae además
+    `sort_name`, el nombre en minúsculas calculado por la base.
+    """
+    PlayerModel = PlayerV2 if scale == "1-10" else Player
+    names = {"id", "name", *fields} - {"photo_url"}
+    if "photo_url" in fields:
+        names.add("photo_id")
+    columns = [getattr(PlayerModel, column) for column in PLAYER_FIELDS if column in names]
+    # La clave de orden la calcula la base y se lee junto con la fila para armar el cursor
+    sort_name = func.lower(PlayerModel.name)
+    query = db.query(*columns, sort_name.label("sort_name"))
+    if club_id is None:
+        query = query.filter(PlayerModel.user_id == current_user_id, PlayerModel.club_id.is_(None))
+    else:
+        query = query.filter(PlayerModel.club_id == club_id)
+    if name:
+        pattern = name.lower().replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+        query = query.filter(func.lower(PlayerModel.name).like(f"%{pattern}%", escape="\\"))
+
+    if after is not None:
+        after_name, after_id = after
+        if descending:
+            query = query.filter(or_(sort_name < after_name, and_(sort_name == after_name, PlayerModel.id < after_id)))
+        else:
+            query = query.filter(or_(sort_name > after_name, and_(sort_name == after_name, PlayerModel.id > after_id)))
+    if descending:
+        query = query.order_by(sort_name.desc(), PlayerModel.id.desc())
+    else:
+        query = query.order_by(sort_name, PlayerModel.id)
+
+    if limit is None:
+        return query.all(), None
+    # Una fila de más indica si queda otra página, sin contar el total
+    rows = query.limit(limit + 1).all()
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, (rows[-1].sort_name, rows[-1].id)
+
+def can_view_photo(db: Session, photo_id: str, current_user_id: int) -> bool:
+    """Indica si la foto es de algún jugador visible para el usuario (propio o de uno de sus clubes)."""
+    member_clubs = db.query(ClubUser.club_id).filter(ClubUser.user_id == current_user_id)
+    for PlayerModel in (Player, PlayerV2):
+        visible = db.query(PlayerModel.id).filter(
+            PlayerModel.photo_id == photo_id,
+            or_(
+                PlayerModel.club_id.in_(member_clubs),
+                (PlayerModel.user_id == current_user_id) & PlayerModel.club_id.is_(None),
+            ),
+        )
+        if visible.first() is not None:
+            return True
+    return False
+
 def query_clubs(db: Session, current_user_id: int):
     return db.query(Club).join(ClubUser).filter(ClubUser.user_id == current_user_id).all()
 
+def query_club_attribute_weights(db: Session, club_id: int, current_user_id: int):
+    """Pesos guardados en el club (JSON o None) y rol del usuario (None si no es miembro).
+
+    Retorna None si el club no existe.
+    """
+    return db.query(Club.attribute_weights, ClubUser.role).outerjoin(
+        ClubUser, and_(ClubUser.club_id == Club.id, ClubUser.user_id == current_user_id)
+    ).filter(Club.id == club_id).first()
+
 def query_club_members(db: Session, club_id: int):
     return db.query(ClubUser, User).join(User, ClubUser.user_id == User.id).filter(ClubUser.club_id == club_id).all()
 
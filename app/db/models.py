@@ -1,7 +1,7 @@
 from datetime import datetime
 from enum import Enum
 from passlib.hash import pbkdf2_sha256
-from sqlalchemy import Column, DateTime, ForeignKey, Integer, String, Boolean, Text
+from sqlalchemy import Column, DateTime, ForeignKey, Integer, LargeBinary, String, Boolean, Text
 from sqlalchemy.orm import DeclarativeBase, relationship
 
 from app.config.settings import Settings
@@ -58,6 +58,26 @@ class User(Base):
         return self.email_confirmed in [0, -1]
 
 
+# Fotos de jugadores: cada imagen se guarda una sola vez, identificada por el SHA-256 de su contenido
+class PlayerPhoto(Base):
+    __tablename__ = "player_photos"
+
+    id = Column(String(64), primary_key=True)
+    content_type = Column(String, nullable=False)
+    data = Column(LargeBinary, nullable=False)
+    size = Column(Integer, nullable=False)
+    created_at = Column(DateTime, default=get_argentina_now)
+
+# Miniaturas de cada foto, una por variante de tamaño (ver THUMBNAIL_SIZES en photo_store)
+class PlayerPhotoThumbnail(Base):
+    __tablename__ = "player_photo_thumbnails"
+
+    photo_id = Column(String(64), ForeignKey("player_photos.id"), primary_key=True)
+    variant = Column(String(16), primary_key=True)
+    content_type = Column(String, nullable=False)
+    data = Column(LargeBinary, nullable=False)
+    size = Column(Integer, nullable=False)
+
 class Player(Base):
     __tablename__ = "players"
 
@@ -72,7 +92,8 @@ class Player(Base):
     habilidad_arquero = Column(Integer)
     fuerza_cuerpo = Column(Integer)
     vision = Column(Integer)
-    photo_data = Column(Text, nullable=True)  # Base64 encoded image data
+    photo_data = Column(Text, nullable=True)  # Legado: base64, se migra a player_photos con scripts/backfill_player_photos.py
+    photo_id = Column(String(64), ForeignKey("player_photos.id"), nullable=True)
     user_id = Column(Integer, ForeignKey("users.id"))
     club_id = Column(Integer, ForeignKey("clubs.id"))
     updated_at = Column(DateTime, default=get_argentina_now, onupdate=get_argentina_now)
@@ -97,7 +118,8 @@ class PlayerV2(Base):
     habilidad_arquero = Column(Integer)
     fuerza_cuerpo = Column(Integer)
     vision = Column(Integer)
-    photo_data = Column(Text, nullable=True)  # Base64 encoded image data
+    photo_data = Column(Text, nullable=True)  # Legado: base64, se migra a player_photos con scripts/backfill_player_photos.py
+    photo_id = Column(String(64), ForeignKey("player_photos.id"), nullable=True)
     user_id = Column(Integer, ForeignKey("users.id"))
     club_id = Column(Integer, ForeignKey("clubs.id"))
     updated_at = Column(DateTime, default=get_argentina_now, onupdate=get_argentina_now)
@@ -154,6 +176,7 @@ class Club(Base):
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String)
     creation_date = Column(DateTime, default=get_argentina_now)
+    attribute_weights = Column(Text, nullable=True)  # JSON con el peso de cada atributo al armar equipos
 
     members = relationship("ClubUser", back_populates="club")
     players = relationship("Player", back_populates="club")
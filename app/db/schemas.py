@@ -1,6 +1,6 @@
 from datetime import datetime
 from typing import Optional
-from pydantic import BaseModel, ConfigDict, EmailStr
+from pydantic import BaseModel, ConfigDict, EmailStr, Field, computed_field
 
 
 # User schemas
@@ -36,7 +36,9 @@ class PlayerCreate(BaseModel):
     habilidad_arquero: int
     fuerza_cuerpo: int
     vision: int
-    photo_data: Optional[str] = None  # Base64 encoded image data
+    photo_data: Optional[str] = None  # Foto nueva, en base64 (data URI)
+    photo_id: Optional[str] = None  # Foto actual del jugador, para conservarla sin volver a enviarla
+    remove_photo: bool = False  # Quitar la foto actual (sin foto nueva, se conserva la que tenga)
     club_id: Optional[int] = None
 
 class PlayerResponse(BaseModel):
@@ -53,11 +55,21 @@ class PlayerResponse(BaseModel):
     habilidad_arquero: int
     fuerza_cuerpo: int
     vision: int
-    photo_data: Optional[str] = None  # Base64 encoded image data
+    photo_id: Optional[str] = None
     updated_at: datetime
     user_id: Optional[int] = None
     club_id: Optional[int] = None
 
+    # La imagen se descarga aparte, con caché del navegador
+    @computed_field
+    @property
+    def photo_url(self) -> Optional[str]:
+        return self.photo_url_for(self.photo_id)
+
+    @staticmethod
+    def photo_url_for(photo_id: Optional[str]) -> Optional[str]:
+        return None if photo_id is None else f"/api/photos/{photo_id}"
+
 # Schemas para Club
 class ClubCreate(BaseModel):
     name: str
@@ -69,6 +81,20 @@ class ClubResponse(BaseModel):
     name: str
     creation_date: datetime
 
+# Pesos de los atributos al armar equipos (0 ignora el atributo)
+class AttributeWeights(BaseModel):
+    model_config = ConfigDict(extra="forbid")
+
+    velocidad: int = Field(default=1, ge=0, le=10)
+    resistencia: int = Field(default=1, ge=0, le=10)
+    control: int = Field(default=1, ge=0, le=10)
+    pases: int = Field(default=1, ge=0, le=10)
+    tiro: int = Field(default=1, ge=0, le=10)
+    defensa: int = Field(default=1, ge=0, le=10)
+    habilidad_arquero: int = Field(default=1, ge=0, le=10)
+    fuerza_cuerpo: int = Field(default=1, ge=0, le=10)
+    vision: int = Field(default=1, ge=0, le=10)
+
 # Schemas para ClubUser
 class ClubUserCreate(BaseModel):
     user_id: int
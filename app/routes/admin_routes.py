@@ -9,6 +9,7 @@ from app.config.settings import Settings
 from app.db.database import get_db
 from app.db.models import User
 from app.utils.auth import get_current_user
+from app.utils.metrics import get_metrics_sink
 from app.utils.security import verify_admin_user
 from app.config.logging_config import logger
 
@@ -287,6 +288,12 @@ def verify_cron_token(x_cron_token: str = Header(None)):
         raise HTTPException(status_code=403, detail="Forbidden")
     return True
 
+@router.get("/api/admin/metrics")
+async def get_metrics(current_user: User = Depends(get_current_user)):
+    """Métricas acumuladas del proceso (p. ej. tiempo y memoria de cada armado de equipos por motor y tamaño)."""
+    verify_admin_user(current_user, detail="Unauthorized access.")
+    return get_metrics_sink().snapshot()
+
 @router.post("/cleanup-expired-users")
 async def cleanup_expired_users(
     db: Session = Depends(get_db),
@@ -117,6 +117,21 @@ def leave_club(club_id: int, current_user: models.User = Depends(get_current_use
     db.commit()
     return {"status": "success", "message": "Has salido del club"}
 
+# Get the attribute weights used to build teams in a club
+@router.get("/clubs/{club_id}/attribute-weights", response_model=schemas.AttributeWeights)
+def get_club_attribute_weights(club_id: int, db: Session = Depends(get_db), current_user: models.User = Depends(get_current_user)):
+    return crud.get_club_attribute_weights(db, club_id, current_user)
+
+# Change the attribute weights used to build teams in a club
+@router.put("/clubs/{club_id}/attribute-weights", response_model=schemas.AttributeWeights)
+def update_club_attribute_weights(
+    club_id: int,
+    weights: schemas.AttributeWeights,
+    current_user: models.User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    return crud.update_club_attribute_weights(db, club_id, weights, current_user)
+
 # Get clubs of the authenticated user
 @router.get("/api/user-clubs")
 async def get_user_clubs(
@@ -1,20 +1,58 @@
+import asyncio
 import logging
+import math
+import threading
+import time
+from contextlib import nullcontext
 
-from fastapi import APIRouter, Depends, Request
-from fastapi.responses import HTMLResponse, JSONResponse, RedirectResponse
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.responses import HTMLResponse, JSONResponse, RedirectResponse, StreamingResponse
+from pydantic import ValidationError
 from requests import Session
 
 from app.config.config import templates
+from app.config.settings import Settings
 from app.db.database import get_db
-from app.db.database_utils import execute_with_retries, query_clubs, query_players
+from app.db.database_utils import (
+    RATING_COLUMNS,
+    execute_with_retries,
+    query_club_attribute_weights,
+    query_clubs,
+    query_players,
+    query_selected_players,
+)
 from app.db.models import User
+from app.db.schemas import AttributeWeights
 from app.utils.ai_formations import create_formations
 from app.utils.ai_player_matcher import match_players, MAX_LINES
 from app.utils.auth import get_current_user
-from app.utils.team_optimizer import find_best_combination
+from app.utils.bounded_executor import ExecutorBusyError, get_build_teams_executor
+from app.utils.metrics import get_metrics_sink, traced_peak_memory
+from app.utils.team_jobs import FINISHED_STATUSES, format_event, get_job_registry
+from app.utils.team_cache import get_team_cache
+from app.utils.team_optimizer import TeamConstraints, calculate_team_score
 
 router = APIRouter()
 
+# Cada cuántos segundos se revisa si el cliente se desconectó o si un trabajo tiene novedades
+DISCONNECT_POLL_INTERVAL = 0.5
+JOB_EVENTS_POLL_INTERVAL = 0.25
+
+# Métricas de la búsqueda que se devuelven al pedirlas y se registran en cada armado
+REPORTED_STATS = (
+    "engine",
+    "optimal",
+    "cache_hit",
+    "wall_time",
+    "peak_memory",
+    "candidates_evaluated",
+    "candidates_pruned",
+    "nodes_explored",
+    "nodes_pruned",
+    "local_optima",
+)
+
+
 @router.get("/", response_class=HTMLResponse, include_in_schema=False)
 async def landing_page(request: Request):
     return templates.TemplateResponse(request=request, name="landing-page.html")
@@ -96,6 +134,388 @@ async def show_formations(
     # Retornar las formaciones como respuesta JSON
     return JSONResponse(content=formations)
 
+
+def load_player_selections(db, current_user_id, selections, club_id, scale):
+    """Jugadores de cada selección (listas de ids) con una sola consulta, o None si alguno no fue encontrado."""
+    # Solo se leen de la base los jugadores seleccionados y sus puntajes (sin fotos)
+    player_ids = sorted({player_id for selected_player_ids in selections for player_id in selected_player_ids})
+    all_players = execute_with_retries(query_selected_players, db, current_user_id, player_ids, club_id or None, scale)
+
+    selected = []
+    for selected_player_ids in selections:
+        wanted = set(selected_player_ids)
+        selected_players = [p for p in all_players if p.id in wanted]
+        if len(selected_players) != len(selected_player_ids):
+            return None
+        selected.append(selected_players)
+    return selected
+
+
+def load_selected_players(db, current_user_id, selected_player_ids, club_id, scale):
+    """Obtiene los jugadores seleccionados, o None si alguno no fue encontrado."""
+    selected = load_player_selections(db, current_user_id, [selected_player_ids], club_id, scale)
+    return None if selected is None else selected[0]
+
+
+def parse_attribute_weights(payload):
+    """Vector de pesos (uno por atributo) de un pedido; lanza ValueError si no es válido.
+
+    `payload` indica el peso de algunos atributos, p. ej. {"habilidad_arquero": 3}; el resto pesa 1.
+    """
+    if not isinstance(payload, dict):
+        raise ValueError("weights debe ser un objeto con el peso de cada atributo")
+    try:
+        weights = list(AttributeWeights(**payload).model_dump().values())
+    except ValidationError:
+        raise ValueError("weights debe tener pesos enteros entre 0 y 10 para atributos válidos")
+    if not any(weights):
+        raise ValueError("Al menos un atributo debe tener peso")
+    return weights
+
+
+def load_attribute_weights(db, current_user_id, club_id, weights):
+    """Pesos pedidos o, si no se indicaron, los guardados en el club (None: todos pesan lo mismo).
+
+    Lanza HTTPException si el club no existe (404) o el usuario no es miembro (403).
+    """
+    if weights is not None or not club_id:
+        return weights
+    club = execute_with_retries(query_club_attribute_weights, db, club_id, current_user_id)
+    if club is None:
+        raise HTTPException(status_code=404, detail="Club no encontrado")
+    saved, role = club
+    if role is None:
+        raise HTTPException(status_code=403, detail="No eres miembro de este club")
+    if saved is None:
+        return None
+    return list(AttributeWeights.model_validate_json(saved).model_dump().values())
+
+
+def error_response(e: HTTPException):
+    return JSONResponse(content={"error": e.detail}, status_code=e.status_code)
+
+
+def parse_constraints(payload, selected_player_ids):
+    """Restricciones del pedido, con ids de jugadores; lanza ValueError si no son válidas.
+
+    `payload` tiene la forma {"together": [[ids]], "apart": [[id, id]], "team1": [ids], "team2": [ids]}.
+    """
+    if not isinstance(payload, dict):
+        raise ValueError("constraints debe ser un objeto")
+
+    def ids(value, name):
+        if not isinstance(value, list) or not all(isinstance(i, int) for i in value):
+            raise ValueError(f"constraints.{name} debe contener ids de jugadores")
+        return value
+
+    def groups(name):
+        value = payload.get(name, [])
+        if not isinstance(value, list):
+            raise ValueError(f"constraints.{name} debe ser una lista de listas de ids de jugadores")
+        return [ids(group, name) for group in value]
+
+    constraints = TeamConstraints(
+        groups("together"), groups("apart"), ids(payload.get("team1", []), "team1"), ids(payload.get("team2", []), "team2")
+    )
+    # Ids ajenos a la selección y contradicciones se detectan antes de armar los equipos
+    position = {player_id: i for i, player_id in enumerate(selected_player_ids)}
+    if any(player_id not in position for player_id in constraints.players()):
+        raise ValueError("Las restricciones mencionan jugadores que no están seleccionados")
+    constraints.remap(position).rules(len(position))
+    return constraints
+
+
+def parse_search_options(data, settings):
+    """Opciones de búsqueda de un pedido de armado; lanza ValueError si alguna no es válida.
+
+    Devuelve (max_options, seed, num_teams, weights, include_stats).
+    """
+    # Cantidad de opciones de equipos a devolver (acota el tiempo de cálculo y el tamaño
+    # de la respuesta) y semilla para elegir entre opciones igual de parejas
+    max_options = data.get('max_options', settings.build_teams_max_options)
+    seed = data.get('seed', 0)
+    if not isinstance(max_options, int) or not 1 <= max_options <= settings.build_teams_max_options:
+        raise ValueError(f"max_options debe ser un número entre 1 y {settings.build_teams_max_options}")
+    if not isinstance(seed, int):
+        raise ValueError("seed debe ser un número entero")
+
+    # Cantidad de equipos (p. ej. 3 o 4 para un torneo)
+    num_teams = data.get('num_teams', 2)
+    if not isinstance(num_teams, int) or not 2 <= num_teams <= settings.build_teams_max_teams:
+        raise ValueError(f"num_teams debe ser un número entre 2 y {settings.build_teams_max_teams}")
+
+    # Pesos de los atributos para este pedido; si no se indican, se usan los del club
+    weights = data.get('weights')
+    if weights is not None:
+        weights = parse_attribute_weights(weights)
+
+    # Con include_stats la respuesta trae las métricas de la búsqueda (tiempo, memoria pico,
+    # nodos explorados y podados, motor usado)
+    include_stats = data.get('include_stats', False) is True
+    return max_options, seed, num_teams, weights, include_stats
+
+
+def record_search_stats(stats, players, num_teams):
+    """Envía las métricas de un armado al log y al destino de métricas, etiquetadas por motor y tamaño."""
+    logging.info(
+        "Built teams: players=%d num_teams=%d %s",
+        players,
+        num_teams,
+        " ".join(f"{name}={stats[name]}" for name in REPORTED_STATS if name in stats),
+    )
+    sink = get_metrics_sink()
+    tags = {"engine": stats.get("engine", "unknown"), "players": players, "num_teams": num_teams}
+    for name in REPORTED_STATS:
+        value = stats.get(name)
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            sink.observe(f"build_teams.{name}", value, **tags)
+    sink.observe("build_teams.cache_hit", int(stats.get("cache_hit", False)), **tags)
+    sink.observe("build_teams.optimal", int(stats.get("optimal", False)), **tags)
+
+
+def format_player(p):
+    return {
+        "id": p.id,
+        "name": p.name,
+        "velocidad": p.velocidad,
+        "resistencia": p.resistencia,
+        "control": p.control,
+        "pases": p.pases,
+        "tiro": p.tiro,
+        "defensa": p.defensa,
+        "habilidad_arquero": p.habilidad_arquero,
+        "fuerza_cuerpo": p.fuerza_cuerpo,
+        "vision": p.vision
+    }
+
+
+def format_teams_options(mejores_equipos, selected_players, player_scores):
+    teams_options = []
+    for equipos in mejores_equipos:
+        team1_score = calculate_team_score(equipos[0], player_scores)
+        team2_score = calculate_team_score(equipos[1], player_scores)
+        
+        teams_options.append({
+            "team1": [format_player(selected_players[i]) for i in equipos[0]],
+            "team2": [format_player(selected_players[i]) for i in equipos[1]],
+            "difference": abs(sum(team1_score) - sum(team2_score))
+        })
+    return teams_options
+
+
+def format_partition_options(partitions, selected_players, player_scores):
+    # Con más de dos equipos, cada opción es la lista de equipos y la diferencia de puntaje
+    # total entre el mejor y el peor
+    partition_options = []
+    for partition in partitions:
+        totals = [sum(calculate_team_score(team, player_scores)) for team in partition]
+        partition_options.append({
+            "teams": [[format_player(selected_players[i]) for i in team] for team in partition],
+            "difference": max(totals) - min(totals)
+        })
+    return partition_options
+
+
+def build_teams(
+    selected_players,
+    settings,
+    max_options,
+    seed,
+    time_budget=None,
+    cancel_event=None,
+    on_progress=None,
+    previous_team1_ids=None,
+    constraints=None,
+    num_teams=2,
+    weights=None,
+    include_stats=False,
+):
+    """Arma los equipos de forma sincrónica; se ejecuta fuera del event loop.
+
+    `on_progress` recibe las mejores opciones encontradas hasta el momento, con el mismo
+    formato que el resultado. `previous_team1_ids` son los ids de un equipo armado antes
+    (p. ej. antes de cambiar un jugador): la búsqueda parte de esa solución. `constraints`
+    son restricciones (`TeamConstraints`) expresadas con ids de jugadores; si ningún armado
+    las cumple, no se devuelven opciones. Con `num_teams` > 2 los jugadores se reparten en
+    esa cantidad de equipos (sin solución previa ni restricciones). `weights` son los pesos
+    de los atributos en la diferencia a minimizar; las diferencias informadas no se ponderan.
+    Con `include_stats` el resultado incluye las métricas de la búsqueda (`REPORTED_STATS`).
+    """
+    # Preparar datos para el algoritmo
+    player_scores = [[getattr(p, name) for name in RATING_COLUMNS] for p in selected_players]
+    time_budget = settings.optimizer_time_budget if time_budget is None else time_budget
+    stats = dict()
+
+    def run_search():
+        if num_teams > 2:
+            def report_partitions(partitions, max_difference_total):
+                partition_options = format_partition_options(partitions, selected_players, player_scores)
+                on_progress({"teams": partition_options, "difference": partition_options[0]["difference"]})
+
+            partitions, _ = get_team_cache().find_best_partition(
+                player_scores,
+                num_teams,
+                stats=stats,
+                time_budget=time_budget,
+                top_k=max_options,
+                seed=seed,
+                cancel_event=cancel_event,
+                on_progress=None if on_progress is None else report_partitions,
+                weights=weights,
+            )
+            return format_partition_options(partitions, selected_players, player_scores)
+
+        previous_team1 = None
+        if previous_team1_ids is not None:
+            previous_team1 = [i for i, p in enumerate(selected_players) if p.id in previous_team1_ids]
+        team_constraints = None
+        if constraints is not None:
+            team_constraints = constraints.remap({p.id: i for i, p in enumerate(selected_players)})
+
+        # La diferencia informada es la de la mejor opción sin ponderar (con pesos, la que
+        # devuelve la búsqueda está ponderada)
+        def report_progress(mejores_equipos, min_difference_total):
+            teams_options = format_teams_options(mejores_equipos, selected_players, player_scores)
+            on_progress({"teams": teams_options, "difference": teams_options[0]["difference"]})
+
+        # Generar equipos (con caché por plantel: el mismo grupo de jugadores, en cualquier
+        # orden, reutiliza el resultado anterior)
+        mejores_equipos, _ = get_team_cache().find_best_combination(
+            player_scores,
+            engine=settings.optimizer_engine,
+            stats=stats,
+            workers=settings.optimizer_workers,
+            time_budget=time_budget,
+            top_k=max_options,
+            seed=seed,
+            cancel_event=cancel_event,
+            on_progress=None if on_progress is None else report_progress,
+            previous_team1=previous_team1,
+            constraints=team_constraints,
+            weights=weights,
+        )
+        return format_teams_options(mejores_equipos, selected_players, player_scores)
+
+    # La memoria pico solo se mide si se piden las métricas (tracemalloc hace más lenta la búsqueda)
+    started = time.perf_counter()
+    with traced_peak_memory() if include_stats else nullcontext({"peak_memory": None}) as memory:
+        teams_options = run_search()
+    # El tiempo incluye la caché: con un acierto, es el de la consulta y no el de la búsqueda original
+    stats["wall_time"] = time.perf_counter() - started
+    stats["peak_memory"] = memory["peak_memory"]
+    record_search_stats(stats, players=len(selected_players), num_teams=num_teams)
+
+    result = {
+        "teams": teams_options,
+        "difference": teams_options[0]["difference"] if teams_options else None,
+        "optimal": stats["optimal"],
+        "cached": stats["cache_hit"]
+    }
+    if include_stats:
+        result["stats"] = {name: stats[name] for name in REPORTED_STATS if name in stats}
+    return result
+
+
+def build_teams_from_db(
+    db,
+    current_user_id,
+    selected_player_ids,
+    club_id,
+    scale,
+    settings,
+    max_options,
+    seed,
+    cancel_event,
+    previous_team1_ids,
+    constraints=None,
+    num_teams=2,
+    weights=None,
+    include_stats=False,
+):
+    selected_players = load_selected_players(db, current_user_id, selected_player_ids, club_id, scale)
+    if selected_players is None:
+        return JSONResponse(content={"error": "Algunos jugadores no fueron encontrados"}, status_code=400)
+    try:
+        weights = load_attribute_weights(db, current_user_id, club_id, weights)
+    except HTTPException as e:
+        return error_response(e)
+    result = build_teams(
+        selected_players,
+        settings,
+        max_options,
+        seed,
+        cancel_event=cancel_event,
+        previous_team1_ids=previous_team1_ids,
+        constraints=constraints,
+        num_teams=num_teams,
+        weights=weights,
+        include_stats=include_stats,
+    )
+    if not result["teams"] and result["optimal"]:
+        return JSONResponse(content={"error": "Ningún armado de equipos cumple las restricciones"}, status_code=400)
+    return JSONResponse(content=result)
+
+
+def build_teams_batch_from_db(
+    db,
+    current_user_id,
+    selections,
+    club_id,
+    scale,
+    settings,
+    max_options,
+    seed,
+    cancel_event,
+    num_teams=2,
+    weights=None,
+    include_stats=False,
+):
+    # Una sola consulta para todas las selecciones y un solo lugar del pool para todo el lote
+    selected = load_player_selections(db, current_user_id, selections, club_id, scale)
+    if selected is None:
+        return JSONResponse(content={"error": "Algunos jugadores no fueron encontrados"}, status_code=400)
+    try:
+        weights = load_attribute_weights(db, current_user_id, club_id, weights)
+    except HTTPException as e:
+        return error_response(e)
+    # El presupuesto de tiempo se reparte entre las selecciones: el lote tarda como un armado.
+    # Los planteles repetidos (en el lote o en pedidos anteriores) salen de la caché
+    time_budget = settings.optimizer_time_budget / len(selected)
+    results = [
+        build_teams(
+            selected_players,
+            settings,
+            max_options,
+            seed,
+            time_budget=time_budget,
+            cancel_event=cancel_event,
+            num_teams=num_teams,
+            weights=weights,
+            include_stats=include_stats,
+        )
+        for selected_players in selected
+    ]
+    return JSONResponse(content={"results": results})
+
+
+async def run_until_disconnected(request: Request, cancel_event: threading.Event, awaitable):
+    # Si el cliente se desconecta antes de recibir la respuesta, se corta la búsqueda
+    task = asyncio.ensure_future(awaitable)
+    while not task.done():
+        await asyncio.wait({task}, timeout=DISCONNECT_POLL_INTERVAL)
+        if not task.done() and await request.is_disconnected():
+            cancel_event.set()
+    return task.result()
+
+
+def busy_response(settings):
+    return JSONResponse(
+        content={"error": "Hay demasiados equipos armándose en este momento, intentá de nuevo en unos segundos"},
+        status_code=503,
+        headers={"Retry-After": str(max(1, math.ceil(settings.optimizer_time_budget)))},
+    )
+
+
 @router.post("/api/build-teams", response_class=JSONResponse)
 async def build_teams_api(
         request: Request,
@@ -108,96 +528,240 @@ async def build_teams_api(
     try:
         data = await request.json()
         selected_player_ids = data.get('selected_player_ids', [])
+        if not isinstance(selected_player_ids, list) or not all(isinstance(i, int) for i in selected_player_ids):
+            return JSONResponse(
+                content={"error": "selected_player_ids debe ser una lista de ids de jugadores"}, status_code=400
+            )
         
         if len(selected_player_ids) < 4:
             return JSONResponse(content={"error": "Necesitas al menos 4 jugadores para armar equipos"}, status_code=400)
         
-        # Obtener datos de los jugadores seleccionados
-        current_user_id = current_user.id
+        settings = Settings()
+        try:
+            max_options, seed, num_teams, weights, include_stats = parse_search_options(data, settings)
+        except ValueError as e:
+            return JSONResponse(content={"error": str(e)}, status_code=400)
+
+        # Equipo 1 de un armado anterior (p. ej. antes de cambiar a un jugador que se bajó)
+        previous_team1_ids = data.get('previous_team1')
+        if previous_team1_ids is not None:
+            if not isinstance(previous_team1_ids, list) or not all(isinstance(i, int) for i in previous_team1_ids):
+                return JSONResponse(content={"error": "previous_team1 debe ser una lista de ids de jugadores"}, status_code=400)
+            previous_team1_ids = set(previous_team1_ids)
+
+        # Jugadores que deben ir juntos, separados o en un equipo determinado
+        constraints = data.get('constraints')
+        if constraints is not None:
+            try:
+                constraints = parse_constraints(constraints, selected_player_ids)
+            except ValueError as e:
+                return JSONResponse(content={"error": str(e)}, status_code=400)
+
+        # Con más de dos equipos no se admiten restricciones ni un armado anterior
+        if num_teams > 2:
+            if len(selected_player_ids) < 2 * num_teams:
+                return JSONResponse(
+                    content={"error": f"Necesitas al menos {2 * num_teams} jugadores para armar {num_teams} equipos"},
+                    status_code=400,
+                )
+            if constraints is not None or previous_team1_ids is not None:
+                return JSONResponse(
+                    content={"error": "constraints y previous_team1 solo se admiten con dos equipos"},
+                    status_code=400,
+                )
+
+        # La consulta y la optimización bloquean: se ejecutan en un pool de hilos acotado
+        # para no frenar el resto de los pedidos. Si está lleno, se rechaza el pedido
+        executor = get_build_teams_executor()
         club_id = data.get('club_id')
         scale = data.get('scale', '1-5')
-        
-        if club_id:
-            all_players = execute_with_retries(query_players, db, current_user_id, club_id, scale)
-        else:
-            all_players = execute_with_retries(query_players, db, current_user_id, scale=scale)
-        
-        # Filtrar solo jugadores seleccionados
-        selected_players = [p for p in all_players if p.id in selected_player_ids]
-        
-        if len(selected_players) != len(selected_player_ids):
-            return JSONResponse(content={"error": "Algunos jugadores no fueron encontrados"}, status_code=400)
-        
-        # Preparar datos para el algoritmo
-        player_scores = [
-            [
-                p.velocidad,
-                p.resistencia,
-                p.control,
-                p.pases,
-                p.tiro,
-                p.defensa,
-                p.habilidad_arquero,
-                p.fuerza_cuerpo,
-                p.vision,
-            ]
-            for p in selected_players
-        ]
-        
-        # Generar equipos
-        mejores_equipos, min_difference_total = find_best_combination(player_scores)
-        
-        # Formatear respuesta
-        teams_options = []
-        for equipos in mejores_equipos:
-            team1_players = [selected_players[i] for i in equipos[0]]
-            team2_players = [selected_players[i] for i in equipos[1]]
-            
-            teams_options.append({
-                "team1": [
-                    {
-                        "id": p.id,
-                        "name": p.name,
-                        "velocidad": p.velocidad,
-                        "resistencia": p.resistencia,
-                        "control": p.control,
-                        "pases": p.pases,
-                        "tiro": p.tiro,
-                        "defensa": p.defensa,
-                        "habilidad_arquero": p.habilidad_arquero,
-                        "fuerza_cuerpo": p.fuerza_cuerpo,
-                        "vision": p.vision
-                    }
-                    for p in team1_players
-                ],
-                "team2": [
-                    {
-                        "id": p.id,
-                        "name": p.name,
-                        "velocidad": p.velocidad,
-                        "resistencia": p.resistencia,
-                        "control": p.control,
-                        "pases": p.pases,
-                        "tiro": p.tiro,
-                        "defensa": p.defensa,
-                        "habilidad_arquero": p.habilidad_arquero,
-                        "fuerza_cuerpo": p.fuerza_cuerpo,
-                        "vision": p.vision
-                    }
-                    for p in team2_players
-                ]
-            })
-        
-        return JSONResponse(content={
-            "teams": teams_options,
-            "difference": min_difference_total
-        })
+        try:
+            if data.get('mode') != 'job':
+                cancel_event = threading.Event()
+                return await run_until_disconnected(request, cancel_event, executor.run(
+                    build_teams_from_db,
+                    db,
+                    current_user.id,
+                    selected_player_ids,
+                    club_id,
+                    scale,
+                    settings,
+                    max_options,
+                    seed,
+                    cancel_event,
+                    previous_team1_ids,
+                    constraints,
+                    num_teams=num_teams,
+                    weights=weights,
+                    include_stats=include_stats,
+                ))
+
+            # Modo trabajo: se responde enseguida con el id del trabajo y el avance se sigue por
+            # Server-Sent Events. Los jugadores se cargan antes porque la sesión de la base
+            # termina con el pedido
+            selected_players = await executor.run(
+                load_selected_players, db, current_user.id, selected_player_ids, club_id, scale
+            )
+            if selected_players is None:
+                return JSONResponse(content={"error": "Algunos jugadores no fueron encontrados"}, status_code=400)
+            try:
+                weights = await executor.run(load_attribute_weights, db, current_user.id, club_id, weights)
+            except HTTPException as e:
+                return error_response(e)
+
+            registry = get_job_registry()
+            job = registry.create(current_user.id)
+            try:
+                executor.submit(
+                    job.run,
+                    build_teams,
+                    selected_players,
+                    settings,
+                    max_options,
+                    seed,
+                    time_budget=settings.optimizer_job_time_budget,
+                    previous_team1_ids=previous_team1_ids,
+                    constraints=constraints,
+                    num_teams=num_teams,
+                    weights=weights,
+                    include_stats=include_stats,
+                )
+            except ExecutorBusyError:
+                registry.remove(job.id)
+                raise
+            return JSONResponse(
+                content={"job_id": job.id, "events_url": f"/api/build-teams/jobs/{job.id}/events"},
+                status_code=202,
+            )
+        except ExecutorBusyError:
+            return busy_response(settings)
         
     except Exception as e:
         logging.exception("Error building teams: %s", str(e))
         return JSONResponse(content={"error": "Error interno al armar equipos"}, status_code=500)
 
 
+@router.post("/api/build-teams/batch", response_class=JSONResponse)
+async def build_teams_batch_api(
+        request: Request,
+        db: Session = Depends(get_db),
+        current_user: User = Depends(get_current_user)
+    ):
+    """Arma equipos para varias selecciones de jugadores (p. ej. planteles alternativos) en un pedido.
+
+    `selections` es una lista de listas de ids; el resto de las opciones se comparte entre
+    todas. Los resultados vuelven en el mismo orden, con el formato de /api/build-teams.
+    """
+    if not current_user:
+        return JSONResponse(content={"error": "No autenticado"}, status_code=401)
+
+    try:
+        data = await request.json()
+        settings = Settings()
+        selections = data.get('selections')
+        if (
+            not isinstance(selections, list)
+            or not 1 <= len(selections) <= settings.build_teams_max_batch
+            or not all(isinstance(ids, list) and all(isinstance(i, int) for i in ids) for ids in selections)
+        ):
+            return JSONResponse(
+                content={"error": f"selections debe ser una lista de 1 a {settings.build_teams_max_batch} listas de ids de jugadores"},
+                status_code=400,
+            )
+
+        try:
+            max_options, seed, num_teams, weights, include_stats = parse_search_options(data, settings)
+        except ValueError as e:
+            return JSONResponse(content={"error": str(e)}, status_code=400)
+
+        min_players = max(4, 2 * num_teams)
+        if any(len(ids) < min_players for ids in selections):
+            return JSONResponse(
+                content={"error": f"Necesitas al menos {min_players} jugadores en cada selección para armar {num_teams} equipos"},
+                status_code=400,
+            )
+
+        cancel_event = threading.Event()
+        try:
+            return await run_until_disconnected(request, cancel_event, get_build_teams_executor().run(
+                build_teams_batch_from_db,
+                db,
+                current_user.id,
+                selections,
+                data.get('club_id'),
+                data.get('scale', '1-5'),
+                settings,
+                max_options,
+                seed,
+                cancel_event,
+                num_teams=num_teams,
+                weights=weights,
+                include_stats=include_stats,
+            ))
+        except ExecutorBusyError:
+            return busy_response(settings)
+
+    except Exception as e:
+        logging.exception("Error building teams batch: %s", str(e))
+        return JSONResponse(content={"error": "Error interno al armar equipos"}, status_code=500)
+
+
+@router.get("/api/build-teams/jobs/{job_id}", response_class=JSONResponse)
+async def build_teams_job_api(job_id: str, current_user: User = Depends(get_current_user)):
+    if not current_user:
+        return JSONResponse(content={"error": "No autenticado"}, status_code=401)
+
+    job = get_job_registry().get(job_id, current_user.id)
+    if job is None:
+        return JSONResponse(content={"error": "Trabajo no encontrado"}, status_code=404)
+
+    _, status, progress, result = job.snapshot()
+    return JSONResponse(content={"job_id": job.id, "status": status, "progress": progress, "result": result})
+
+
+@router.get("/api/build-teams/jobs/{job_id}/events")
+async def build_teams_job_events(job_id: str, request: Request, current_user: User = Depends(get_current_user)):
+    if not current_user:
+        return JSONResponse(content={"error": "No autenticado"}, status_code=401)
+
+    job = get_job_registry().get(job_id, current_user.id)
+    if job is None:
+        return JSONResponse(content={"error": "Trabajo no encontrado"}, status_code=404)
+
+    async def events():
+        # Un evento "progress" por cada mejora y uno final ("done", "cancelled" o "failed")
+        # con el resultado. Si el cliente se desconecta, se cancela el trabajo
+        sent_version = None
+        while True:
+            if await request.is_disconnected():
+                job.cancel()
+                return
+            version, status, progress, result = job.snapshot()
+            if version != sent_version:
+                sent_version = version
+                if status in FINISHED_STATUSES:
+                    yield format_event(status, result)
+                    return
+                if progress is not None:
+                    yield format_event("progress", progress)
+            await asyncio.sleep(JOB_EVENTS_POLL_INTERVAL)
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
+
+
+@router.delete("/api/build-teams/jobs/{job_id}", response_class=JSONResponse)
+async def cancel_build_teams_job_api(job_id: str, current_user: User = Depends(get_current_user)):
+    if not current_user:
+        return JSONResponse(content={"error": "No autenticado"}, status_code=401)
+
+    job = get_job_registry().get(job_id, current_user.id)
+    if job is None:
+        return JSONResponse(content={"error": "Trabajo no encontrado"}, status_code=404)
+
+    job.cancel()
+    return JSONResponse(content={"job_id": job.id, "status": job.status})
+
+
 @router.post("/api/match-players", response_class=JSONResponse)
 async def match_players_api(
         request: Request,
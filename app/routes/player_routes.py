@@ -1,30 +1,119 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, StreamingResponse
 from sqlalchemy.exc import OperationalError
 from sqlalchemy.orm import Session
 from typing import List
 
 from app.db.database import get_db
-from app.db.database_utils import execute_with_retries, query_player, query_players, has_club_write_permission
+from app.db.database_utils import (
+    PLAYER_FIELDS,
+    can_view_photo,
+    decode_cursor,
+    encode_cursor,
+    execute_with_retries,
+    has_club_write_permission,
+    query_player,
+    query_players,
+    query_players_page,
+    query_players_version,
+)
 from app.db.models import Player, PlayerV2, User
 from app.db.schemas import PlayerCreate, PlayerResponse
 from app.utils.auth import get_current_user
+from app.utils.http_cache import etag_matches, weak_etag
+from app.utils.photo_store import (
+    PHOTO_CACHE_CONTROL,
+    PHOTO_SECURITY_HEADERS,
+    THUMBNAIL_SIZES,
+    load_photo_variant,
+    migrate_inline_photo,
+    photo_chunks,
+    store_data_uri,
+)
 
 router = APIRouter()
 
+# Tamaño máximo de una página de /api/players
+MAX_PLAYERS_PAGE = 200
+
+# Las listas de jugadores cambian: el navegador las guarda, pero revalida con el ETag cada vez
+PLAYERS_CACHE_CONTROL = "private, no-cache"
+
+
+def resolve_photo_id(db: Session, player_data: PlayerCreate, current_photo_id: str = None):
+    """Foto a guardar en el jugador: la nueva (data URI), ninguna si se pide quitarla o la actual; lanza ValueError si no es válida."""
+    if player_data.photo_data:
+        return store_data_uri(db, player_data.photo_data)
+    if player_data.remove_photo:
+        return None
+    # Solo se puede conservar la foto que el jugador ya tiene
+    if player_data.photo_id is not None and player_data.photo_id != current_photo_id:
+        raise ValueError("photo_id debe ser la foto actual del jugador")
+    return current_photo_id
+
 @router.get("/api/players")
 def get_players(
+        request: Request,
+        response: Response,
         scale: str = Query("1-5", pattern="^(1-5|1-10)$"),
         club_id: int = Query(None),
+        limit: int = Query(None, ge=1, le=MAX_PLAYERS_PAGE),
+        cursor: str = Query(None),
+        fields: str = Query(None),
+        name: str = Query(None, max_length=100),
+        order: str = Query(None, pattern="^(asc|desc)$"),
         db: Session = Depends(get_db),
         current_user: User = Depends(get_current_user)
     ) -> List[PlayerResponse]:
-    """Obtener jugadores según la escala especificada"""
+    """Obtener jugadores según la escala especificada
+
+    Sin más parámetros devuelve todos los jugadores completos. Con `limit` pagina por
+    (nombre, id): el encabezado X-Next-Cursor trae el `cursor` de la página siguiente.
+    `fields` elige los campos (separados por coma, el id siempre va), `name` filtra por
+    nombre y `order` ordena por nombre. Responde 304 si el ETag de If-None-Match sigue vigente.
+    """
     if not current_user:
         raise HTTPException(status_code=401, detail="No hay un usuario autenticado")
-    
+
     try:
-        players = execute_with_retries(query_players, db, current_user.id, club_id, scale)
-        return players
+        # El ETag sale de la cantidad y el último updated_at, sin leer los jugadores
+        version = execute_with_retries(query_players_version, db, current_user.id, club_id, scale)
+        etag = weak_etag(current_user.id, request.url.query, *version)
+        headers = {"ETag": etag, "Cache-Control": PLAYERS_CACHE_CONTROL}
+        if etag_matches(request.headers.get("if-none-match"), etag):
+            return Response(status_code=304, headers=headers)
+
+        if limit is None and cursor is None and fields is None and name is None and order is None:
+            players = execute_with_retries(query_players, db, current_user.id, club_id, scale)
+            response.headers.update(headers)
+            return players
+
+        selected = PLAYER_FIELDS
+        if fields is not None:
+            selected = {"id", *(field.strip() for field in fields.split(",") if field.strip())}
+            unknown = selected - set(PLAYER_FIELDS)
+            if unknown:
+                raise HTTPException(status_code=400, detail=f"Campos desconocidos: {', '.join(sorted(unknown))}")
+        try:
+            after = decode_cursor(cursor) if cursor is not None else None
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+        rows, last = execute_with_retries(
+            query_players_page, db, current_user.id, club_id, scale,
+            fields=selected, name=name, descending=order == "desc", after=after, limit=limit,
+        )
+        items = []
+        for row in rows:
+            values = row._asdict()
+            if "photo_url" in selected:
+                values["photo_url"] = PlayerResponse.photo_url_for(values["photo_id"])
+            items.append({field: values[field] for field in PLAYER_FIELDS if field in selected})
+
+        if last is not None:
+            headers["X-Next-Cursor"] = encode_cursor(*last)
+        return JSONResponse(jsonable_encoder(items), headers=headers)
     except OperationalError:
         raise HTTPException(status_code=500, detail="Error al acceder a la base de datos. Inténtalo de nuevo más tarde.")
 
@@ -45,11 +134,17 @@ def save_player(
             raise HTTPException(status_code=403, detail="No tienes permisos para crear jugadores en este club")
     
     try:
-        # Crear nuevo jugador
+        try:
+            photo_id = resolve_photo_id(db, player_data)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+        # Crear nuevo jugador (la foto queda en el almacén de fotos, no en la fila del jugador)
+        values = player_data.model_dump(exclude={"photo_data", "photo_id", "remove_photo"})
         if scale == "1-10":
-            new_player = PlayerV2(**player_data.model_dump(), user_id=current_user.id)
+            new_player = PlayerV2(**values, photo_id=photo_id, user_id=current_user.id)
         else:
-            new_player = Player(**player_data.model_dump(), user_id=current_user.id)
+            new_player = Player(**values, photo_id=photo_id, user_id=current_user.id)
         db.add(new_player)
         db.commit()
         return new_player
@@ -78,8 +173,19 @@ def update_player(
             if not has_club_write_permission(db, existing_player.club_id, current_user.id):
                 raise HTTPException(status_code=403, detail="No tienes permisos para editar jugadores en este club")
 
-        for key, value in player_data.model_dump().items():
+        try:
+            photo_id = resolve_photo_id(db, player_data, existing_player.photo_id)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+        for key, value in player_data.model_dump(exclude={"photo_data", "photo_id", "remove_photo"}).items():
             setattr(existing_player, key, value)
+        existing_player.photo_id = photo_id
+        if player_data.photo_data or player_data.remove_photo:
+            existing_player.photo_data = None
+        elif photo_id is None and existing_player.photo_data:
+            # Foto en base64 todavía sin migrar: se pasa al almacén en vez de perderla
+            migrate_inline_photo(db, existing_player)
 
         db.commit()
         return existing_player
@@ -118,3 +224,31 @@ def delete_player(
         
     except OperationalError:
         raise HTTPException(status_code=500, detail="Error al eliminar el jugador. Inténtalo de nuevo más tarde.")
+
+@router.get("/api/photos/{photo_id}")
+def get_photo(
+        photo_id: str,
+        request: Request,
+        size: str = Query(None, pattern=f"^({'|'.join(THUMBNAIL_SIZES)})$"),
+        db: Session = Depends(get_db),
+        current_user: User = Depends(get_current_user)
+    ):
+    """Foto de un jugador, por el hash de su contenido; con `size`, una miniatura"""
+    if not current_user:
+        raise HTTPException(status_code=401, detail="No hay un usuario autenticado")
+
+    try:
+        if not execute_with_retries(can_view_photo, db, photo_id, current_user.id):
+            raise HTTPException(status_code=404, detail="Foto no encontrada")
+
+        # El id es el hash del contenido: junto con la variante sirve de ETag y la respuesta no cambia nunca
+        etag = f'"{photo_id}"' if size is None else f'"{photo_id}-{size}"'
+        headers = {"ETag": etag, "Cache-Control": PHOTO_CACHE_CONTROL, **PHOTO_SECURITY_HEADERS}
+        if etag_matches(request.headers.get("if-none-match"), etag):
+            return Response(status_code=304, headers=headers)
+
+        photo = execute_with_retries(load_photo_variant, db, photo_id, size)
+        headers["Content-Length"] = str(photo.size)
+        return StreamingResponse(photo_chunks(photo.data), media_type=photo.content_type, headers=headers)
+    except OperationalError:
+        raise HTTPException(status_code=500, detail="Error al acceder a la base de datos. Inténtalo de nuevo más tarde.")
@@ -0,0 +1,62 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+from app.config.settings import Settings
+
+
+class ExecutorBusyError(Exception):
+    """Se lanza cuando el executor ya tiene todos sus lugares ocupados."""
+
+
+class BoundedExecutor:
+    """Pool de hilos con admisión acotada para trabajo bloqueante fuera del event loop.
+
+    Admite hasta `max_workers` tareas en ejecución y `max_queue` en espera; con todos los
+    lugares ocupados, `run` falla de inmediato en lugar de encolar sin límite.
+    """
+
+    def __init__(self, max_workers: int, max_queue: int = 0, thread_name_prefix: str = ""):
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=thread_name_prefix)
+        self._slots = threading.BoundedSemaphore(max_workers + max_queue)
+
+    def submit(self, fn, *args, **kwargs):
+        if not self._slots.acquire(blocking=False):
+            raise ExecutorBusyError()
+        try:
+            return self._executor.submit(self._run_and_release, fn, *args, **kwargs)
+        except BaseException:
+            self._slots.release()
+            raise
+
+    def _run_and_release(self, fn, *args, **kwargs):
+        # El lugar se libera cuando termina la tarea, aunque quien la pidió ya no espere el resultado
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            self._slots.release()
+
+    async def run(self, fn, *args, **kwargs):
+        return await asyncio.wrap_future(self.submit(partial(fn, *args, **kwargs)))
+
+    def shutdown(self, wait: bool = True):
+        self._executor.shutdown(wait=wait)
+
+
+_build_teams_executor = None
+
+
+def get_build_teams_executor() -> BoundedExecutor:
+    # Un único executor por proceso, compartido por todos los pedidos de armado de equipos
+    global _build_teams_executor
+    if _build_teams_executor is None:
+        settings = Settings()
+        _build_teams_executor = BoundedExecutor(
+            settings.build_teams_max_concurrency,
+            settings.build_teams_max_queue,
+            thread_name_prefix="build-teams",
+        )
+    return _build_teams_executor
@@ -389,4 +389,40 @@ def cancel_club_invitation(db: Session, club_id: int, invitation_id: int, curren
     # Cancel the invitation
     invitation.status = models.InvitationStatus.CANCELLED.value
     db.commit()
-    return invitation
\ No newline at end of file
+    return invitation
+
+
+def get_club_attribute_weights(db: Session, club_id: int, current_user: models.User):
+    # Verificar que el club existe
+    club = db.query(models.Club).filter(models.Club.id == club_id).first()
+    if not club:
+        raise HTTPException(status_code=404, detail="Club not found")
+
+    # Verificar que el usuario actual es miembro del club
+    club_user = db.query(models.ClubUser).filter(models.ClubUser.club_id == club_id, models.ClubUser.user_id == current_user.id).first()
+    if not club_user:
+        raise HTTPException(status_code=403, detail="You are not a member of this club")
+
+    # Sin pesos guardados, todos los atributos pesan lo mismo
+    if club.attribute_weights is None:
+        return schemas.AttributeWeights()
+    return schemas.AttributeWeights.model_validate_json(club.attribute_weights)
+
+
+def update_club_attribute_weights(db: Session, club_id: int, weights: schemas.AttributeWeights, current_user: models.User):
+    # Verificar que el club existe
+    club = db.query(models.Club).filter(models.Club.id == club_id).first()
+    if not club:
+        raise HTTPException(status_code=404, detail="Club not found")
+
+    # Verificar que el usuario actual tiene rol de "owner" o "admin"
+    club_user = db.query(models.ClubUser).filter(models.ClubUser.club_id == club_id, models.ClubUser.user_id == current_user.id).first()
+    if not club_user or club_user.role not in ["admin", "owner"]:
+        raise HTTPException(status_code=403, detail="You don't have permission to change this club's weights")
+
+    if not any(weights.model_dump().values()):
+        raise HTTPException(status_code=400, detail="At least one attribute must have a weight")
+
+    club.attribute_weights = weights.model_dump_json()
+    db.commit()
+    return weights
@@ -0,0 +1,19 @@
+import hashlib
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    """Indica si el encabezado If-None-Match del cliente incluye `etag` (o es "*")."""
+    if not if_none_match:
+        return False
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        # La comparación débil ignora el prefijo W/
+        if candidate == "*" or candidate.removeprefix("W/") == etag.removeprefix("W/"):
+            return True
+    return False
+
+
+def weak_etag(*parts) -> str:
+    """ETag débil a partir de los valores que identifican una versión de la respuesta."""
+    digest = hashlib.sha256("|".join(map(str, parts)).encode()).hexdigest()[:32]
+    return f'W/"{digest}"'
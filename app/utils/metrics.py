@@ -0,0 +1,80 @@
+import threading
+import tracemalloc
+from contextlib import contextmanager
+
+
+class MetricsSink:
+    """Destino de métricas del proceso: acumula cantidad, suma y máximo de cada serie.
+
+    Una serie es un nombre más sus etiquetas (p. ej. motor y cantidad de jugadores). Para
+    enviar las métricas a otro sistema, se reemplaza con `set_metrics_sink` por una
+    subclase que redefina `observe`.
+    """
+
+    def __init__(self):
+        self._series = dict()
+        self._lock = threading.Lock()
+
+    def observe(self, name: str, value: float, **tags):
+        key = (name, tuple(sorted(tags.items())))
+        with self._lock:
+            count, total, maximum = self._series.get(key, (0, 0, value))
+            self._series[key] = (count + 1, total + value, max(maximum, value))
+
+    def snapshot(self):
+        with self._lock:
+            series = sorted(self._series.items(), key=lambda item: (item[0][0], str(item[0][1])))
+        return [
+            {"name": name, "tags": dict(tags), "count": count, "sum": total, "max": maximum}
+            for (name, tags), (count, total, maximum) in series
+        ]
+
+    def clear(self):
+        with self._lock:
+            self._series.clear()
+
+
+@contextmanager
+def traced_peak_memory():
+    """Mide con tracemalloc la memoria pico (bytes) asignada dentro del bloque.
+
+    tracemalloc es global al proceso: con otros hilos trabajando, la medición también
+    incluye lo que asignen ellos. Solo una medición a la vez; si ya hay otra en curso,
+    el resultado queda en None.
+    """
+    measurement = {"peak_memory": None}
+    if not _tracing_lock.acquire(blocking=False):
+        yield measurement
+        return
+    started = not tracemalloc.is_tracing()
+    try:
+        if started:
+            tracemalloc.start()
+        tracemalloc.reset_peak()
+        baseline = tracemalloc.get_traced_memory()[0]
+        yield measurement
+        measurement["peak_memory"] = tracemalloc.get_traced_memory()[1] - baseline
+    finally:
+        if started:
+            tracemalloc.stop()
+        _tracing_lock.release()
+
+
+_tracing_lock = threading.Lock()
+_metrics_sink = None
+_metrics_sink_lock = threading.Lock()
+
+
+def get_metrics_sink() -> MetricsSink:
+    # Con varios hilos, sin el lock se podrían crear dos sumideros y perder métricas
+    global _metrics_sink
+    with _metrics_sink_lock:
+        if _metrics_sink is None:
+            _metrics_sink = MetricsSink()
+        return _metrics_sink
+
+
+def set_metrics_sink(sink: MetricsSink):
+    global _metrics_sink
+    with _metrics_sink_lock:
+        _metrics_sink = sink
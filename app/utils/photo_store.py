@@ -0,0 +1,192 @@
+import base64
+import binascii
+import hashlib
+import re
+from io import BytesIO
+
+from PIL import Image, ImageOps, UnidentifiedImageError
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.db.models import PlayerPhoto, PlayerPhotoThumbnail
+
+# Tipos de imagen aceptados (los mismos que valida el frontend) y tamaño máximo de una foto.
+# SVG no: las fotos se sirven desde el mismo origen que la app y un SVG puede traer scripts
+PHOTO_CONTENT_TYPES = {"image/jpeg", "image/png", "image/gif", "image/webp", "image/bmp"}
+MAX_PHOTO_BYTES = 512 * 1024
+
+# El contenido de una foto no cambia nunca (su id es su hash): se puede cachear por un año
+PHOTO_CACHE_CONTROL = "private, max-age=31536000, immutable"
+
+# Las fotos son contenido de usuarios: el navegador no debe adivinar su tipo ni ejecutar nada
+# de ellas aunque se abran directamente (incluye fotos SVG guardadas antes de rechazarlas)
+PHOTO_SECURITY_HEADERS = {
+    "Content-Security-Policy": "sandbox; default-src 'none'",
+    "X-Content-Type-Options": "nosniff",
+}
+
+# Tamaño de cada bloque al enviar una foto
+PHOTO_CHUNK_SIZE = 64 * 1024
+
+# Variantes de miniatura (lado en píxeles, cuadradas): "small" para las listas y "medium"
+# para la ficha del jugador (avatar de 80 px en pantallas de alta densidad)
+THUMBNAIL_SIZES = {"small": 64, "medium": 160}
+THUMBNAIL_CONTENT_TYPE = "image/webp"
+THUMBNAIL_QUALITY = 80
+
+# Máximo de píxeles de una foto para generarle miniaturas (unos 100 MB en RGBA) y margen de
+# la reducción previa: se achica por bloques hasta 2x el tamaño final y recién ahí se filtra
+MAX_THUMBNAIL_SOURCE_PIXELS = 25_000_000
+THUMBNAIL_REDUCING_GAP = 2.0
+
+_DATA_URI = re.compile(r"data:([\w.+/-]+);base64,(.*)", re.DOTALL)
+
+
+def decode_data_uri(data_uri: str):
+    """(tipo de contenido, bytes) de una imagen en formato data URI; lanza ValueError si no es válida."""
+    match = _DATA_URI.fullmatch(data_uri)
+    if match is None or match.group(1) not in PHOTO_CONTENT_TYPES:
+        raise ValueError("La foto debe ser una imagen en base64 (data URI)")
+    try:
+        data = base64.b64decode(match.group(2), validate=True)
+    except binascii.Error:
+        raise ValueError("La foto no tiene un contenido base64 válido")
+    return match.group(1), data
+
+
+def make_thumbnail(data: bytes, side: int):
+    """Miniatura cuadrada (recortada al centro) en WebP, o None si la imagen no se puede decodificar.
+
+    Nunca agranda la imagen: si es más chica que `side`, la miniatura queda de su tamaño.
+    """
+    try:
+        with Image.open(BytesIO(data)) as image:
+            # Antes de decodificar: una foto chica comprimida puede tener cientos de megapíxeles
+            width, height = image.size
+            if width * height > MAX_THUMBNAIL_SOURCE_PIXELS:
+                return None
+            # Se achica antes de convertir: JPEG decodifica directo a escala reducida y el resto
+            # se reduce por bloques hasta cerca del tamaño final antes del filtro LANCZOS
+            short_side = min(width, height)
+            target = (-(-width * side // short_side), -(-height * side // short_side))
+            image.draft(image.mode, target)
+            if image.mode in ("1", "P"):
+                # Con paleta Pillow solo achica por vecino más cercano
+                image = image.convert("RGBA")
+            image.thumbnail(target, Image.Resampling.LANCZOS, reducing_gap=THUMBNAIL_REDUCING_GAP)
+            image = ImageOps.exif_transpose(image).convert("RGBA")
+            side = min(side, *image.size)
+            thumbnail = ImageOps.fit(image, (side, side), Image.Resampling.LANCZOS)
+            output = BytesIO()
+            thumbnail.save(output, "WEBP", quality=THUMBNAIL_QUALITY, method=6)
+    except (UnidentifiedImageError, OSError, ValueError, Image.DecompressionBombError):
+        return None
+    return output.getvalue()
+
+
+def store_thumbnail(db: Session, photo: PlayerPhoto, variant: str):
+    """Genera y guarda la miniatura `variant` de la foto; None si no se pudo generar. No hace commit."""
+    data = make_thumbnail(photo.data, THUMBNAIL_SIZES[variant])
+    if data is None:
+        return None
+    thumbnail = PlayerPhotoThumbnail(
+        photo_id=photo.id, variant=variant, content_type=THUMBNAIL_CONTENT_TYPE, data=data, size=len(data)
+    )
+    db.add(thumbnail)
+    db.flush()
+    return thumbnail
+
+
+def store_photo(db: Session, content_type: str, data: bytes) -> str:
+    """Guarda la foto y sus miniaturas si no existe y devuelve su id (SHA-256 del contenido). No hace commit."""
+    photo_id = hashlib.sha256(data).hexdigest()
+    if db.get(PlayerPhoto, photo_id) is None:
+        photo = PlayerPhoto(id=photo_id, content_type=content_type, data=data, size=len(data))
+        db.add(photo)
+        db.flush()
+        # Las miniaturas se generan al guardar: las listas piden unos pocos KB por avatar
+        for variant in THUMBNAIL_SIZES:
+            store_thumbnail(db, photo, variant)
+    return photo_id
+
+
+def store_data_uri(db: Session, data_uri: str, max_bytes: int = MAX_PHOTO_BYTES) -> str:
+    content_type, data = decode_data_uri(data_uri)
+    if len(data) > max_bytes:
+        raise ValueError(f"La foto no puede superar los {max_bytes // 1024} KB")
+    return store_photo(db, content_type, data)
+
+
+def migrate_inline_photo(db: Session, player) -> bool:
+    """Pasa la foto en base64 de `player.photo_data` al almacén; False si no es un data URI válido (queda igual). No hace commit."""
+    try:
+        content_type, data = decode_data_uri(player.photo_data)
+    except ValueError:
+        return False
+    player.photo_id = store_photo(db, content_type, data)
+    player.photo_data = None
+    return True
+
+
+def load_photo_variant(db: Session, photo_id: str, variant: str = None):
+    """La foto original o su miniatura `variant` (objeto con content_type, data y size).
+
+    Las fotos guardadas antes de que existieran las miniaturas las generan en el primer
+    pedido y quedan guardadas; si dos pedidos la generan a la vez, se usa la del primero.
+    Si la imagen no se puede achicar (p. ej. SVG), se devuelve la original.
+    """
+    photo = db.get(PlayerPhoto, photo_id)
+    if photo is None or variant is None:
+        return photo
+    thumbnail = db.get(PlayerPhotoThumbnail, (photo_id, variant))
+    if thumbnail is None:
+        try:
+            with db.begin_nested():
+                thumbnail = store_thumbnail(db, photo, variant)
+        except IntegrityError:
+            # Otro pedido la guardó al mismo tiempo: se usa esa
+            return db.get(PlayerPhotoThumbnail, (photo_id, variant))
+        if thumbnail is None:
+            return photo
+        db.commit()
+    return thumbnail
+
+
+def photo_chunks(data: bytes):
+    view = memoryview(data)
+    for start in range(0, len(view), PHOTO_CHUNK_SIZE):
+        yield bytes(view[start:start + PHOTO_CHUNK_SIZE])
+
+
+def backfill_inline_photos(db: Session, PlayerModel, batch_size: int = 100, on_batch=None):
+    """Mueve las fotos en base64 de `PlayerModel.photo_data` al almacén de fotos, de a lotes.
+
+    Cada lote se confirma por separado (se puede cortar y volver a correr). Las fotos que no
+    son un data URI válido se dejan como están. Devuelve (migradas, inválidas).
+    """
+    migrated = 0
+    invalid = 0
+    last_id = 0
+    while True:
+        # Paginación por id: las filas inválidas quedan atrás y no se vuelven a leer
+        players = (
+            db.query(PlayerModel)
+            .filter(PlayerModel.id > last_id, PlayerModel.photo_data.isnot(None), PlayerModel.photo_id.is_(None))
+            .order_by(PlayerModel.id)
+            .limit(batch_size)
+            .all()
+        )
+        if not players:
+            return migrated, invalid
+        for player in players:
+            if migrate_inline_photo(db, player):
+                migrated += 1
+            else:
+                invalid += 1
+        last_id = players[-1].id
+        db.commit()
+        # Las filas ya procesadas no hacen falta en la sesión
+        for player in players:
+            db.expunge(player)
+        if on_batch is not None:
+            on_batch(migrated, invalid)
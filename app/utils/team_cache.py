@@ -0,0 +1,259 @@
+import threading
+import time
+from collections import OrderedDict
+
+from app.config.settings import Settings
+from app.utils.team_optimizer import (
+    _canonical_partition,
+    _partition_from_masks,
+    _split_from_mask,
+    _splits_from_masks,
+    apply_attribute_weights,
+    find_best_combination,
+    find_best_partition,
+)
+
+
+def canonical_roster(scores):
+    """Orden canónico de los jugadores: por vector de puntajes, sin importar el orden de entrada.
+
+    Devuelve la permutación (posición canónica -> índice original) y los vectores ordenados,
+    que sirven de firma del plantel. Los vectores repetidos conservan su orden relativo.
+    """
+    order = sorted(range(len(scores)), key=lambda i: tuple(scores[i]))
+    return order, tuple(tuple(scores[i]) for i in order)
+
+
+def _restore_mask(mask, order):
+    # Máscara sobre el orden canónico -> máscara sobre los índices originales
+    restored = 0
+    while mask:
+        low = mask & -mask
+        restored |= 1 << order[low.bit_length() - 1]
+        mask ^= low
+    return restored
+
+
+def _restore_split(team1, order, n, pinned):
+    # Con equipos del mismo tamaño, el jugador 0 vuelve al equipo 1 como en el resultado
+    # sin caché (salvo con jugadores fijos en un equipo)
+    original = _restore_mask(team1, order)
+    if pinned and n % 2 == 0 and not original & 1:
+        original ^= (1 << n) - 1
+    return original
+
+
+def _restore_result(mejores_equipos, order, ranked, pinned=True):
+    # La caché guarda máscaras: recién al devolver el resultado se pasan a listas de índices
+    n = len(order)
+    restored = [_restore_split(team1, order, n, pinned) for team1 in mejores_equipos]
+    # Sin `top_k` el resultado va en orden lexicográfico; con `top_k`, de mejor a peor
+    if not ranked:
+        return _splits_from_masks(restored, n)
+    return [_split_from_mask(team1, n) for team1 in restored]
+
+
+def _restore_partitions(partitions, order):
+    # Equipos ordenados por tamaño y por su jugador de menor índice como en el resultado sin caché
+    n = len(order)
+    return [
+        _partition_from_masks(_canonical_partition(_restore_mask(team, order) for team in partition), n)
+        for partition in partitions
+    ]
+
+
+def _entry_size(signature, mejores_equipos):
+    # Estimación de la memoria de una entrada: 8 bytes por número y por máscara guardados
+    return 8 * (sum(len(row) for row in signature) + len(mejores_equipos))
+
+
+class TeamOptimizationCache:
+    """Caché de resultados de `find_best_combination` por firma canónica del plantel.
+
+    Descarta primero las entradas menos usadas (LRU), las vencidas (`ttl` segundos) y las
+    que exceden `max_entries` o `max_bytes` (estimados). Guarda resultados óptimos y, para
+    varios equipos, también los cortados por el plazo (ver `find_best_partition`).
+
+    Sin `top_k` el resultado es el del recorrido original de `find_best_combination`, que
+    depende del orden de los jugadores: en ese caso la firma conserva el orden de entrada.
+    """
+
+    def __init__(self, max_entries: int, ttl: float, max_bytes: int):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.size = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _get(self, key, usable=None):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] < time.monotonic():
+                self._discard(key)
+                entry = None
+            # Una entrada que no sirve para este pedido cuenta como fallo (se reemplaza al guardar)
+            if entry is not None and usable is not None and not usable(entry):
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def _put(self, key, mejores_equipos, min_difference_total, stats, time_budget=None):
+        size = _entry_size(key[0], mejores_equipos)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._discard(key)
+            self._entries[key] = (
+                time.monotonic() + self.ttl, mejores_equipos, min_difference_total, dict(stats), size, time_budget
+            )
+            self.size += size
+            while len(self._entries) > self.max_entries or self.size > self.max_bytes:
+                self._discard(next(iter(self._entries)))
+
+    def _discard(self, key):
+        self.size -= self._entries.pop(key)[4]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
+
+    def stats(self):
+        with self._lock:
+            return {"entries": len(self._entries), "bytes": self.size, "hits": self.hits, "misses": self.misses}
+
+    def find_best_combination(
+        self,
+        scores,
+        stats=None,
+        top_k=None,
+        seed=0,
+        on_progress=None,
+        previous_team1=None,
+        constraints=None,
+        weights=None,
+        **options,
+    ):
+        """Igual que `find_best_combination`, pero resuelve el plantel en orden canónico y reutiliza resultados."""
+        if stats is None:
+            stats = dict()
+        # Los pesos se aplican antes de calcular la firma: quedan incluidos en la clave
+        if weights is not None:
+            scores = apply_attribute_weights(scores, weights)
+        ranked = top_k is not None
+        if ranked:
+            order, signature = canonical_roster(scores)
+        else:
+            # La lista de empates depende del orden de los jugadores: se resuelve tal cual llega
+            order, signature = list(range(len(scores))), tuple(tuple(row) for row in scores)
+        position = {original: canonical for canonical, original in enumerate(order)}
+        # Las restricciones se expresan sobre el orden canónico para que formen parte de la clave
+        if constraints is not None:
+            constraints = constraints.remap(position)
+        key = (signature, top_k, seed, None if constraints is None else constraints.key())
+        pinned = constraints is None or not constraints.has_locks
+
+        entry = self._get(key)
+        if entry is not None:
+            expires_at, mejores_equipos, min_difference_total, cached_stats, size, _ = entry
+            stats.update(cached_stats)
+            stats["cache_hit"] = True
+            return (_restore_result(mejores_equipos, order, ranked, pinned), min_difference_total)
+
+        def report_progress(mejores_equipos, min_difference_total):
+            on_progress(_restore_result(mejores_equipos, order, ranked, pinned), min_difference_total)
+
+        if previous_team1 is not None:
+            previous_team1 = [position[i] for i in previous_team1]
+
+        mejores_equipos, min_difference_total = find_best_combination(
+            [list(row) for row in signature],
+            stats=stats,
+            top_k=top_k,
+            seed=seed,
+            on_progress=None if on_progress is None else report_progress,
+            previous_team1=previous_team1,
+            constraints=constraints,
+            as_masks=True,
+            **options,
+        )
+        stats["cache_hit"] = False
+        # Un resultado cortado por tiempo o cancelación puede mejorar en otro intento
+        if stats["optimal"]:
+            self._put(key, mejores_equipos, min_difference_total, stats)
+        return (_restore_result(mejores_equipos, order, ranked, pinned), min_difference_total)
+
+    def find_best_partition(
+        self, scores, num_teams, stats=None, top_k=1, seed=0, on_progress=None, weights=None, **options
+    ):
+        """Igual que `find_best_partition`, con la misma caché por firma canónica del plantel.
+
+        Con muchos jugadores la búsqueda rara vez prueba la optimalidad dentro del plazo, así
+        que también se guarda lo mejor encontrado (con `stats["optimal"]` en False). Ese
+        resultado solo se reutiliza en pedidos con el mismo plazo o uno menor; los que dan
+        más tiempo vuelven a buscar. Una búsqueda cancelada no se guarda.
+        """
+        if stats is None:
+            stats = dict()
+        if weights is not None:
+            scores = apply_attribute_weights(scores, weights)
+        order, signature = canonical_roster(scores)
+        key = (signature, top_k, seed, ("partition", num_teams))
+
+        time_budget = options.get("time_budget")
+
+        def usable(entry):
+            return entry[3]["optimal"] or (time_budget is not None and time_budget <= entry[5])
+
+        entry = self._get(key, usable)
+        if entry is not None:
+            expires_at, partitions, max_difference_total, cached_stats, size, _ = entry
+            stats.update(cached_stats)
+            stats["cache_hit"] = True
+            return (_restore_partitions(partitions, order), max_difference_total)
+
+        def report_progress(partitions, max_difference_total):
+            on_progress(_restore_partitions(partitions, order), max_difference_total)
+
+        partitions, max_difference_total = find_best_partition(
+            [list(row) for row in signature],
+            num_teams,
+            stats=stats,
+            top_k=top_k,
+            seed=seed,
+            on_progress=None if on_progress is None else report_progress,
+            as_masks=True,
+            **options,
+        )
+        stats["cache_hit"] = False
+        cancel_event = options.get("cancel_event")
+        if stats["optimal"] or (time_budget is not None and (cancel_event is None or not cancel_event.is_set())):
+            self._put(key, partitions, max_difference_total, stats, time_budget)
+        return (_restore_partitions(partitions, order), max_difference_total)
+
+
+_team_cache = None
+_team_cache_lock = threading.Lock()
+
+
+def get_team_cache() -> TeamOptimizationCache:
+    # Los pedidos llegan desde varios hilos: sin el lock, los primeros podrían crear cachés
+    # distintas y perder los resultados guardados en las demás
+    global _team_cache
+    with _team_cache_lock:
+        if _team_cache is None:
+            settings = Settings()
+            _team_cache = TeamOptimizationCache(
+                settings.optimizer_cache_max_entries,
+                settings.optimizer_cache_ttl,
+                settings.optimizer_cache_max_bytes,
+            )
+        return _team_cache
@@ -0,0 +1,121 @@
+import json
+import logging
+import threading
+import time
+import uuid
+
+from app.config.settings import Settings
+
+# Estados en los que el trabajo ya no cambia
+FINISHED_STATUSES = ("done", "cancelled", "failed")
+
+
+class TeamBuildingJob:
+    """Armado de equipos en segundo plano: estado, último avance y resultado."""
+
+    def __init__(self, user_id: int):
+        self.id = uuid.uuid4().hex
+        self.user_id = user_id
+        self.status = "pending"
+        self.progress = None
+        self.result = None
+        self.cancel_event = threading.Event()
+        # Cada cambio incrementa la versión, así quien lee sabe si hay algo nuevo
+        self.version = 0
+        self.updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    @property
+    def finished(self) -> bool:
+        return self.status in FINISHED_STATUSES
+
+    def update(self, **changes):
+        with self._lock:
+            for name, value in changes.items():
+                setattr(self, name, value)
+            self.version += 1
+            self.updated_at = time.monotonic()
+
+    def snapshot(self):
+        with self._lock:
+            return self.version, self.status, self.progress, self.result
+
+    def cancel(self):
+        self.cancel_event.set()
+
+    def run(self, fn, *args, **kwargs):
+        """Ejecuta `fn` en el hilo actual pasándole la cancelación y el reporte de avance del trabajo."""
+        self.update(status="running")
+        try:
+            result = fn(
+                *args,
+                cancel_event=self.cancel_event,
+                on_progress=lambda progress: self.update(progress=progress),
+                **kwargs,
+            )
+        except Exception as e:
+            logging.exception("Error building teams in job %s: %s", self.id, str(e))
+            self.update(status="failed", result={"error": "Error interno al armar equipos"})
+            return
+        # Un trabajo cancelado conserva lo mejor que se encontró hasta el momento
+        self.update(status="cancelled" if self.cancel_event.is_set() else "done", result=result)
+
+
+class JobRegistry:
+    """Registro en memoria de los trabajos del proceso; descarta los que no cambian hace más de `ttl` segundos."""
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self._jobs = dict()
+        self._lock = threading.Lock()
+
+    def create(self, user_id: int) -> TeamBuildingJob:
+        self.evict_expired()
+        job = TeamBuildingJob(user_id)
+        with self._lock:
+            self._jobs[job.id] = job
+        return job
+
+    def get(self, job_id: str, user_id: int) -> TeamBuildingJob | None:
+        # Cada usuario solo ve sus propios trabajos
+        self.evict_expired()
+        with self._lock:
+            job = self._jobs.get(job_id)
+        if job is None or job.user_id != user_id:
+            return None
+        return job
+
+    def remove(self, job_id: str):
+        with self._lock:
+            job = self._jobs.pop(job_id, None)
+        if job is not None:
+            job.cancel()
+
+    def evict_expired(self):
+        now = time.monotonic()
+        with self._lock:
+            expired = [job for job in self._jobs.values() if now - job.updated_at > self.ttl]
+            for job in expired:
+                del self._jobs[job.id]
+        # Un trabajo vencido que sigue corriendo no tiene a nadie esperándolo
+        for job in expired:
+            job.cancel()
+
+
+def format_event(event: str, data) -> str:
+    """Mensaje de Server-Sent Events con `data` serializado como JSON."""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+_job_registry = None
+_job_registry_lock = threading.Lock()
+
+
+def get_job_registry() -> JobRegistry:
+    # Con varios hilos, sin el lock se podrían crear dos registros y un trabajo creado en
+    # uno no se encontraría en el otro
+    global _job_registry
+    with _job_registry_lock:
+        if _job_registry is None:
+            _job_registry = JobRegistry(Settings().build_teams_job_ttl)
+        return _job_registry
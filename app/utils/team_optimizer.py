@@ -1,4 +1,201 @@
-from itertools import combinations
+import heapq
+import multiprocessing
+import threading
+import time
+from bisect import bisect_right
+from concurrent.futures import ProcessPoolExecutor
+from itertools import chain, combinations, islice, repeat
+from functools import reduce
+from math import comb, gcd
+
+import numpy as np
+
+# Cantidad de combinaciones que el motor vectorizado evalúa por bloque
+NUMPY_CHUNK_SIZE = 16384
+
+# Las máscaras de equipo del motor branch_and_bound son enteros de 64 bits
+MAX_BRANCH_AND_BOUND_PLAYERS = 62
+
+# Cada mitad del motor meet_in_the_middle enumera hasta 2^(n/2) subconjuntos en memoria
+MAX_MEET_IN_THE_MIDDLE_PLAYERS = 40
+
+# La cota por proyección de signos usa una tabla de 2^atributos patrones
+MAX_PROJECTED_ATTRIBUTES = 10
+
+# Con menos jugadores se resuelve siempre en un solo proceso (no compensa serializar)
+PARALLEL_MIN_PLAYERS = 20
+
+# Fragmentos por proceso: más fragmentos reparten mejor la carga entre procesos
+SHARDS_PER_WORKER = 4
+
+# Cada cuántas combinaciones los motores en Python puro consultan el límite de tiempo
+CONTROL_CHECK_INTERVAL = 4096
+
+# Con el motor "auto", hasta esta cantidad de jugadores se usa la búsqueda exhaustiva vectorizada
+AUTO_EXHAUSTIVE_MAX_PLAYERS = 20
+
+# Sin presupuesto de tiempo, la búsqueda local termina tras tantos óptimos locales seguidos sin mejora
+LOCAL_SEARCH_MAX_STALLS = 200
+
+# Óptimos locales sin mejora tras los que se corta la exploración del vecindario de una solución previa
+NEIGHBOURHOOD_MAX_STALLS = 10
+
+# Fracción del presupuesto de tiempo que el motor "auto" dedica a la búsqueda local inicial,
+# con un máximo en segundos: solo busca cotas para la búsqueda exacta, que hace el resto
+AUTO_LOCAL_SEARCH_SHARE = 0.25
+AUTO_LOCAL_SEARCH_MAX_SECONDS = 0.05
+
+# Segundos mínimos entre dos reportes de avance
+PROGRESS_INTERVAL = 0.5
+
+
+class SearchControl:
+    """Límite de tiempo, cancelación y reporte de avance que los motores consultan periódicamente."""
+
+    def __init__(self, time_budget=None, cancel_event=None, on_progress=None):
+        self.deadline = None if time_budget is None else time.monotonic() + time_budget
+        self.cancel_event = cancel_event
+        self.on_progress = on_progress
+        self._next_progress = time.monotonic() + PROGRESS_INTERVAL
+
+    def limited(self, time_budget):
+        # Control para una etapa de la búsqueda: misma cancelación y avance, con un plazo propio
+        remaining = self.remaining()
+        if remaining is not None:
+            time_budget = remaining if time_budget is None else min(time_budget, remaining)
+        return SearchControl(time_budget, self.cancel_event, self.on_progress)
+
+    def remaining(self):
+        if self.deadline is None:
+            return None
+        return max(self.deadline - time.monotonic(), 0.0)
+
+    def should_stop(self):
+        now = time.monotonic()
+        if self.on_progress is not None and now >= self._next_progress:
+            self._next_progress = now + PROGRESS_INTERVAL
+            self.on_progress()
+        if self.cancel_event is not None and self.cancel_event.is_set():
+            return True
+        return self.deadline is not None and now >= self.deadline
+
+    def __getstate__(self):
+        # A otros procesos solo viaja el plazo: el evento de cancelación y el reporte de
+        # avance quedan en el proceso que pidió la búsqueda
+        return {"deadline": self.deadline, "cancel_event": None, "on_progress": None, "_next_progress": 0}
+
+
+class TeamConstraints:
+    """Restricciones del armado sobre índices de jugadores en `scores`.
+
+    `together` son grupos de jugadores que van en el mismo equipo, `apart` pares que van
+    en equipos distintos y `team1`/`team2` jugadores fijos en cada equipo.
+    """
+
+    def __init__(self, together=(), apart=(), team1=(), team2=()):
+        self.together = [tuple(group) for group in together]
+        self.apart = [tuple(pair) for pair in apart]
+        self.team1 = tuple(team1)
+        self.team2 = tuple(team2)
+        if any(len(pair) != 2 for pair in self.apart):
+            raise ValueError("Cada par de jugadores separados debe tener dos jugadores")
+
+    @property
+    def has_locks(self):
+        return bool(self.team1 or self.team2)
+
+    def players(self):
+        # Todos los jugadores mencionados en alguna restricción
+        return {i for group in self.together + self.apart for i in group} | set(self.team1) | set(self.team2)
+
+    def key(self):
+        # Forma canónica (independiente del orden en que se dieron) para usar como clave de caché
+        return (
+            tuple(sorted(tuple(sorted(group)) for group in self.together)),
+            tuple(sorted(tuple(sorted(pair)) for pair in self.apart)),
+            tuple(sorted(self.team1)),
+            tuple(sorted(self.team2)),
+        )
+
+    def remap(self, position):
+        # Las mismas restricciones con los jugadores renumerados según `position`
+        return TeamConstraints(
+            [[position[i] for i in group] for group in self.together],
+            [[position[i] for i in pair] for pair in self.apart],
+            [position[i] for i in self.team1],
+            [position[i] for i in self.team2],
+        )
+
+    def rules(self, n):
+        """Resuelve las restricciones para `n` jugadores.
+
+        Devuelve, por jugador, el equipo fijo (True: equipo 1, False: equipo 2, None: libre)
+        y la referencia de su grupo junto con si va en el equipo contrario a ella. Lanza
+        ValueError si un índice no existe o si las restricciones se contradicen.
+        """
+        if any(not 0 <= i < n for i in self.players()):
+            raise ValueError("Las restricciones mencionan jugadores que no están en la lista")
+
+        # Union-find con paridad: la paridad de cada jugador indica si va en el mismo equipo
+        # que su padre (0) o en el otro (1). El nodo `n` representa al equipo 1
+        parent = list(range(n + 1))
+        parity = [0] * (n + 1)
+
+        def find(i):
+            relative = 0
+            while parent[i] != i:
+                relative ^= parity[i]
+                i = parent[i]
+            return i, relative
+
+        def join(a, b, differ):
+            root_a, parity_a = find(a)
+            root_b, parity_b = find(b)
+            if root_a == root_b:
+                if parity_a ^ parity_b != differ:
+                    raise ValueError("Las restricciones de equipos son contradictorias")
+                return
+            parent[root_b] = root_a
+            parity[root_b] = parity_a ^ parity_b ^ differ
+
+        for group in self.together:
+            for other in group[1:]:
+                join(group[0], other, 0)
+        for a, b in self.apart:
+            join(a, b, 1)
+        for player in self.team1:
+            join(n, player, 0)
+        for player in self.team2:
+            join(n, player, 1)
+
+        team1_root, team1_parity = find(n)
+        locked = [None] * n
+        links = [None] * n
+        for player in range(n):
+            root, relative = find(player)
+            if root == team1_root:
+                locked[player] = relative == team1_parity
+            else:
+                links[player] = (root, relative)
+        return locked, links
+
+    def checker(self, n):
+        """Función que recibe un arreglo de máscaras del equipo 1 e indica cuáles cumplen las restricciones."""
+        locked, links = self.rules(n)
+        lock_players, lock_sides = np.array(
+            [(i, locked[i]) for i in range(n) if locked[i] is not None], dtype=np.int64
+        ).reshape(-1, 2).T
+        link_players, link_roots, link_differ = np.array(
+            [(i,) + links[i] for i in range(n) if links[i] is not None and links[i][0] != i], dtype=np.int64
+        ).reshape(-1, 3).T
+
+        def satisfied(masks):
+            masks = np.asarray(masks, dtype=np.int64)[:, None]
+            valid = (((masks >> lock_players) & 1) == lock_sides).all(axis=1)
+            valid &= ((((masks >> link_players) ^ (masks >> link_roots)) & 1) == link_differ).all(axis=1)
+            return valid
+
+        return satisfied
 
 
 def calculate_team_score(indices, scores):
@@ -13,47 +210,1411 @@ def calculate_difference(team1_score, team2_score):
     return sum(abs(team1_score[i] - team2_score[i]) for i in range(len(team1_score)))
 
 
-def find_best_combination(scores):
+def apply_attribute_weights(scores, weights):
+    """Puntajes con cada atributo multiplicado por su peso entero (0 ignora el atributo).
+
+    Como |w_j * x_j| = w_j * |x_j|, balancear los puntajes ponderados minimiza la diferencia
+    ponderada sin tocar los motores. Los pesos se reducen por su máximo común divisor, así
+    pesos proporcionales dan el mismo problema.
+    """
+    if len(weights) != len(scores[0]):
+        raise ValueError("Se requiere un peso por atributo")
+    if any(not isinstance(weight, (int, np.integer)) or weight < 0 for weight in weights):
+        raise ValueError("Los pesos de los atributos deben ser enteros no negativos")
+    divisor = reduce(gcd, (int(weight) for weight in weights))
+    if divisor == 0:
+        raise ValueError("Al menos un atributo debe tener peso")
+    weights = np.array(weights, dtype=np.int64) // divisor
+    return (np.asarray(scores, dtype=np.int64) * weights).tolist()
+
+
+def _enumeration_space(n, team_size, prefix=None):
+    # `prefix` son los primeros jugadores del equipo 1 (en orden); los que faltan se eligen
+    # entre los jugadores posteriores al último del prefijo. Si los equipos tienen el mismo
+    # tamaño, fijar al jugador 0 en el equipo 1 evita evaluar los duplicados simétricos
+    # (equivale a la primera mitad de la lista completa de combinaciones).
+    # Si tienen tamaños diferentes, se evalúan todas las combinaciones
+    if prefix is None:
+        prefix = (0,) if n % 2 == 0 else ()
+    start = prefix[-1] + 1 if prefix else 0
+    return tuple(prefix), list(range(start, n)), team_size - len(prefix)
+
+
+def _team1_combinations(n, team_size, prefix=None):
+    # Las combinaciones se generan de forma perezosa y en orden lexicográfico
+    pinned, movable, chosen = _enumeration_space(n, team_size, prefix)
+    return pinned, combinations(movable, chosen)
+
+
+def _split_from_mask(mask, n):
+    return (tuple(i for i in range(n) if mask >> i & 1), [i for i in range(n) if not mask >> i & 1])
+
+
+def _lexicographic_key(mask, n):
+    # Entre equipos del mismo tamaño, el orden lexicográfico de sus índices es el orden
+    # inverso de las máscaras con los bits invertidos (gana el que tiene el menor jugador distinto)
+    return int(f"{mask:0{n}b}"[::-1], 2)
+
+
+def _lexicographic_keys(masks, n):
+    # La misma clave para un arreglo de máscaras (hasta 62 jugadores)
+    keys = np.zeros(len(masks), dtype=np.int64)
+    for player in range(n):
+        keys |= (masks >> player & 1) << (n - 1 - player)
+    return keys
+
+
+def _lexicographic_masks(masks, n):
+    return sorted(masks, key=lambda mask: _lexicographic_key(mask, n), reverse=True)
+
+
+def _splits_from_masks(masks, n):
+    return [_split_from_mask(mask, n) for mask in _lexicographic_masks(masks, n)]
+
+
+_MASK64 = (1 << 64) - 1
+
+
+def _mix64(value):
+    # Mezcla de bits splitmix64, usada como desempate pseudoaleatorio y reproducible
+    value = (value + 0x9E3779B97F4A7C15) & _MASK64
+    value = ((value ^ (value >> 30)) * 0xBF58476D1CE4E5B9) & _MASK64
+    value = ((value ^ (value >> 27)) * 0x94D049BB133111EB) & _MASK64
+    return value ^ (value >> 31)
+
+
+def _mix64_array(values):
+    # La misma mezcla sobre un arreglo uint64 (la aritmética de numpy es módulo 2^64)
+    values = values + np.uint64(0x9E3779B97F4A7C15)
+    values = (values ^ (values >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    values = (values ^ (values >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return values ^ (values >> np.uint64(31))
+
+
+def _tie_break(mask, salt):
+    # Las máscaras de más de 64 bits se mezclan de a una palabra
+    tie_break = salt
+    while True:
+        tie_break = _mix64(tie_break ^ (mask & _MASK64))
+        mask >>= 64
+        if not mask:
+            return tie_break
+
+
+# Cota de una clave cuando ninguna combinación conocida la limita (arreglos enteros)
+_UNBOUNDED = np.iinfo(np.int64).max
+
+
+class _TiedSplits:
+    """Las combinaciones que devuelve el recorrido original de `find_best_combination`.
+
+    El recorrido original evalúa las combinaciones en orden lexicográfico y su resultado
+    depende de ese orden: cada combinación que baja la diferencia por atributo mínima la
+    actualiza, pero solo reemplaza la lista de mejores equipos si también baja la diferencia
+    total; se agregan a la lista las siguientes con esa diferencia mínima y ese mismo total.
+
+    Para que los motores puedan ofrecer las combinaciones en cualquier orden se guardan
+    todas las que ninguna anterior (en orden lexicográfico) supera en diferencia por
+    atributo: son las únicas que cambian el estado del recorrido, y `result` lo repite
+    sobre ellas. Se agrupan en niveles de igual diferencia, que baja de un nivel al siguiente.
+    """
+
+    def __init__(self, n):
+        self.n = n
+        # Cada nivel es [diferencia, {clave lexicográfica: (diferencia total, máscara)}].
+        # `firsts` tiene la clave negada de la primera combinación de cada nivel (creciente)
+        self.levels = list()
+        self.firsts = list()
+
+    def _level_at(self, key):
+        # Índice del último nivel que empieza en `key` o antes (-1 si no hay)
+        return bisect_right(self.firsts, -key) - 1
+
+    def bound(self, mask):
+        # Clave que no puede superar una combinación igual o posterior a `mask` para cambiar
+        # el resultado: la diferencia mínima entre las anteriores, con cualquier total
+        index = self._level_at(_lexicographic_key(mask, self.n))
+        return (self.levels[index][0] if index >= 0 else float("inf"), float("inf"))
+
+    def bounds(self, keys):
+        # `bound` para un arreglo de claves lexicográficas (el índice -1 cae en `_UNBOUNDED`)
+        index = np.searchsorted(np.array(self.firsts, dtype=np.int64), -keys, side="right") - 1
+        differences = np.array([level[0] for level in self.levels] + [_UNBOUNDED], dtype=np.int64)
+        return differences[index], _UNBOUNDED
+
+    def threshold(self):
+        # Cota para cualquier combinación: la de la primera en orden lexicográfico
+        return self.bound((1 << self.n // 2) - 1)
+
+    def offer(self, difference, difference_total, mask, key=None):
+        if key is None:
+            key = _lexicographic_key(mask, self.n)
+        index = self._level_at(key)
+        if index >= 0:
+            level_difference, points = self.levels[index]
+            if key in points or level_difference < difference:
+                return
+            if level_difference == difference:
+                points[key] = (difference_total, mask)
+                return
+            # Supera a las combinaciones posteriores de su nivel
+            for later in [other for other in points if other < key]:
+                del points[later]
+        # Empieza un nivel: descarta los siguientes con más diferencia y absorbe el de igual diferencia
+        points = {key: (difference_total, mask)}
+        while index + 1 < len(self.levels) and self.levels[index + 1][0] >= difference:
+            if self.levels[index + 1][0] == difference:
+                points.update(self.levels[index + 1][1])
+            del self.levels[index + 1]
+            del self.firsts[index + 1]
+        self.levels.insert(index + 1, [difference, points])
+        self.firsts.insert(index + 1, -key)
+
+    def offer_many(self, differences, difference_totals, masks):
+        keys = _lexicographic_keys(masks, self.n)
+        candidates = differences <= self.bounds(keys)[0]
+        if not candidates.any():
+            return
+        differences, difference_totals, masks, keys = (
+            differences[candidates], difference_totals[candidates], masks[candidates], keys[candidates]
+        )
+        # Dentro del bloque, en orden lexicográfico, solo las que no supera ninguna anterior del bloque
+        order = np.argsort(-keys, kind="stable")
+        ordered = differences[order]
+        previous = np.minimum.accumulate(np.concatenate(([_UNBOUNDED], ordered[:-1])))
+        for i in order[ordered <= previous].tolist():
+            self.offer(differences[i].item(), difference_totals[i].item(), masks[i].item(), keys[i].item())
+
+    def entries(self):
+        return [(difference,) + point for difference, points in self.levels for point in points.values()]
+
+    def result(self, n, as_masks=False):
+        if not self.levels:
+            return ([], float("inf"))
+        # La primera combinación de cada nivel baja la diferencia mínima; la lista se reemplaza
+        # con la última que también bajó la diferencia total
+        min_difference_total = float("inf")
+        for index, (difference, points) in enumerate(self.levels):
+            first_total, first_mask = points[-self.firsts[index]]
+            if first_total < min_difference_total:
+                min_difference_total, start, masks = first_total, index, [first_mask]
+        # y se le agregan las posteriores de ese nivel o de los siguientes con el mismo total
+        for index in range(start, len(self.levels)):
+            first = -self.firsts[index]
+            masks.extend(
+                mask for key, (total, mask) in self.levels[index][1].items()
+                if key != first and total == min_difference_total
+            )
+        if as_masks:
+            return (_lexicographic_masks(masks, n), min_difference_total)
+        return (_splits_from_masks(masks, n), min_difference_total)
+
+
+class _TopSplits:
+    """Las `size` mejores combinaciones distintas según (diferencia, diferencia total).
+
+    Entre combinaciones con la misma clave decide un desempate pseudoaleatorio derivado
+    de `seed`: el resultado es reproducible y no favorece el orden de los jugadores.
+    """
+
+    def __init__(self, size, seed=0):
+        self.size = size
+        self.salt = _mix64(seed & _MASK64)
+        # Montículo de máximos (valores negados): la raíz es la peor combinación conservada
+        self.heap = list()
+        self.masks = set()
+
+    def threshold(self):
+        if len(self.heap) < self.size:
+            return (float("inf"), float("inf"))
+        return (-self.heap[0][0], -self.heap[0][1])
+
+    # El orden lexicográfico no importa: la cota es la misma para todas las combinaciones
+    def bound(self, mask):
+        return self.threshold()
+
+    def bounds(self, keys):
+        return self.threshold()
+
+    def offer(self, difference, difference_total, mask, tie_break=None):
+        if mask in self.masks:
+            return
+        if tie_break is None:
+            tie_break = _tie_break(mask, self.salt)
+        entry = (-difference, -difference_total, -tie_break, mask)
+        if len(self.heap) < self.size:
+            heapq.heappush(self.heap, entry)
+        elif entry > self.heap[0]:
+            self.masks.discard(heapq.heapreplace(self.heap, entry)[3])
+        else:
+            return
+        self.masks.add(mask)
+
+    def offer_many(self, differences, difference_totals, masks):
+        bound = self.threshold()
+        candidates = (differences < bound[0]) | ((differences == bound[0]) & (difference_totals <= bound[1]))
+        differences, difference_totals, masks = differences[candidates], difference_totals[candidates], masks[candidates]
+        tie_breaks = _mix64_array(masks.astype(np.uint64) ^ np.uint64(self.salt))
+        # Solo las `size` mejores del bloque pueden quedar entre las mejores
+        for i in np.lexsort((tie_breaks, difference_totals, differences))[:self.size].tolist():
+            self.offer(differences[i].item(), difference_totals[i].item(), masks[i].item(), tie_breaks[i].item())
+
+    def entries(self):
+        return [(-entry[0], -entry[1], entry[3]) for entry in self.heap]
+
+    def result(self, n, as_masks=False):
+        if not self.heap:
+            return ([], float("inf"))
+        ranked = sorted(self.heap, reverse=True)
+        if as_masks:
+            return ([entry[3] for entry in ranked], -ranked[0][1])
+        return ([_split_from_mask(entry[3], n) for entry in ranked], -ranked[0][1])
+
+
+def _find_best_combination_python(scores, stats, control, best, prefix=None, constraints=None):
+    n = len(scores)
+    # Calcular tamaño del equipo (división entera para equipos equilibrados)
+    team_size = n // 2
+    satisfied = None
+    if constraints is not None:
+        satisfied = constraints.checker(n)
+        # Con jugadores fijos en un equipo, el jugador 0 no puede quedar fijo en el equipo 1
+        if constraints.has_locks and prefix is None:
+            prefix = ()
+    pinned, remaining_combinations = _team1_combinations(n, team_size, prefix)
+
+    # Vectores precalculados: como team1 - team2 == 2 * team1 - total, cada combinación solo
+    # suma los puntajes (duplicados) de su equipo 1 y no arma la lista del equipo 2
+    doubled = [[2 * value for value in row] for row in scores]
+    base = [-value for value in calculate_team_score(range(n), scores)]
+    pinned_mask = 0
+    for player in pinned:
+        pinned_mask |= 1 << player
+        base = [value + extra for value, extra in zip(base, doubled[player])]
+
+    min_difference, min_difference_total = best.threshold()
+    candidates_evaluated = 0
+
+    stopped = False
+    for remaining in remaining_combinations:
+        if candidates_evaluated % CONTROL_CHECK_INTERVAL == 0 and candidates_evaluated and control.should_stop():
+            stopped = True
+            break
+        differences = list(map(sum, zip(base, *[doubled[player] for player in remaining])))
+        difference = sum(map(abs, differences))
+        difference_total = abs(sum(differences))
+
+        # Solo una combinación que no supera la cota puede cambiar el resultado
+        if difference < min_difference or (difference == min_difference and difference_total <= min_difference_total):
+            mask = pinned_mask
+            for player in remaining:
+                mask |= 1 << player
+            if satisfied is None or satisfied([mask])[0]:
+                best.offer(difference, difference_total, mask)
+                # Las combinaciones van en orden lexicográfico: la cota de esta vale para las siguientes
+                min_difference, min_difference_total = best.bound(mask)
+        candidates_evaluated += 1
+
+    stats["candidates_evaluated"] = candidates_evaluated
+    stats["optimal"] = not stopped
+
+
+def _find_best_combination_numpy(scores, stats, control, best, prefix=None):
+    n = len(scores)
+    team_size = n // 2
+    score_matrix = np.asarray(scores, dtype=np.int64)
+    total_score = score_matrix.sum(axis=0)
+    grand_total = total_score.sum()
+    player_bits = np.left_shift(np.int64(1), np.arange(n, dtype=np.int64))
+
+    pinned, remaining_combinations = _team1_combinations(n, team_size, prefix)
+    remaining_size = team_size - len(pinned)
+    candidates_evaluated = 0
+
+    stopped = False
+    while True:
+        if candidates_evaluated and control.should_stop():
+            stopped = True
+            break
+        # Solo se materializa un bloque de combinaciones a la vez (memoria acotada)
+        flat = np.fromiter(
+            chain.from_iterable(islice(remaining_combinations, NUMPY_CHUNK_SIZE)),
+            dtype=np.intp,
+        )
+        if flat.size == 0:
+            break
+        chunk_size = flat.size // remaining_size
+        team1_matrix = np.empty((chunk_size, team_size), dtype=np.intp)
+        team1_matrix[:, :len(pinned)] = pinned
+        team1_matrix[:, len(pinned):] = flat.reshape(chunk_size, remaining_size)
+
+        # Matriz de pertenencia (combinaciones x jugadores) por matriz de puntajes
+        membership = np.zeros((chunk_size, n), dtype=np.int64)
+        np.put_along_axis(membership, team1_matrix, 1, axis=1)
+        team1_scores = membership @ score_matrix
+
+        # team1 - team2 == 2 * team1 - total
+        differences = np.abs(2 * team1_scores - total_score).sum(axis=1)
+        difference_totals = np.abs(2 * team1_scores.sum(axis=1) - grand_total)
+        best.offer_many(differences, difference_totals, membership @ player_bits)
+        candidates_evaluated += chunk_size
+
+    stats["candidates_evaluated"] = candidates_evaluated
+    stats["optimal"] = not stopped
+
+
+def _suffix_extremes(values):
+    # Para cada sufijo de jugadores i.. y cada cantidad c: suma de los c valores
+    # más chicos y de los c más grandes (por columna si `values` es una matriz)
+    n = len(values)
+    lowest = np.zeros((n + 1, n + 1) + values.shape[1:], dtype=np.int64)
+    highest = np.zeros_like(lowest)
+    for i in range(n):
+        ordered = np.sort(values[i:], axis=0)
+        lowest[i, 1:n - i + 1] = np.cumsum(ordered, axis=0)
+        highest[i, 1:n - i + 1] = np.cumsum(ordered[::-1], axis=0)
+    return lowest, highest
+
+
+def _interval_distance(base, lowest, highest):
+    # Distancia a 0 del intervalo [base + 2*lowest, base + 2*highest]; si el intervalo
+    # contiene al 0, la paridad de `base` indica si el 0 es alcanzable
+    lower = base + 2 * lowest
+    upper = base + 2 * highest
+    return np.where(lower > 0, lower, np.where(upper < 0, -upper, base & 1))
+
+
+def _find_best_combination_branch_and_bound(scores, stats, control, best, constraints=None, shard=None):
+    n = len(scores)
+    if n > MAX_BRANCH_AND_BOUND_PLAYERS:
+        raise ValueError(f"El motor branch_and_bound admite hasta {MAX_BRANCH_AND_BOUND_PLAYERS} jugadores")
+
+    score_matrix = np.asarray(scores, dtype=np.int64)
+    attributes = score_matrix.shape[1]
+    team_size = n // 2
+
+    # Asignar primero a los jugadores más alejados del promedio: los que quedan son
+    # parecidos entre sí y las cotas se ajustan antes. Si los equipos tienen el mismo
+    # tamaño, el jugador 0 va primero y fijo en el equipo 1 (ruptura de simetría), salvo
+    # que haya jugadores fijos en un equipo
+    deviation = np.abs(score_matrix - score_matrix.mean(axis=0)).sum(axis=1)
+    order = [int(i) for i in np.argsort(-deviation, kind="stable")]
+    pinned = n % 2 == 0 and (constraints is None or not constraints.has_locks)
+    if pinned:
+        order.remove(0)
+        order.insert(0, 0)
+    rows = score_matrix[order]
+    player_bits = np.left_shift(np.int64(1), np.array(order, dtype=np.int64))
+    # Bits de la clave lexicográfica (`_lexicographic_key`) de cada jugador y, para cada
+    # profundidad y cantidad c, los de los c jugadores sin asignar de menor índice: con
+    # ellos en el equipo 1 se arma la primera combinación del subárbol en orden lexicográfico
+    player_keys = np.left_shift(np.int64(1), n - 1 - np.array(order, dtype=np.int64))
+    earliest_keys = np.zeros((n + 1, n + 1), dtype=np.int64)
+    for depth in range(n):
+        earliest_keys[depth, 1:n - depth + 1] = np.cumsum(np.sort(player_keys[depth:])[::-1])
+
+    # Con restricciones, el equipo de cada jugador puede quedar forzado: por estar fijo
+    # (True/False) o por el equipo del primer jugador de su grupo ya asignado (bit de ese
+    # jugador, si va en el equipo contrario). Las hojas se filtran con `satisfied`
+    forced = [None] * n
+    satisfied = None
+    if constraints is not None:
+        locked, links = constraints.rules(n)
+        satisfied = constraints.checker(n)
+        anchors = dict()
+        for depth, player in enumerate(order):
+            if locked[player] is not None:
+                forced[depth] = locked[player]
+            elif links[player][0] in anchors:
+                anchor, anchor_parity = anchors[links[player][0]]
+                forced[depth] = (anchor, bool(links[player][1] ^ anchor_parity))
+            else:
+                anchors[links[player][0]] = (player_bits[depth], links[player][1])
+
+    # `shard` = (índice, cantidad, profundidad): el fragmento solo recorre los subárboles
+    # cuyo reparto de los primeros `profundidad` jugadores le toca según un hash. No depende
+    # de las podas, así que los fragmentos cubren el árbol completo sin repetirse
+    if shard is not None:
+        shard_index, shard_count, shard_depth = shard
+        shard_bits = np.bitwise_or.reduce(player_bits[:shard_depth])
+
+    suffix_score = np.zeros((n + 1, attributes), dtype=np.int64)
+    suffix_score[:n] = np.cumsum(rows[::-1], axis=0)[::-1]
+    suffix_bits = np.zeros(n + 1, dtype=np.int64)
+    suffix_bits[:n] = np.cumsum(player_bits[::-1])[::-1]
+
+    # Cotas inferiores: por atributo, sobre el total y sobre la proyección de cada
+    # patrón de signos (sum_j |x_j| >= |sum_j s_j * x_j| para cualquier s_j = ±1)
+    attribute_low, attribute_high = _suffix_extremes(rows)
+    total_low, total_high = _suffix_extremes(rows.sum(axis=1))
+    project = attributes <= MAX_PROJECTED_ATTRIBUTES
+    if project:
+        patterns = np.array(
+            [[1 if pattern >> j & 1 else -1 for j in range(attributes)] for pattern in range(1 << attributes)],
+            dtype=np.int64,
+        )
+        pattern_weights = np.left_shift(np.int64(1), np.arange(attributes, dtype=np.int64))
+        projected_low, projected_high = _suffix_extremes(rows @ patterns.T)
+
+    # Si `best` ya tiene soluciones (p. ej. de una heurística), se descartan desde el inicio
+    # los nodos peores; esas soluciones se vuelven a encontrar al recorrer
+    nodes_explored = 0
+    nodes_pruned = 0
+    stopped = False
+
+    # Búsqueda en profundidad sobre bloques de nodos: cada fila es una asignación parcial
+    # (diferencia por atributo, lugares libres en el equipo 1, máscara del equipo 1 y su
+    # clave lexicográfica)
+    stack = [(
+        0, np.zeros((1, attributes), dtype=np.int64), np.array([team_size]), np.zeros(1, dtype=np.int64),
+        np.zeros(1, dtype=np.int64),
+    )]
+    while stack:
+        if control.should_stop():
+            stopped = True
+            break
+        depth, differences, free1, masks, keys = stack.pop()
+        if shard is not None and depth == shard_depth:
+            owned = _mix64_array((masks & shard_bits).astype(np.uint64)) % np.uint64(shard_count) == shard_index
+            differences, free1, masks, keys = differences[owned], free1[owned], masks[owned], keys[owned]
+            if len(differences) == 0:
+                continue
+        nodes_explored += len(differences)
+        free2 = (n - depth) - free1
+
+        # Si uno de los equipos está completo, el resto de los jugadores va al otro
+        complete = (free1 == 0) | (free2 == 0)
+        if complete.any():
+            to_team1 = free2[complete] == 0
+            final = differences[complete] + np.where(to_team1[:, None], 1, -1) * suffix_score[depth]
+            final_masks = np.where(to_team1, masks[complete] | suffix_bits[depth], masks[complete])
+            if satisfied is not None:
+                valid = satisfied(final_masks)
+                final, final_masks = final[valid], final_masks[valid]
+            best.offer_many(np.abs(final).sum(axis=1), np.abs(final.sum(axis=1)), final_masks)
+
+            pending = ~complete
+            differences, free1, masks, keys = differences[pending], free1[pending], masks[pending], keys[pending]
+            if len(differences) == 0:
+                continue
+
+        base = differences - suffix_score[depth]
+        lower_bound = _interval_distance(base, attribute_low[depth][free1], attribute_high[depth][free1]).sum(axis=1)
+        total_base = base.sum(axis=1)
+        total_bound = _interval_distance(total_base, total_low[depth][free1], total_high[depth][free1])
+        lower_bound = np.maximum(lower_bound, total_bound)
+        if project:
+            # Patrón de signos según hacia dónde se inclina el centro del intervalo de cada atributo
+            center = base + attribute_low[depth][free1] + attribute_high[depth][free1]
+            pattern = ((center >= 0) * pattern_weights).sum(axis=1)
+            projected_base = (base * patterns[pattern]).sum(axis=1)
+            lower_bound = np.maximum(lower_bound, _interval_distance(
+                projected_base, projected_low[depth, free1, pattern], projected_high[depth, free1, pattern]
+            ))
+
+        # Solo se descartan los nodos estrictamente peores que el umbral para conservar los empates.
+        # La cota de la primera combinación del subárbol vale para todas las demás
+        bound = best.bounds(keys | earliest_keys[depth][free1])
+        keep = (lower_bound < bound[0]) | ((lower_bound == bound[0]) & (total_bound <= bound[1]))
+        nodes_pruned += len(differences) - int(keep.sum())
+        differences, free1, masks, keys = differences[keep], free1[keep], masks[keep], keys[keep]
+        if len(differences) == 0:
+            continue
+
+        player = rows[depth]
+        if depth == 0 and pinned:
+            children = (differences + player, free1 - 1, masks | player_bits[depth], keys | player_keys[depth])
+        elif forced[depth] is not None:
+            # Un solo hijo: el equipo del jugador ya está decidido por las restricciones
+            if isinstance(forced[depth], bool):
+                to_team1 = np.full(len(differences), forced[depth])
+            else:
+                anchor, differ = forced[depth]
+                to_team1 = ((masks & anchor) != 0) ^ differ
+            children = (
+                differences + np.where(to_team1[:, None], player, -player),
+                free1 - to_team1,
+                np.where(to_team1, masks | player_bits[depth], masks),
+                np.where(to_team1, keys | player_keys[depth], keys),
+            )
+        else:
+            children = (
+                np.concatenate([differences + player, differences - player]),
+                np.concatenate([free1 - 1, free1]),
+                np.concatenate([masks | player_bits[depth], masks]),
+                np.concatenate([keys | player_keys[depth], keys]),
+            )
+        for start in range((len(children[0]) - 1) // NUMPY_CHUNK_SIZE * NUMPY_CHUNK_SIZE, -1, -NUMPY_CHUNK_SIZE):
+            stack.append((depth + 1,) + tuple(child[start:start + NUMPY_CHUNK_SIZE] for child in children))
+
+    stats["nodes_explored"] = nodes_explored
+    stats["nodes_pruned"] = nodes_pruned
+    stats["optimal"] = not stopped
+
+
+def _find_best_combination_gray_code(scores, stats, control, best, prefix=None):
+    n = len(scores)
+    team_size = n // 2
+    attributes = range(len(scores[0]))
+
+    # Jugadores fijos en el equipo 1 y jugadores que pueden moverse entre equipos
+    pinned, movable, chosen = _enumeration_space(n, team_size, prefix)
+    pinned_mask = 0
+    for player in pinned:
+        pinned_mask |= 1 << player
+
+    # Pasar un jugador del equipo 2 al 1 cambia la diferencia en 2 * su puntaje
+    doubled = [[2 * value for value in scores[player]] for player in movable]
+    doubled_totals = [sum(values) for values in doubled]
+    bits = [1 << player for player in movable]
+
+    # Combinación inicial: los primeros `chosen` jugadores movibles en el equipo 1
+    mask = pinned_mask
+    for position in range(chosen):
+        mask |= bits[position]
+    differences = [0] * len(scores[0])
+    for player in range(n):
+        sign = 1 if mask >> player & 1 else -1
+        for j in attributes:
+            differences[j] += sign * scores[player][j]
+    total_difference = sum(differences)
+
+    # La combinación inicial es la primera en orden lexicográfico: su cota vale para todo el recorrido
+    first_mask = mask
+    min_difference, min_difference_total = best.bound(first_mask)
+    candidates_evaluated = 0
+
+    # Recorrido en orden "revolving door" (Knuth, TAOCP 7.2.1.3, algoritmo R): cada paso
+    # intercambia un solo jugador entre equipos. `c[1..chosen]` son las posiciones del
+    # equipo 1 dentro de `movable` y `c[chosen + 1]` es un centinela
+    c = [0] + list(range(chosen)) + [len(movable)]
+    stopped = False
+    while True:
+        if candidates_evaluated % CONTROL_CHECK_INTERVAL == 0 and candidates_evaluated and control.should_stop():
+            stopped = True
+            break
+        difference = 0
+        for value in differences:
+            difference += value if value > 0 else -value
+        difference_total = total_difference if total_difference > 0 else -total_difference
+        if difference < min_difference or (difference == min_difference and difference_total <= min_difference_total):
+            best.offer(difference, difference_total, mask)
+            min_difference, min_difference_total = best.bound(first_mask)
+        candidates_evaluated += 1
+
+        leaving = -1
+        if chosen % 2 == 1:
+            if c[1] + 1 < c[2]:
+                leaving = c[1]
+                c[1] += 1
+                entering = c[1]
+            decrease = True
+        else:
+            if c[1] > 0:
+                leaving = c[1]
+                c[1] -= 1
+                entering = c[1]
+            decrease = False
+        if leaving < 0:
+            j = 2
+            while j <= chosen:
+                if decrease:
+                    if c[j] >= j:
+                        leaving = c[j]
+                        c[j] = c[j - 1]
+                        c[j - 1] = j - 2
+                        entering = j - 2
+                        break
+                else:
+                    if c[j] + 1 < c[j + 1]:
+                        leaving = c[j - 1]
+                        c[j - 1] = c[j]
+                        c[j] += 1
+                        entering = c[j]
+                        break
+                j += 1
+                decrease = not decrease
+            else:
+                break
+
+        # Actualización incremental en O(atributos)
+        leaving_values = doubled[leaving]
+        entering_values = doubled[entering]
+        for j in attributes:
+            differences[j] += entering_values[j] - leaving_values[j]
+        total_difference += doubled_totals[entering] - doubled_totals[leaving]
+        mask ^= bits[leaving] | bits[entering]
+
+    stats["candidates_evaluated"] = candidates_evaluated
+    stats["optimal"] = not stopped
+
+
+def _subset_sums(rows):
+    # Todos los subconjuntos de `rows`: máscara, cantidad de jugadores, puntajes y total
+    size = len(rows)
+    masks = np.arange(1 << size, dtype=np.int64)
+    membership = (masks[:, None] >> np.arange(size, dtype=np.int64)) & 1
+    vectors = membership @ rows
+    return masks, membership.sum(axis=1), vectors, vectors.sum(axis=1)
+
+
+def _find_best_combination_meet_in_the_middle(scores, stats, control, best):
+    n = len(scores)
+    if n > MAX_MEET_IN_THE_MIDDLE_PLAYERS:
+        raise ValueError(f"El motor meet_in_the_middle admite hasta {MAX_MEET_IN_THE_MIDDLE_PLAYERS} jugadores")
+
+    score_matrix = np.asarray(scores, dtype=np.int64)
+    total_score = score_matrix.sum(axis=0)
+    grand_total = total_score.sum().item()
+    team_size = n // 2
+    half = n // 2
+
+    # Enumerar por separado los subconjuntos de cada mitad de jugadores.
+    # Si los equipos tienen el mismo tamaño, el jugador 0 (primera mitad) va en el equipo 1
+    first_masks, first_counts, first_vectors, first_totals = _subset_sums(score_matrix[:half])
+    if n % 2 == 0:
+        with_first = (first_masks & 1) == 1
+        first_masks, first_counts = first_masks[with_first], first_counts[with_first]
+        first_vectors, first_totals = first_vectors[with_first], first_totals[with_first]
+    second_masks, second_counts, second_vectors, second_totals = _subset_sums(score_matrix[half:])
+    second_masks = second_masks << half
+
+    # Para cada cantidad de jugadores de la primera mitad: sus subconjuntos y los de la
+    # segunda mitad que completan el equipo 1, ordenados por puntaje total, y el primero de
+    # estos en orden lexicográfico (los jugadores de menor índice)
+    groups = list()
+    for count in range(team_size + 1):
+        first_group = np.flatnonzero(first_counts == count)
+        second_group = np.flatnonzero(second_counts == team_size - count)
+        if len(first_group) == 0 or len(second_group) == 0:
+            continue
+        second_group = second_group[np.argsort(second_totals[second_group], kind="stable")]
+        earliest = ((1 << team_size - count) - 1) << half
+        groups.append((first_group, second_group, second_totals[second_group], earliest))
+
+    candidates_evaluated = 0
+
+    def evaluate(first_index, second_index):
+        nonlocal candidates_evaluated
+        if len(first_index) == 0:
+            return
+        candidates_evaluated += len(first_index)
+        team1_scores = first_vectors[first_index] + second_vectors[second_index]
+        differences = np.abs(2 * team1_scores - total_score).sum(axis=1)
+        difference_totals = np.abs(2 * team1_scores.sum(axis=1) - grand_total)
+        best.offer_many(differences, difference_totals, first_masks[first_index] | second_masks[second_index])
+
+    # Camino rápido: para cada subconjunto de la primera mitad, el complemento con el total
+    # más cercano a la mitad del puntaje (búsqueda binaria). Su diferencia por atributo es
+    # la cota inicial. El camino rápido y la ventana pueden encontrar la misma combinación:
+    # `best` ignora las repetidas
+    for first_group, second_group, sorted_totals, _ in groups:
+        target = grand_total / 2 - first_totals[first_group]
+        position = np.searchsorted(sorted_totals, target)
+        for neighbour in (position - 1, position):
+            valid = (neighbour >= 0) & (neighbour < len(second_group))
+            evaluate(first_group[valid], second_group[neighbour[valid]])
+
+    # Como sum_j |x_j| >= |sum_j x_j|, una combinación solo puede igualar o mejorar la mejor
+    # diferencia por atributo si su diferencia total no la supera: se descartan por total
+    # todas las demás y se evalúan los 9 atributos solo en la ventana restante (ninguna
+    # combinación supera una diferencia por atributo igual al puntaje total del grupo).
+    # La cota de cada fila es la de su primera combinación en orden lexicográfico
+    candidates_in_window = 0
+    rows_per_block = max(NUMPY_CHUNK_SIZE // 16, 1)
+    stopped = False
+    for first_group, second_group, sorted_totals, earliest in groups:
+        for start in range(0, len(first_group), rows_per_block):
+            if control.should_stop():
+                stopped = True
+                break
+            rows = first_group[start:start + rows_per_block]
+            bound = np.minimum(best.bounds(_lexicographic_keys(first_masks[rows] | earliest, n))[0], grand_total)
+            low = np.searchsorted(sorted_totals, -((bound - grand_total) // 2) - first_totals[rows], side="left")
+            high = np.searchsorted(sorted_totals, (grand_total + bound) // 2 - first_totals[rows], side="right")
+            widths = np.maximum(high - low, 0)
+            if widths.sum() == 0:
+                continue
+            candidates_in_window += widths.sum().item()
+            first_index = np.repeat(rows, widths)
+            offsets = np.arange(widths.sum()) - np.repeat(np.cumsum(widths) - widths, widths)
+            second_index = second_group[np.repeat(low, widths) + offsets]
+            for chunk in range(0, len(first_index), NUMPY_CHUNK_SIZE):
+                evaluate(first_index[chunk:chunk + NUMPY_CHUNK_SIZE], second_index[chunk:chunk + NUMPY_CHUNK_SIZE])
+        if stopped:
+            break
+
+    stats["candidates_evaluated"] = candidates_evaluated
+    stats["candidates_pruned"] = (comb(n - 1, team_size - 1) if n % 2 == 0 else comb(n, team_size)) - candidates_in_window
+    stats["optimal"] = not stopped
+
+
+def _lower_bound_key(score_matrix):
+    # Cada diferencia por atributo tiene la paridad del puntaje total de ese atributo,
+    # y la diferencia total la del puntaje total del grupo
+    total_score = score_matrix.sum(axis=0)
+    difference_total = int(total_score.sum() % 2)
+    return max(int((total_score % 2).sum()), difference_total), difference_total
+
+
+def _membership_key(score_matrix, total_score, in_team1):
+    difference = 2 * score_matrix[in_team1].sum(axis=0) - total_score
+    return (int(np.abs(difference).sum()), int(abs(difference.sum())))
+
+
+def _canonical_mask(in_team1):
+    n = len(in_team1)
+    mask = sum(1 << int(i) for i in np.flatnonzero(in_team1))
+    # Con equipos del mismo tamaño, el jugador 0 siempre en el equipo 1
+    if n % 2 == 0 and not mask & 1:
+        mask ^= (1 << n) - 1
+    return mask
+
+
+def _swap_descent(score_matrix, total_score, in_team1):
+    # Intercambios de a pares (el mejor intercambio de cada paso, al estilo Kernighan-Lin)
+    # hasta un óptimo local. Modifica `in_team1` y devuelve su clave y la cantidad de intercambios
+    current = _membership_key(score_matrix, total_score, in_team1)
+    moves = 0
+    while True:
+        team1 = np.flatnonzero(in_team1)
+        team2 = np.flatnonzero(~in_team1)
+        difference = 2 * score_matrix[team1].sum(axis=0) - total_score
+        # Intercambiar a (equipo 1) con b (equipo 2) suma 2 * (s_b - s_a) a la diferencia
+        swapped = difference + 2 * (score_matrix[team2][None, :, :] - score_matrix[team1][:, None, :])
+        swap_differences = np.abs(swapped).sum(axis=2)
+        swap_totals = np.abs(swapped.sum(axis=2))
+        order = np.lexsort((swap_totals.ravel(), swap_differences.ravel()))[0]
+        a, b = divmod(int(order), len(team2))
+        candidate = (int(swap_differences[a, b]), int(swap_totals[a, b]))
+        if candidate >= current:
+            return current, moves
+        in_team1[team1[a]] = False
+        in_team1[team2[b]] = True
+        current = candidate
+        moves += 1
+
+
+def _repair_team_size(score_matrix, total_score, in_team1):
+    # Si cambió la cantidad de jugadores, se pasa de un equipo al otro al jugador que deja
+    # la mejor clave hasta que el equipo 1 tenga el tamaño correcto
+    team_size = len(in_team1) // 2
+    while in_team1.sum() != team_size:
+        leaving = in_team1.sum() > team_size
+        candidates = np.flatnonzero(in_team1 if leaving else ~in_team1)
+        difference = 2 * score_matrix[in_team1].sum(axis=0) - total_score
+        moved = difference + (-2 if leaving else 2) * score_matrix[candidates]
+        order = np.lexsort((np.abs(moved.sum(axis=1)), np.abs(moved).sum(axis=1)))[0]
+        in_team1[candidates[order]] = not leaving
+
+
+def _find_best_combination_local_search(scores, stats, control, best, seed=0, start=None, max_stalls=None):
+    n = len(scores)
+    score_matrix = np.asarray(scores, dtype=np.int64)
+    total_score = score_matrix.sum(axis=0)
+    team_size = n // 2
+    rng = np.random.default_rng(seed)
+    lower_bound = _lower_bound_key(score_matrix)
+    # Sin límite de tiempo, se corta tras varias perturbaciones seguidas sin mejora
+    if max_stalls is None:
+        max_stalls = LOCAL_SEARCH_MAX_STALLS if control.deadline is None else float("inf")
+
+    def random_split():
+        in_team1 = np.zeros(n, dtype=bool)
+        in_team1[rng.permutation(n)[:team_size]] = True
+        return in_team1
+
+    local_optima = 0
+    moves = 0
+    stalls = 0
+    in_team1 = random_split() if start is None else start.copy()
+    # Búsqueda local iterada: descenso por intercambios hasta un óptimo local y luego
+    # una perturbación aleatoria
+    while True:
+        current, descent_moves = _swap_descent(score_matrix, total_score, in_team1)
+        moves += descent_moves
+
+        local_optima += 1
+        previous = best.threshold()
+        best.offer(*current, _canonical_mask(in_team1))
+        stalls = 0 if best.threshold() < previous else stalls + 1
+
+        if best.threshold() <= lower_bound or control.should_stop():
+            break
+        if stalls >= max_stalls:
+            break
+        # Perturbación: algunos intercambios al azar, o un reinicio completo cada tanto
+        if rng.random() < 0.2:
+            in_team1 = random_split()
+        else:
+            for _ in range(int(rng.integers(2, 4))):
+                team1 = np.flatnonzero(in_team1)
+                team2 = np.flatnonzero(~in_team1)
+                in_team1[rng.choice(team1)] = False
+                in_team1[rng.choice(team2)] = True
+
+    stats["local_optima"] = local_optima
+    stats["moves"] = moves
+    # Solo se prueba optimalidad si se alcanzó la cota inferior por paridad
+    stats["optimal"] = best.threshold() <= lower_bound
+
+
+def _seed_from_previous_split(scores, previous_team1, best, stats, control):
+    # Vecindario de una solución anterior (p. ej. antes de cambiar un jugador): se ajusta el
+    # tamaño de los equipos y se mejora con una búsqueda local corta que parte de ahí. Sus
+    # claves acotan la búsqueda exacta: al cambiar un jugador por otro con diferencia de
+    # puntajes δ, la mejor diferencia por atributo cambia a lo sumo en sum_j |δ_j|
+    score_matrix = np.asarray(scores, dtype=np.int64)
+    total_score = score_matrix.sum(axis=0)
+    in_team1 = np.zeros(len(scores), dtype=bool)
+    in_team1[list(previous_team1)] = True
+    _repair_team_size(score_matrix, total_score, in_team1)
+    stats["previous_key"] = _membership_key(score_matrix, total_score, in_team1)
+    best.offer(*stats["previous_key"], _canonical_mask(in_team1))
+
+    neighbourhood_stats = dict()
+    _find_best_combination_local_search(
+        scores, neighbourhood_stats, control, best, start=in_team1, max_stalls=NEIGHBOURHOOD_MAX_STALLS
+    )
+    stats["neighbourhood_moves"] = neighbourhood_stats["moves"]
+
+
+def _find_best_combination_auto(scores, stats, control, best, constraints=None, workers=1):
+    n = len(scores)
+    # Con soluciones previas (p. ej. de una edición del plantel), la búsqueda exacta acotada
+    # por ellas es lo más rápido para cualquier tamaño. Las restricciones solo las aplica
+    # la búsqueda exacta, que además las usa para podar
+    # Con `workers` > 1 y al menos PARALLEL_MIN_PLAYERS jugadores, la búsqueda exacta se
+    # reparte entre procesos (salvo con restricciones)
+    parallel = workers > 1 and n >= PARALLEL_MIN_PLAYERS
+    if (best.entries() and n <= MAX_BRANCH_AND_BOUND_PLAYERS) or constraints is not None:
+        stats["engine"] = "branch_and_bound"
+        if parallel and constraints is None:
+            _find_best_combination_parallel(scores, "branch_and_bound", stats, control, best, workers)
+        else:
+            _find_best_combination_branch_and_bound(scores, stats, control, best, constraints)
+        return
+
+    if n <= AUTO_EXHAUSTIVE_MAX_PLAYERS:
+        stats["engine"] = "numpy"
+        if parallel:
+            _find_best_combination_parallel(scores, "numpy", stats, control, best, workers)
+        else:
+            _find_best_combination_numpy(scores, stats, control, best)
+        return
+
+    # Roster grande: búsqueda local corta (una parte del presupuesto, hasta
+    # AUTO_LOCAL_SEARCH_MAX_SECONDS, y no más allá de varios óptimos locales sin mejora) y
+    # luego búsqueda exacta acotada por las soluciones encontradas. Si el tiempo se agota
+    # antes de terminar, `best` conserva lo mejor que se haya encontrado entre ambas
+    remaining = control.remaining()
+    local_budget = AUTO_LOCAL_SEARCH_MAX_SECONDS
+    if remaining is not None:
+        local_budget = min(local_budget, remaining * AUTO_LOCAL_SEARCH_SHARE)
+    local_stats = dict()
+    _find_best_combination_local_search(
+        scores, local_stats, control.limited(local_budget), best, max_stalls=LOCAL_SEARCH_MAX_STALLS
+    )
+
+    stats["engine"] = "branch_and_bound"
+    stats["local_optima"] = local_stats["local_optima"]
+    if parallel:
+        _find_best_combination_parallel(scores, "branch_and_bound", stats, control, best, workers)
+    else:
+        _find_best_combination_branch_and_bound(scores, stats, control, best)
+
+
+ENGINES = {
+    "python": _find_best_combination_python,
+    "numpy": _find_best_combination_numpy,
+    "branch_and_bound": _find_best_combination_branch_and_bound,
+    "meet_in_the_middle": _find_best_combination_meet_in_the_middle,
+    "gray_code": _find_best_combination_gray_code,
+    "local_search": _find_best_combination_local_search,
+    "auto": _find_best_combination_auto,
+}
+
+
+# Motores que se pueden fragmentar entre procesos: los exhaustivos por prefijo del equipo 1
+# y branch_and_bound por un hash del reparto de sus primeros jugadores
+SHARDABLE_ENGINES = {"python", "numpy", "gray_code", "branch_and_bound"}
+
+# Repartos distintos de los primeros jugadores por fragmento de branch_and_bound: con más
+# subárboles por fragmento el hash reparte mejor la carga
+BRANCH_AND_BOUND_SUBTREES_PER_SHARD = 8
+
+# Motores que respetan `TeamConstraints`
+CONSTRAINED_ENGINES = {"python", "branch_and_bound", "auto"}
+
+_process_pool = None
+_process_pool_workers = 0
+_process_pool_lock = threading.Lock()
+
+
+def _get_process_pool(workers):
+    # Un único pool por proceso de la aplicación, reutilizado entre pedidos. Los pedidos
+    # llegan desde varios hilos: sin el lock, dos primeros pedidos crearían dos pools
+    global _process_pool, _process_pool_workers
+    with _process_pool_lock:
+        if _process_pool is None or _process_pool_workers != workers:
+            if _process_pool is not None:
+                _process_pool.shutdown(wait=False)
+            _process_pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+            _process_pool_workers = workers
+        return _process_pool
+
+
+def _shard_prefixes(n, team_size, shards):
+    # Prefijos del equipo 1, en orden lexicográfico, que dividen el espacio de combinaciones
+    # en al menos `shards` fragmentos (cada prefijo deja al menos un jugador por elegir)
+    pinned, movable, chosen = _enumeration_space(n, team_size)
+    prefixes = [pinned]
+    length = 0
+    while len(prefixes) < shards and length < chosen - 1:
+        length += 1
+        prefixes = [
+            pinned + extra
+            for extra in combinations(movable, length)
+            if n - extra[-1] - 1 >= chosen - length
+        ]
+    return prefixes
+
+
+def _branch_and_bound_shards(n, shards):
+    # (índice, cantidad, profundidad) de cada fragmento: a esa profundidad hay 2^(profundidad-1)
+    # repartos distintos (el primer jugador va fijo), y queda al menos un jugador libre por equipo
+    depth = 1
+    while 1 << (depth - 1) < shards * BRANCH_AND_BOUND_SUBTREES_PER_SHARD and depth < n // 2 - 1:
+        depth += 1
+    return [(index, shards, depth) for index in range(shards)]
+
+
+def _solve_shard(engine, scores, control, best, part):
+    # Cada proceso recibe una copia de `best` (vacía, o con las soluciones ya conocidas que
+    # acotan la búsqueda) y devuelve sus mejores combinaciones
+    stats = dict()
+    if engine == "branch_and_bound":
+        ENGINES[engine](scores, stats, control, best, shard=part)
+    else:
+        ENGINES[engine](scores, stats, control, best, part)
+    return best.entries(), stats
+
+
+def _find_best_combination_parallel(scores, engine, stats, control, best, workers):
+    n = len(scores)
+    if engine == "branch_and_bound":
+        parts = _branch_and_bound_shards(n, workers * SHARDS_PER_WORKER)
+    else:
+        parts = _shard_prefixes(n, n // 2, workers * SHARDS_PER_WORKER)
+    pool = _get_process_pool(workers)
+
+    totals = dict.fromkeys(("candidates_evaluated", "nodes_explored", "nodes_pruned"), 0)
+    optimal = True
+    # El resultado final no depende del orden en que se combinan los fragmentos
+    shards = pool.map(_solve_shard, repeat(engine), repeat(scores), repeat(control), repeat(best), parts)
+    for shard_entries, shard_stats in shards:
+        for name in totals:
+            totals[name] += shard_stats.get(name, 0)
+        optimal = optimal and shard_stats["optimal"]
+        for difference, difference_total, mask in shard_entries:
+            best.offer(difference, difference_total, mask)
+
+    if engine == "branch_and_bound":
+        stats["nodes_explored"] = totals["nodes_explored"]
+        stats["nodes_pruned"] = totals["nodes_pruned"]
+    else:
+        stats["candidates_evaluated"] = totals["candidates_evaluated"]
+    stats["optimal"] = optimal
+    stats["shards"] = len(parts)
+    stats["workers"] = workers
+
+
+def find_best_combination(
+    scores,
+    engine="python",
+    stats=None,
+    workers=1,
+    time_budget=None,
+    top_k=None,
+    seed=0,
+    cancel_event=None,
+    on_progress=None,
+    previous_team1=None,
+    constraints=None,
+    weights=None,
+    as_masks=False,
+):
+    started = time.perf_counter()
     # Validar que haya al menos 3 jugadores según la lógica de negocio
     if len(scores) < 3:
         raise ValueError("Se requieren al menos 3 jugadores para formar equipos")
-    
-    # Calcular tamaño del equipo (división entera para equipos equilibrados)
-    team_size = len(scores) // 2
-    all_combinations = list(combinations(range(len(scores)), team_size))
-    
-    min_difference = float("inf")
-    min_difference_total = float("inf")
-    mejores_equipos = list()
-    
-    # Solo evaluar la mitad si los equipos tienen el mismo tamaño (evitar duplicados simétricos)
-    # Si tienen tamaños diferentes, evaluar todas las combinaciones
-    if len(scores) % 2 == 0:
-        # Número par de jugadores = equipos del mismo tamaño
-        number_of_combinations = len(all_combinations) // 2
-        if len(all_combinations) % 2 == 1:
-            number_of_combinations += 1
+
+    # Con `weights` (un entero por atributo) las diferencias por atributo y la total se
+    # ponderan; se aplica una sola vez sobre los puntajes
+    if weights is not None:
+        scores = apply_attribute_weights(scores, weights)
+
+    if engine not in ENGINES:
+        raise ValueError(f"Motor de optimización desconocido: {engine}")
+
+    if top_k is not None and top_k < 1:
+        raise ValueError("Se debe pedir al menos una opción de equipos")
+
+    # `constraints` (`TeamConstraints`) limita las combinaciones válidas; si ninguna las
+    # cumple, el resultado queda vacío
+    if constraints is not None:
+        if engine not in CONSTRAINED_ENGINES:
+            raise ValueError(f"El motor {engine} no admite restricciones de equipos")
+        constraints.rules(len(scores))
+
+    # `stats` (opcional) recibe métricas de la búsqueda: combinaciones evaluadas, nodos
+    # explorados y podados, el motor usado ("engine") y el tiempo total en segundos
+    # ("wall_time"); `stats["optimal"]` indica si se probó que el resultado es óptimo. Con
+    # `time_budget` (segundos) la búsqueda se corta al agotarse el tiempo y devuelve lo mejor encontrado
+    if stats is None:
+        stats = dict()
+
+    # Sin `top_k` el resultado es el del recorrido original sobre las combinaciones en orden
+    # lexicográfico (ver `_TiedSplits`), con todos los motores exactos. Con `top_k` se
+    # devuelven las `top_k` mejores combinaciones distintas, de mejor a peor según la
+    # diferencia por atributo (suma de las diferencias absolutas) y, a igualdad, la diferencia
+    # de puntaje total; los empates se deciden de forma reproducible según `seed`
+    best = _TiedSplits(len(scores)) if top_k is None else _TopSplits(top_k, seed)
+
+    # `cancel_event` (p. ej. un `threading.Event`) corta la búsqueda como si se agotara el
+    # tiempo. `on_progress` recibe periódicamente lo mejor encontrado hasta el momento, con
+    # el mismo formato que el resultado. En la búsqueda repartida entre procesos solo se
+    # respeta el plazo
+    def report_progress():
+        mejores_equipos, min_difference_total = best.result(len(scores), as_masks)
+        if mejores_equipos:
+            on_progress(mejores_equipos, min_difference_total)
+
+    control = SearchControl(time_budget, cancel_event, None if on_progress is None else report_progress)
+
+    # `previous_team1` (índices del equipo 1 de una solución anterior sobre el plantel actual,
+    # p. ej. antes de cambiar o agregar un jugador) se explora primero y acota la búsqueda.
+    # Con restricciones no se usa: la solución anterior podría no cumplirlas
+    if previous_team1 is not None and constraints is None:
+        _seed_from_previous_split(scores, previous_team1, best, stats, control)
+
+    # Con `workers` > 1 los rosters grandes se reparten entre procesos (motores de
+    # SHARDABLE_ENGINES y la búsqueda exacta de "auto")
+    if constraints is not None:
+        ENGINES[engine](scores, stats, control, best, constraints=constraints)
+    elif engine == "auto":
+        _find_best_combination_auto(scores, stats, control, best, workers=workers)
+    elif workers > 1 and engine in SHARDABLE_ENGINES and len(scores) >= PARALLEL_MIN_PLAYERS:
+        _find_best_combination_parallel(scores, engine, stats, control, best, workers)
     else:
-        # Número impar de jugadores = equipos de tamaños diferentes
-        number_of_combinations = len(all_combinations)
+        ENGINES[engine](scores, stats, control, best)
+    # El motor "auto" informa cuál usó
+    stats.setdefault("engine", engine)
+    stats["wall_time"] = time.perf_counter() - started
+    # Los equipos se manejan como máscaras de bits (bit i = jugador i en el equipo 1) y solo
+    # se pasan a listas de índices acá; con `as_masks` se devuelven las máscaras
+    return best.result(len(scores), as_masks)
+
+
+def _team_capacities(n, num_teams):
+    # Tamaño de cada equipo: los primeros llevan un jugador más si la división no es exacta
+    size, extra = divmod(n, num_teams)
+    return [size + 1] * extra + [size] * (num_teams - extra)
+
+
+def _canonical_partition(masks):
+    # Los equipos del mismo tamaño son intercambiables: se ordenan por tamaño (de mayor a
+    # menor) y luego por su jugador de menor índice
+    return tuple(sorted(masks, key=lambda mask: (-mask.bit_count(), mask & -mask)))
+
+
+def _partition_from_masks(masks, n):
+    return tuple(tuple(i for i in range(n) if mask >> i & 1) for mask in masks)
+
+
+def _partition_keys(team_scores, pairs):
+    # Clave de cada partición (filas de `team_scores`, equipos x atributos): la mayor
+    # diferencia por atributo entre dos equipos y la mayor diferencia de puntaje total
+    differences = np.abs(team_scores[:, pairs[0]] - team_scores[:, pairs[1]]).sum(axis=2).max(axis=1)
+    totals = team_scores.sum(axis=2)
+    return differences, totals.max(axis=1) - totals.min(axis=1)
+
+
+class _TopPartitions:
+    """Las `size` mejores particiones distintas según (diferencia máxima, diferencia total máxima).
+
+    Igual que `_TopSplits`, pero cada partición es una tupla de máscaras, una por equipo.
+    """
+
+    def __init__(self, size, seed=0):
+        self.size = size
+        self.salt = _mix64(seed & _MASK64)
+        self.heap = list()
+        self.partitions = set()
+
+    def threshold(self):
+        if len(self.heap) < self.size:
+            return (float("inf"), float("inf"))
+        return (-self.heap[0][0], -self.heap[0][1])
+
+    def offer(self, difference, difference_total, masks):
+        masks = _canonical_partition(masks)
+        if masks in self.partitions:
+            return
+        tie_break = _tie_break(sum(mask << (64 * i) for i, mask in enumerate(masks)), self.salt)
+        entry = (-difference, -difference_total, -tie_break, masks)
+        if len(self.heap) < self.size:
+            heapq.heappush(self.heap, entry)
+        elif entry > self.heap[0]:
+            self.partitions.discard(heapq.heapreplace(self.heap, entry)[3])
+        else:
+            return
+        self.partitions.add(masks)
+
+    def offer_many(self, differences, difference_totals, masks):
+        bound = self.threshold()
+        candidates = (differences < bound[0]) | ((differences == bound[0]) & (difference_totals <= bound[1]))
+        differences, difference_totals, masks = differences[candidates], difference_totals[candidates], masks[candidates]
+        if len(differences) == 0:
+            return
+        # Solo pueden entrar las que empatan o mejoran a la `size`-ésima mejor del bloque
+        order = np.lexsort((difference_totals, differences))
+        last = order[min(self.size, len(order)) - 1]
+        cutoff = (differences[last], difference_totals[last])
+        for i in order.tolist():
+            if (differences[i], difference_totals[i]) > cutoff:
+                break
+            self.offer(differences[i].item(), difference_totals[i].item(), tuple(masks[i].tolist()))
+
+    def entries(self):
+        return [(-entry[0], -entry[1], entry[3]) for entry in self.heap]
+
+    def result(self, n, as_masks=False):
+        if not self.heap:
+            return ([], float("inf"))
+        ranked = sorted(self.heap, reverse=True)
+        if as_masks:
+            return ([entry[3] for entry in ranked], -ranked[0][1])
+        return ([_partition_from_masks(entry[3], n) for entry in ranked], -ranked[0][1])
+
+
+def _partition_masks(team_of, num_teams):
+    return tuple(sum(1 << int(i) for i in np.flatnonzero(team_of == team)) for team in range(num_teams))
+
+
+def _partition_swap_descent(score_matrix, team_of, num_teams, pairs):
+    # Como `_swap_descent`, con intercambios entre cualquier par de equipos. Modifica
+    # `team_of` y devuelve su clave y la cantidad de intercambios
+    moves = 0
+    while True:
+        team_scores = np.zeros((num_teams, score_matrix.shape[1]), dtype=np.int64)
+        np.add.at(team_scores, team_of, score_matrix)
+        differences, difference_totals = _partition_keys(team_scores[None], pairs)
+        current = (int(differences[0]), int(difference_totals[0]))
+
+        # Intercambiar a (equipo A) con b (equipo B): A gana s_b - s_a y B lo pierde
+        a, b = np.nonzero(np.triu(team_of[:, None] != team_of[None, :]))
+        delta = score_matrix[b] - score_matrix[a]
+        swapped = np.repeat(team_scores[None], len(a), axis=0)
+        rows = np.arange(len(a))
+        swapped[rows, team_of[a]] += delta
+        swapped[rows, team_of[b]] -= delta
+        differences, difference_totals = _partition_keys(swapped, pairs)
+        chosen = np.lexsort((difference_totals, differences))[0]
+        candidate = (int(differences[chosen]), int(difference_totals[chosen]))
+        if candidate >= current:
+            return current, moves
+        team_of[a[chosen]], team_of[b[chosen]] = team_of[b[chosen]], team_of[a[chosen]]
+        moves += 1
+
+
+def _partition_local_search(score_matrix, capacities, stats, control, best, seed=0):
+    n = len(score_matrix)
+    num_teams = len(capacities)
+    pairs = np.triu_indices(num_teams, 1)
+    rng = np.random.default_rng(seed)
+    max_stalls = LOCAL_SEARCH_MAX_STALLS if control.deadline is None else float("inf")
+    slots = np.repeat(np.arange(num_teams), capacities)
+
+    # Inicio goloso: jugadores de mayor a menor puntaje total repartidos en serpentina
+    # (1, 2, ..., k, k, ..., 2, 1), cada uno al siguiente equipo con lugar
+    team_of = np.empty(n, dtype=np.int64)
+    free = list(capacities)
+    snake = list(range(num_teams)) + list(range(num_teams - 1, -1, -1))
+    turn = 0
+    for player in np.argsort(-score_matrix.sum(axis=1), kind="stable").tolist():
+        while not free[snake[turn % len(snake)]]:
+            turn += 1
+        team_of[player] = snake[turn % len(snake)]
+        free[team_of[player]] -= 1
+        turn += 1
+
+    local_optima = 0
+    moves = 0
+    stalls = 0
+    while True:
+        current, descent_moves = _partition_swap_descent(score_matrix, team_of, num_teams, pairs)
+        moves += descent_moves
+        local_optima += 1
+        previous = best.threshold()
+        best.offer(*current, _partition_masks(team_of, num_teams))
+        stalls = 0 if best.threshold() < previous else stalls + 1
+        if stalls >= max_stalls or control.should_stop():
+            break
+        # Perturbación: algunos intercambios al azar, o un reinicio completo cada tanto
+        if rng.random() < 0.2:
+            team_of = slots[rng.permutation(n)]
+        else:
+            for _ in range(int(rng.integers(2, 4))):
+                a, b = rng.choice(n, size=2, replace=False)
+                team_of[a], team_of[b] = team_of[b], team_of[a]
+
+    stats["local_optima"] = local_optima
+    stats["moves"] = moves
+
+
+def _partition_branch_and_bound(score_matrix, capacities, stats, control, best):
+    n, attributes = score_matrix.shape
+    num_teams = len(capacities)
+    pairs = np.triu_indices(num_teams, 1)
+    capacities = np.array(capacities, dtype=np.int64)
+
+    # Mismo orden que en dos equipos: primero los jugadores más alejados del promedio
+    deviation = np.abs(score_matrix - score_matrix.mean(axis=0)).sum(axis=1)
+    order = np.argsort(-deviation, kind="stable")
+    rows = score_matrix[order]
+    player_bits = np.left_shift(np.int64(1), order.astype(np.int64))
+
+    # Cotas: cada equipo suma, de los jugadores que faltan, entre sus `libres` valores más
+    # chicos y sus `libres` más grandes (por atributo y en total). La distancia entre los
+    # intervalos de dos equipos acota su diferencia final
+    attribute_low, attribute_high = _suffix_extremes(rows)
+    total_low, total_high = _suffix_extremes(rows.sum(axis=1))
+
+    def interval_gap(low, high):
+        return np.maximum(np.maximum(low[:, pairs[0]] - high[:, pairs[1]], low[:, pairs[1]] - high[:, pairs[0]]), 0)
+
+    # Ruptura de simetría: entre equipos vacíos del mismo tamaño, el jugador solo puede ir
+    # al primero. Así cada partición se recorre una sola vez
+    same_as_previous = [team > 0 and capacities[team - 1] == capacities[team] for team in range(num_teams)]
+
+    nodes_explored = 0
+    nodes_pruned = 0
+    stopped = False
+    # Cada fila es una asignación parcial: puntajes por equipo, lugares libres y máscaras
+    stack = [(
+        0,
+        np.zeros((1, num_teams, attributes), dtype=np.int64),
+        capacities[None].copy(),
+        np.zeros((1, num_teams), dtype=np.int64),
+    )]
+    while stack:
+        if control.should_stop():
+            stopped = True
+            break
+        depth, team_scores, free, masks = stack.pop()
+        nodes_explored += len(team_scores)
+        if depth == n:
+            best.offer_many(*_partition_keys(team_scores, pairs), masks)
+            continue
+
+        lower_bound = interval_gap(
+            team_scores + attribute_low[depth][free], team_scores + attribute_high[depth][free]
+        ).sum(axis=2).max(axis=1)
+        team_totals = team_scores.sum(axis=2)
+        total_bound = interval_gap(team_totals + total_low[depth][free], team_totals + total_high[depth][free]).max(axis=1)
+        lower_bound = np.maximum(lower_bound, total_bound)
+
+        bound = best.threshold()
+        keep = (lower_bound < bound[0]) | ((lower_bound == bound[0]) & (total_bound <= bound[1]))
+        nodes_pruned += len(team_scores) - int(keep.sum())
+        team_scores, free, masks = team_scores[keep], free[keep], masks[keep]
+        if len(team_scores) == 0:
+            continue
+
+        empty = free == capacities
+        children = ([], [], [])
+        for team in range(num_teams):
+            allowed = free[:, team] > 0
+            if same_as_previous[team]:
+                allowed &= ~empty[:, team - 1]
+            selected = np.flatnonzero(allowed)
+            child_scores, child_free, child_masks = team_scores[selected], free[selected], masks[selected]
+            child_scores[:, team] += rows[depth]
+            child_free[:, team] -= 1
+            child_masks[:, team] |= player_bits[depth]
+            for child, part in zip(children, (child_scores, child_free, child_masks)):
+                child.append(part)
+        children = tuple(np.concatenate(child) for child in children)
+        for start in range((len(children[0]) - 1) // NUMPY_CHUNK_SIZE * NUMPY_CHUNK_SIZE, -1, -NUMPY_CHUNK_SIZE):
+            stack.append((depth + 1,) + tuple(child[start:start + NUMPY_CHUNK_SIZE] for child in children))
+
+    stats["nodes_explored"] = nodes_explored
+    stats["nodes_pruned"] = nodes_pruned
+    stats["optimal"] = not stopped
+
+
+def find_best_partition(
+    scores,
+    num_teams,
+    stats=None,
+    time_budget=None,
+    top_k=1,
+    seed=0,
+    cancel_event=None,
+    on_progress=None,
+    weights=None,
+    as_masks=False,
+):
+    """Reparte a los jugadores en `num_teams` equipos lo más parejos posible.
 
-    for i in range(number_of_combinations):
-        team1_indices = all_combinations[i]
-        team2_indices = [i for i in range(len(scores)) if i not in team1_indices]
+    Minimiza la mayor diferencia por atributo entre dos equipos cualesquiera y, a igualdad,
+    la mayor diferencia de puntaje total. Los equipos difieren a lo sumo en un jugador.
+    Devuelve las `top_k` mejores particiones distintas, de mejor a peor (cada una es una
+    tupla de equipos, de mayor a menor tamaño), y la diferencia total máxima de la mejor.
+    `stats`, `time_budget`, `seed`, `cancel_event`, `on_progress`, `weights` y `as_masks`
+    (cada equipo como máscara de bits) funcionan igual que en `find_best_combination`.
+    """
+    started = time.perf_counter()
+    n = len(scores)
+    if num_teams < 2:
+        raise ValueError("Se requieren al menos 2 equipos")
+    if n < 2 * num_teams:
+        raise ValueError("Se requieren al menos 2 jugadores por equipo")
+    if n > MAX_BRANCH_AND_BOUND_PLAYERS:
+        raise ValueError(f"El armado de varios equipos admite hasta {MAX_BRANCH_AND_BOUND_PLAYERS} jugadores")
+    if top_k < 1:
+        raise ValueError("Se debe pedir al menos una opción de equipos")
 
-        team1_score = calculate_team_score(team1_indices, scores)
-        team2_score = calculate_team_score(team2_indices, scores)
+    if stats is None:
+        stats = dict()
+    if weights is not None:
+        scores = apply_attribute_weights(scores, weights)
+    score_matrix = np.asarray(scores, dtype=np.int64)
+    capacities = _team_capacities(n, num_teams)
+    best = _TopPartitions(top_k, seed)
 
-        difference = calculate_difference(team1_score, team2_score)
-        difference_total = abs(sum(team1_score) - sum(team2_score))
+    def report_progress():
+        partitions, max_difference_total = best.result(n, as_masks)
+        if partitions:
+            on_progress(partitions, max_difference_total)
 
-        if difference < min_difference:
-            min_difference = difference
-            if difference_total < min_difference_total:
-                min_difference_total = difference_total
-                mejores_equipos = [(team1_indices, team2_indices)]
-        elif difference == min_difference:
-            if difference_total == min_difference_total:
-                mejores_equipos.append((team1_indices, team2_indices))   
+    control = SearchControl(time_budget, cancel_event, None if on_progress is None else report_progress)
 
-    return (mejores_equipos, min_difference_total)
+    # Búsqueda local durante una parte del presupuesto y luego búsqueda exacta acotada por
+    # sus soluciones, como el motor "auto" con rosters grandes
+    remaining = control.remaining()
+    local_stats = dict()
+    _partition_local_search(
+        score_matrix,
+        capacities,
+        local_stats,
+        control.limited(None if remaining is None else remaining * AUTO_LOCAL_SEARCH_SHARE),
+        best,
+        seed,
+    )
+    stats["local_optima"] = local_stats["local_optima"]
+    _partition_branch_and_bound(score_matrix, capacities, stats, control, best)
+    stats["engine"] = "partition"
+    stats["wall_time"] = time.perf_counter() - started
+    return best.result(n, as_masks)
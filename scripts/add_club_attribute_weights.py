@@ -0,0 +1,41 @@
+#!/usr/bin/env python3
+"""
+Agrega la columna attribute_weights (pesos de atributos para armar equipos) a la tabla
+clubs de una base existente. `create_all` no agrega columnas a tablas que ya existen, así
+que hay que correrlo una vez antes de desplegar; si la columna ya existe no hace nada.
+
+Ejemplo:
+    python scripts/add_club_attribute_weights.py
+"""
+
+import os
+import sys
+
+# Agregar la raíz del proyecto al sys.path de forma robusta
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if ROOT_DIR not in sys.path:
+    sys.path.insert(0, ROOT_DIR)
+
+from sqlalchemy import inspect, text
+
+from app.db.database import engine
+from app.db.models import Club
+
+
+def add_attribute_weights_column(engine):
+    table = Club.__tablename__
+    if "attribute_weights" in {column["name"] for column in inspect(engine).get_columns(table)}:
+        print(f"La columna attribute_weights ya existe en {table}")
+        return False
+    print(f"Agregando la columna attribute_weights a {table}")
+    with engine.begin() as connection:
+        connection.execute(text(f"ALTER TABLE {table} ADD COLUMN attribute_weights TEXT"))
+    return True
+
+
+def main():
+    add_attribute_weights_column(engine)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+Migra las fotos de los jugadores guardadas en base64 (photo_data) al almacén de fotos
+(tabla player_photos), de a lotes. Antes crea la tabla y la columna photo_id de los
+jugadores si no existen. Se puede cortar y volver a correr: solo procesa los jugadores
+que todavía no tienen photo_id.
+
+Ejemplo:
+    python scripts/backfill_player_photos.py --batch-size 200
+"""
+
+import argparse
+import os
+import sys
+
+# Agregar la raíz del proyecto al sys.path de forma robusta
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if ROOT_DIR not in sys.path:
+    sys.path.insert(0, ROOT_DIR)
+
+from sqlalchemy import inspect, text
+
+from app.db.database import SessionLocal, engine
+from app.db.models import Base, Player, PlayerV2
+from app.utils.photo_store import backfill_inline_photos
+
+
+def add_photo_id_columns():
+    inspector = inspect(engine)
+    with engine.begin() as connection:
+        for PlayerModel in (Player, PlayerV2):
+            table = PlayerModel.__tablename__
+            if "photo_id" not in {column["name"] for column in inspector.get_columns(table)}:
+                print(f"Agregando la columna photo_id a {table}")
+                connection.execute(text(f"ALTER TABLE {table} ADD COLUMN photo_id VARCHAR(64) REFERENCES player_photos(id)"))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Migra las fotos en base64 al almacén de fotos")
+    parser.add_argument("--batch-size", type=int, default=100, help="jugadores por transacción")
+    args = parser.parse_args()
+
+    Base.metadata.create_all(bind=engine)
+    add_photo_id_columns()
+    db = SessionLocal()
+    try:
+        for PlayerModel in (Player, PlayerV2):
+            def report(migrated, invalid):
+                print(f"{PlayerModel.__tablename__}: {migrated} fotos migradas, {invalid} inválidas")
+
+            backfill_inline_photos(db, PlayerModel, args.batch_size, on_batch=report)
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+Benchmark reproducible de los motores de find_best_combination.
+
+Recorre tamaños de plantel, escalas de puntaje (1-5 y 1-10) y tipos de entrada (al azar
+o con muchos empates) y, para cada motor, informa latencia (percentiles), throughput
+(combinaciones o nodos por segundo), memoria pico y qué fracción de las búsquedas probó
+optimalidad. Los planteles se generan con semillas fijas, sin base de datos, y los
+resultados se pueden guardar en JSON para comparar corridas.
+
+Ejemplo:
+    python scripts/benchmark_team_optimizer.py --sizes 10 20 30 --output bench.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+
+# Agregar la raíz del proyecto al sys.path de forma robusta
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if ROOT_DIR not in sys.path:
+    sys.path.insert(0, ROOT_DIR)
+
+from app.utils.metrics import traced_peak_memory
+from app.utils.team_optimizer import ENGINES, find_best_combination
+
+# Tamaño máximo razonable para los motores exhaustivos (crecen como C(n, n/2))
+ENGINE_MAX_PLAYERS = {
+    "python": 16,
+    "gray_code": 20,
+    "numpy": 22,
+    "meet_in_the_middle": 30,
+}
+
+# La búsqueda local es una heurística que usa todo el presupuesto de tiempo: solo se mide si se pide
+DEFAULT_ENGINES = [engine for engine in ENGINES if engine != "local_search"]
+
+# Cantidad de perfiles distintos en las entradas con muchos empates
+TIED_ARCHETYPES = 3
+
+
+def random_scores(n: int, rng: random.Random, max_score: int = 5):
+    """Puntajes uniformes, como los jugadores de ejemplo de create_sample_players.py."""
+    return [[rng.randint(1, max_score) for _ in range(9)] for _ in range(n)]
+
+
+def tied_scores(n: int, rng: random.Random, max_score: int = 5):
+    """Caso adversario: copias de unos pocos perfiles, con muchísimas combinaciones empatadas."""
+    archetypes = random_scores(TIED_ARCHETYPES, rng, max_score)
+    return [list(rng.choice(archetypes)) for _ in range(n)]
+
+
+GENERATORS = {"random": random_scores, "ties": tied_scores}
+
+
+def run_once(engine: str, scores, time_budget: float):
+    """Ejecuta un motor y devuelve (segundos, estadísticas de la búsqueda)."""
+    stats = dict()
+    start = time.perf_counter()
+    find_best_combination(scores, engine=engine, stats=stats, time_budget=time_budget)
+    return time.perf_counter() - start, stats
+
+
+def measure_memory(engine: str, scores, time_budget: float):
+    # En una corrida aparte: tracemalloc distorsiona los tiempos
+    with traced_peak_memory() as memory:
+        find_best_combination(scores, engine=engine, time_budget=time_budget)
+    return memory["peak_memory"]
+
+
+def benchmark_cell(engine, n, scale, kind, repeats, seed, time_budget, memory):
+    # Cada celda usa su propia semilla: agregar o quitar celdas no cambia los planteles de las demás
+    rng = random.Random(f"{seed}-{kind}-{scale}-{n}")
+    rosters = [GENERATORS[kind](n, rng, scale) for _ in range(repeats)]
+
+    latencies = []
+    work = 0
+    optimal = 0
+    for scores in rosters:
+        elapsed, stats = run_once(engine, scores, time_budget)
+        latencies.append(elapsed)
+        work += stats.get("candidates_evaluated", 0) + stats.get("nodes_explored", 0)
+        optimal += bool(stats.get("optimal"))
+
+    latencies = np.array(latencies)
+    return {
+        "engine": engine,
+        "players": n,
+        "scale": f"1-{scale}",
+        "input": kind,
+        "runs": repeats,
+        "latency_p50": float(np.percentile(latencies, 50)),
+        "latency_p90": float(np.percentile(latencies, 90)),
+        "latency_p99": float(np.percentile(latencies, 99)),
+        "latency_max": float(latencies.max()),
+        "throughput": work / latencies.sum() if latencies.sum() > 0 else None,
+        "optimal_ratio": optimal / repeats,
+        "peak_memory": measure_memory(engine, rosters[0], time_budget) if memory else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de los motores de team_optimizer")
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(range(4, 31, 2)))
+    parser.add_argument("--scales", type=int, nargs="+", default=[5, 10], choices=[5, 10])
+    parser.add_argument("--inputs", nargs="+", default=list(GENERATORS), choices=list(GENERATORS))
+    parser.add_argument("--engines", nargs="+", default=DEFAULT_ENGINES, choices=list(ENGINES))
+    parser.add_argument("--repeats", type=int, default=5, help="planteles distintos por celda")
+    parser.add_argument("--time-budget", type=float, default=10.0, help="segundos máximos por búsqueda")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--no-memory", action="store_true", help="no medir la memoria pico")
+    parser.add_argument("--output", help="archivo JSON donde guardar los resultados")
+    args = parser.parse_args()
+
+    results = []
+    print(
+        f"{'motor':18s} | {'jug':>3s} | {'escala':>6s} | {'entrada':>7s} | {'p50 (s)':>8s} | "
+        f"{'p99 (s)':>8s} | {'ops/s':>10s} | {'pico (KiB)':>10s} | {'óptimo':>6s}"
+    )
+    print("-" * 104)
+    for kind in args.inputs:
+        for scale in args.scales:
+            for n in args.sizes:
+                for engine in args.engines:
+                    if n > ENGINE_MAX_PLAYERS.get(engine, n):
+                        continue
+                    row = benchmark_cell(
+                        engine, n, scale, kind, args.repeats, args.seed, args.time_budget, not args.no_memory
+                    )
+                    results.append(row)
+                    throughput = f"{row['throughput']:10.0f}" if row["throughput"] else f"{'-':>10s}"
+                    peak = f"{row['peak_memory'] / 1024:10.1f}" if row["peak_memory"] is not None else f"{'-':>10s}"
+                    print(
+                        f"{engine:18s} | {n:3d} | {row['scale']:>6s} | {kind:>7s} | {row['latency_p50']:8.3f} | "
+                        f"{row['latency_p99']:8.3f} | {throughput} | {peak} | {row['optimal_ratio']:6.0%}"
+                    )
+
+    if args.output:
+        report = {
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "machine": platform.machine(),
+            "cpus": os.cpu_count(),
+            "options": vars(args),
+            "results": results,
+        }
+        with open(args.output, "w") as output:
+            json.dump(report, output, indent=2)
+        print(f"Resultados guardados en {args.output}")
+
+
+if __name__ == "__main__":
+    main()
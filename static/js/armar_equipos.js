@@ -104,38 +104,19 @@ async function loadPlayers() {
 }
 
 // Cargar jugadores según el contexto (personal o club) - igual que en players.js
+// Solo se piden id, nombre y puntajes; la primera página se muestra apenas llega
+const PLAYER_LIST_FIELDS = 'id,name,velocidad,resistencia,control,pases,tiro,defensa,habilidad_arquero,fuerza_cuerpo,vision';
+let playersLoadId = 0;
+
 async function loadPlayersForContext(contextId) {
+    const loadId = ++playersLoadId;
     try {
         loading = true;
+        players = [];
+        filteredPlayers = [];
+        availablePlayers = [];
         renderPlayers(); // Mostrar loading
         
-        const scale = currentScale === 5 ? '1-5' : '1-10';
-        let url = `/api/players?scale=${scale}`;
-        
-        if (contextId !== 'my-players') {
-            url += `&club_id=${contextId}`;
-        }
-        
-        const response = await fetch(url, {
-            method: 'GET',
-            credentials: 'include',
-            headers: { 'Content-Type': 'application/json' }
-        });
-        
-        if (!response.ok) throw new Error(`Error ${response.status}`);
-        const data = await response.json();
-        players = data.players || data; // Manejar tanto {players: [...]} como [...]
-        
-        // Calcular promedio para cada jugador
-        players = players.map(player => ({
-            ...player,
-            rating: calculateAverage(player)
-        }));
-        
-        // Inicializar jugadores filtrados con todos los jugadores
-        filteredPlayers = [...players];
-        availablePlayers = [...players];
-        
         // Limpiar selecciones cuando cambia el contexto
         selectedPlayers.clear();
         teamA = [];
@@ -154,11 +135,34 @@ async function loadPlayersForContext(contextId) {
             searchInput.value = '';
         }
         
-        loading = false;
-        renderPlayers();
-        updateManualMode();
+        const params = { scale: currentScale === 5 ? '1-5' : '1-10', fields: PLAYER_LIST_FIELDS };
+        if (contextId !== 'my-players') {
+            params.club_id = contextId;
+        }
+        
+        await fetchPlayerPages(params, page => {
+            // Si mientras tanto cambió el contexto, esta carga ya no sirve
+            if (loadId !== playersLoadId) return false;
+            
+            // Calcular promedio para cada jugador
+            page = page.map(player => ({
+                ...player,
+                rating: calculateAverage(player)
+            }));
+            players = players.concat(page);
+            availablePlayers = availablePlayers.concat(page);
+            
+            // Respetar la búsqueda que se haya escrito mientras cargaba
+            const searchTerm = searchInput?.value?.toLowerCase() || '';
+            filteredPlayers = players.filter(player => player.name.toLowerCase().includes(searchTerm));
+            
+            loading = false;
+            renderPlayers();
+            updateManualMode();
+        });
         
     } catch (error) {
+        if (loadId !== playersLoadId) return;
         loading = false;
         console.error('Error loading players for context:', error);
         showError('Error al cargar jugadores');
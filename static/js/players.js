@@ -359,6 +359,12 @@ const MAX_PHOTO_SIZE = 500 * 1024;
 // Variable to store the pending photo data during edit/create
 let pendingPhotoData = null;
 
+// Id of the stored photo to keep when saving (null if removed or replaced)
+let pendingPhotoId = null;
+
+// Whether the user removed the player's current photo (without a new one it is kept)
+let pendingPhotoRemoved = false;
+
 // Function to validate base64 image data
 function isValidBase64Image(data) {
     if (!data || typeof data !== 'string') {
@@ -370,7 +376,6 @@ function isValidBase64Image(data) {
         'data:image/png;base64,',
         'data:image/gif;base64,',
         'data:image/webp;base64,',
-        'data:image/svg+xml;base64,',
         'data:image/bmp;base64,'
     ];
     return validPrefixes.some(prefix => data.startsWith(prefix));
@@ -407,6 +412,8 @@ function handlePhotoFileSelect(event, previewId) {
         // Validate the result is a proper base64 image
         if (isValidBase64Image(result)) {
             pendingPhotoData = result;
+            pendingPhotoId = null;
+            pendingPhotoRemoved = false;
             if (preview) {
                 preview.src = pendingPhotoData;
                 preview.style.display = 'block';
@@ -429,6 +436,8 @@ function removeSelectedPhoto(inputId, previewId) {
     const removeBtn = document.getElementById(previewId + '-remove');
     
     pendingPhotoData = null;
+    pendingPhotoId = null;
+    pendingPhotoRemoved = true;
     if (input) input.value = '';
     if (preview) {
         preview.src = '';
@@ -445,13 +454,15 @@ function renderPlayerModal(player) {
     const lastModified = player.updated_at;
     const initial = player.name.charAt(0).toUpperCase();
     
-    // Reset pending photo data and set it to current player's photo (only if valid)
-    const hasValidPhoto = player.photo_data && isValidBase64Image(player.photo_data);
-    pendingPhotoData = hasValidPhoto ? player.photo_data : null;
+    // Reset pending photo data and keep the player's stored photo (served from /api/photos)
+    const hasValidPhoto = Boolean(player.photo_url);
+    pendingPhotoData = null;
+    pendingPhotoId = player.photo_id || null;
+    pendingPhotoRemoved = false;
     
-    // Generate avatar content - show photo if available and valid, otherwise show initials
+    // Generate avatar content - show photo if available, otherwise show initials
     const avatarContent = hasValidPhoto
-        ? `<img src="${player.photo_data}" alt="${escapeHTML(player.name)}" class="avatar-image" data-avatar-image="true" /><div class="avatar-initials" style="display: none;">${initial}</div>`
+        ? `<img src="${player.photo_url}?size=medium" alt="${escapeHTML(player.name)}" class="avatar-image" data-avatar-image="true" /><div class="avatar-initials" style="display: none;">${initial}</div>`
         : `<div class="avatar-initials">${initial}</div>`;
 
     details.innerHTML = `
@@ -522,7 +533,7 @@ function renderPlayerModal(player) {
                 <div class="photo-upload-container">
                     <input type="file" id="edit-photo-file" accept="image/*" onchange="handlePhotoFileSelect(event, 'edit-photo-preview')" />
                     <div class="photo-preview-container">
-                        <img id="edit-photo-preview" class="photo-preview" src="${hasValidPhoto ? player.photo_data : ''}" style="display: ${hasValidPhoto ? 'block' : 'none'};" />
+                        <img id="edit-photo-preview" class="photo-preview" src="${hasValidPhoto ? `${player.photo_url}?size=medium` : ''}" style="display: ${hasValidPhoto ? 'block' : 'none'};" />
                         <button type="button" id="edit-photo-preview-remove" class="btn-remove-photo" style="display: ${hasValidPhoto ? 'inline-block' : 'none'};" onclick="removeSelectedPhoto('edit-photo-file', 'edit-photo-preview')">✕ Quitar foto</button>
                     </div>
                 </div>
@@ -714,14 +725,16 @@ async function savePlayerEdits() {
             id: currentEditingPlayer.id,
             name: name,
             photo_data: pendingPhotoData,
+            photo_id: pendingPhotoId,
+            remove_photo: pendingPhotoRemoved,
             ...skillValues,
             club_id: currentEditingPlayer.club_id || null
         };
 
-        await savePlayer(playerData);
+        const savedPlayer = await savePlayer(playerData);
         
-        // Actualizar el jugador actual con los nuevos datos
-        Object.assign(currentEditingPlayer, playerData);
+        // Actualizar el jugador actual con los datos guardados (incluye la url de la foto)
+        Object.assign(currentEditingPlayer, savedPlayer);
         
         // Mostrar mensaje de éxito
         showSuccessMessage('✓ Jugador guardado exitosamente');
@@ -791,6 +804,8 @@ function openCreatePlayerModal() {
     
     // Reset pending photo data
     pendingPhotoData = null;
+    pendingPhotoId = null;
+    pendingPhotoRemoved = false;
     
     // Valores por defecto según la escala
     const defaultValue = currentScale === 5 ? 3 : 5;
@@ -1022,7 +1037,9 @@ async function savePlayer(playerData) {
         const errorData = await response.json().catch(() => ({}));
         throw new Error(errorData.detail || `Error ${response.status}`);
     }
+    const savedPlayer = await response.json();
     await loadPlayers(); // Recargar la lista
+    return savedPlayer;
 }
 
 // Cerrar modal al hacer clic fuera
@@ -1050,47 +1067,39 @@ function onContextChanged(contextId) {
 }
 
 // Cargar jugadores según el contexto (personal o club)
+// La primera página se muestra apenas llega; el resto se agrega a medida que se descarga
+let playersLoadId = 0;
+
 async function loadPlayersForContext(contextId) {
+    const loadId = ++playersLoadId;
     try {
         loading = true;
+        players = [];
+        filteredPlayers = [];
         renderPlayers(); // Mostrar loading
-        
-        const scale = currentScale === 5 ? '1-5' : '1-10';
-        let url = `/api/players?scale=${scale}`;
-        
-        if (contextId !== 'my-players') {
-            url += `&club_id=${contextId}`;
-        }
-        
-        const response = await fetch(url, {
-            method: 'GET',
-            credentials: 'include',
-            headers: { 'Content-Type': 'application/json' }
-        });
-        
-        if (!response.ok) throw new Error(`Error ${response.status}`);
-        players = await response.json();
-        
-        // Inicializar jugadores filtrados con todos los jugadores
-        filteredPlayers = [...players];
-        
+
         // Limpiar el buscador cuando cambia el contexto
         const searchInput = document.getElementById('player-search');
         if (searchInput) {
             searchInput.value = '';
             searchTerm = '';
         }
-        
-        // Aplicar ordenamiento actual
-        if (players.length > 0) {
-            applySortToFilteredPlayers();
-            loading = false;
-            renderPlayers();
-        } else {
-            loading = false;
-            renderPlayers();
+
+        const params = { scale: currentScale === 5 ? '1-5' : '1-10' };
+        if (contextId !== 'my-players') {
+            params.club_id = contextId;
         }
+
+        await fetchPlayerPages(params, page => {
+            // Si mientras tanto cambió el contexto, esta carga ya no sirve
+            if (loadId !== playersLoadId) return false;
+
+            players = players.concat(page);
+            loading = false;
+            filterPlayers();
+        });
     } catch (error) {
+        if (loadId !== playersLoadId) return;
         loading = false;
         console.error('Error loading players for context:', error);
         players = [];
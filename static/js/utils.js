@@ -85,4 +85,23 @@ function renumerarJugadoresEquipo(teamList) {
             numeroSpan.textContent = (index + 1) + '.';
         }
     });
-}
\ No newline at end of file
+}
+// Descargar /api/players de a páginas: `onPage` recibe cada página apenas llega
+// (si devuelve false se dejan de pedir las siguientes, p. ej. porque cambió el contexto)
+async function fetchPlayerPages(params, onPage, pageSize = 100) {
+    const query = new URLSearchParams({ ...params, limit: pageSize });
+    while (true) {
+        const response = await fetch(`/api/players?${query}`, {
+            method: 'GET',
+            credentials: 'include',
+            headers: { 'Content-Type': 'application/json' }
+        });
+
+        if (!response.ok) throw new Error(`Error ${response.status}`);
+        if (onPage(await response.json()) === false) return;
+
+        const cursor = response.headers.get('X-Next-Cursor');
+        if (!cursor) return;
+        query.set('cursor', cursor);
+    }
+}
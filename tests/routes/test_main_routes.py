@@ -1,4 +1,10 @@
-from app.db.models import User
+import json
+import threading
+
+import pytest
+from fastapi import HTTPException
+
+from app.db.models import Club, ClubUser, Player, User
 from app.utils.auth import get_current_user
 from app.utils.team_optimizer import find_best_combination
 
@@ -61,3 +67,310 @@ def test_find_best_combination():
     # Check if the teams are balanced
     team1, team2 = best_teams[0]
     assert len(team1) == len(team2)
+
+
+def create_build_teams_players(db, count):
+    user = db.query(User).filter(User.username == "testuser").first()
+    players = [
+        Player(
+            name=f"Build Player {i}",
+            velocidad=1 + i % 5,
+            resistencia=1 + i * 2 % 5,
+            control=1 + i * 3 % 5,
+            pases=3,
+            tiro=1 + i % 3,
+            defensa=2,
+            habilidad_arquero=1,
+            fuerza_cuerpo=1 + i % 2,
+            vision=4,
+            user_id=user.id,
+        )
+        for i in range(count)
+    ]
+    db.add_all(players)
+    db.commit()
+    return [p.id for p in players]
+
+
+def test_build_teams_limits_options(authenticated_client, db):
+    player_ids = create_build_teams_players(db, 8)
+    response = authenticated_client.post("/api/build-teams", json={"selected_player_ids": player_ids, "max_options": 3})
+    assert response.status_code == 200
+    data = response.json()
+    assert len(data["teams"]) == 3
+    assert data["teams"][0]["difference"] == data["difference"]
+
+    # La misma semilla devuelve las mismas opciones
+    again = authenticated_client.post("/api/build-teams", json={"selected_player_ids": player_ids, "max_options": 3})
+    assert again.json()["teams"] == data["teams"]
+
+
+def test_build_teams_rejects_invalid_max_options(authenticated_client, db):
+    player_ids = create_build_teams_players(db, 4)
+    for max_options in (0, 1000, "3"):
+        response = authenticated_client.post(
+            "/api/build-teams", json={"selected_player_ids": player_ids, "max_options": max_options}
+        )
+        assert response.status_code == 400
+
+
+def test_build_teams_returns_503_when_executor_is_full(authenticated_client, db, monkeypatch):
+    from app.routes import main_routes
+    from app.utils.bounded_executor import BoundedExecutor
+
+    executor = BoundedExecutor(max_workers=1)
+    monkeypatch.setattr(main_routes, "get_build_teams_executor", lambda: executor)
+    player_ids = create_build_teams_players(db, 4)
+
+    release = threading.Event()
+    executor.submit(release.wait)
+    response = authenticated_client.post("/api/build-teams", json={"selected_player_ids": player_ids})
+    release.set()
+
+    assert response.status_code == 503
+    assert int(response.headers["Retry-After"]) >= 1
+    assert authenticated_client.post("/api/build-teams", json={"selected_player_ids": player_ids}).status_code == 200
+    executor.shutdown()
+
+
+def test_build_teams_job_streams_result(authenticated_client, db):
+    player_ids = create_build_teams_players(db, 8)
+    response = authenticated_client.post(
+        "/api/build-teams", json={"selected_player_ids": player_ids, "max_options": 2, "mode": "job"}
+    )
+    assert response.status_code == 202
+    job_id = response.json()["job_id"]
+
+    with authenticated_client.stream("GET", response.json()["events_url"]) as events:
+        assert events.headers["content-type"].startswith("text/event-stream")
+        body = "".join(events.iter_text())
+    assert "event: done" in body
+    result = json.loads(body.split("event: done\ndata: ")[1])
+    assert len(result["teams"]) == 2
+
+    job = authenticated_client.get(f"/api/build-teams/jobs/{job_id}").json()
+    assert job["status"] == "done"
+    assert job["result"] == result
+
+
+def test_build_teams_job_not_found(authenticated_client):
+    assert authenticated_client.get("/api/build-teams/jobs/missing").status_code == 404
+    assert authenticated_client.get("/api/build-teams/jobs/missing/events").status_code == 404
+    assert authenticated_client.delete("/api/build-teams/jobs/missing").status_code == 404
+
+
+def test_build_teams_reuses_cached_result(authenticated_client, db):
+    player_ids = create_build_teams_players(db, 6)
+    first = authenticated_client.post("/api/build-teams", json={"selected_player_ids": player_ids, "seed": 11})
+    second = authenticated_client.post("/api/build-teams", json={"selected_player_ids": player_ids[::-1], "seed": 11})
+    assert not first.json()["cached"]
+    assert second.json()["cached"]
+    assert second.json()["teams"] == first.json()["teams"]
+
+
+def test_build_teams_starts_from_previous_team(authenticated_client, db):
+    player_ids = create_build_teams_players(db, 9)
+    first = authenticated_client.post("/api/build-teams", json={"selected_player_ids": player_ids[:8]}).json()
+    previous_team1 = [p["id"] for p in first["teams"][0]["team1"]]
+
+    # Se baja un jugador y entra otro
+    swapped_ids = player_ids[1:]
+    response = authenticated_client.post(
+        "/api/build-teams", json={"selected_player_ids": swapped_ids, "previous_team1": previous_team1}
+    )
+    expected = authenticated_client.post("/api/build-teams", json={"selected_player_ids": swapped_ids}).json()
+    assert response.status_code == 200
+    assert response.json()["teams"] == expected["teams"]
+
+    invalid = authenticated_client.post(
+        "/api/build-teams", json={"selected_player_ids": swapped_ids, "previous_team1": "1,2"}
+    )
+    assert invalid.status_code == 400
+
+
+def test_build_teams_respects_constraints(authenticated_client, db):
+    player_ids = create_build_teams_players(db, 8)
+    constraints = {"together": [player_ids[:2]], "apart": [player_ids[2:4]], "team2": [player_ids[4]]}
+    response = authenticated_client.post(
+        "/api/build-teams", json={"selected_player_ids": player_ids, "constraints": constraints}
+    )
+    assert response.status_code == 200
+    for option in response.json()["teams"]:
+        team1 = {p["id"] for p in option["team1"]}
+        assert (player_ids[0] in team1) == (player_ids[1] in team1)
+        assert (player_ids[2] in team1) != (player_ids[3] in team1)
+        assert player_ids[4] not in team1
+
+
+def test_build_teams_rejects_invalid_constraints(authenticated_client, db):
+    player_ids = create_build_teams_players(db, 6)
+    for constraints in (
+        {"together": [player_ids[:2]], "apart": [player_ids[:2]]},
+        {"team1": [player_ids[0] + 1000]},
+        {"together": player_ids},
+        {"together": [player_ids[:4]]},
+    ):
+        response = authenticated_client.post(
+            "/api/build-teams", json={"selected_player_ids": player_ids, "constraints": constraints}
+        )
+        assert response.status_code == 400
+
+
+def test_build_teams_splits_into_several_teams(authenticated_client, db):
+    player_ids = create_build_teams_players(db, 9)
+    response = authenticated_client.post(
+        "/api/build-teams", json={"selected_player_ids": player_ids, "num_teams": 3, "max_options": 2}
+    )
+    assert response.status_code == 200
+    data = response.json()
+    assert len(data["teams"]) == 2
+    assert data["teams"][0]["difference"] == data["difference"]
+    teams = data["teams"][0]["teams"]
+    assert [len(team) for team in teams] == [3, 3, 3]
+    assert sorted(p["id"] for team in teams for p in team) == sorted(player_ids)
+
+    for invalid in ({"num_teams": 1}, {"num_teams": 40}, {"num_teams": 3, "previous_team1": player_ids[:3]}):
+        response = authenticated_client.post("/api/build-teams", json={"selected_player_ids": player_ids, **invalid})
+        assert response.status_code == 400
+
+    for invalid in (player_ids[:4] + ["1"], player_ids[:4] + [None], {"ids": player_ids}, "1234"):
+        response = authenticated_client.post("/api/build-teams", json={"selected_player_ids": invalid})
+        assert response.status_code == 400
+
+
+def test_build_teams_applies_request_and_club_weights(authenticated_client, db):
+    player_ids = create_build_teams_players(db, 8)
+    weights = {"control": 5, "habilidad_arquero": 0}
+    weighted = authenticated_client.post(
+        "/api/build-teams", json={"selected_player_ids": player_ids, "weights": weights}
+    )
+    assert weighted.status_code == 200
+    assert weighted.json()["difference"] == weighted.json()["teams"][0]["difference"]
+
+    user = db.query(User).filter(User.username == "testuser").first()
+    club = Club(name="Weights Club")
+    db.add(club)
+    db.commit()
+    db.add(ClubUser(club_id=club.id, user_id=user.id, role="owner"))
+    db.query(Player).filter(Player.id.in_(player_ids)).update({"club_id": club.id}, synchronize_session=False)
+    db.commit()
+
+    assert authenticated_client.get(f"/clubs/{club.id}/attribute-weights").json()["control"] == 1
+    saved = authenticated_client.put(f"/clubs/{club.id}/attribute-weights", json=weights)
+    assert saved.status_code == 200
+    assert authenticated_client.get(f"/clubs/{club.id}/attribute-weights").json() == saved.json()
+
+    from_club = authenticated_client.post(
+        "/api/build-teams", json={"selected_player_ids": player_ids, "club_id": club.id}
+    )
+    assert from_club.json()["teams"] == weighted.json()["teams"]
+
+    for invalid in ({"control": 11}, {"speed": 2}, {name: 0 for name in saved.json()}, [1] * 9):
+        response = authenticated_client.post(
+            "/api/build-teams", json={"selected_player_ids": player_ids, "weights": invalid}
+        )
+        assert response.status_code == 400
+
+
+def test_build_teams_uses_club_weights_only_for_members(authenticated_client, db):
+    from app.routes.main_routes import load_attribute_weights
+
+    player_ids = create_build_teams_players(db, 8)
+    club = Club(name="Other Club", attribute_weights='{"control": 5}')
+    db.add(club)
+    db.commit()
+    db.query(Player).filter(Player.id.in_(player_ids)).update({"club_id": club.id}, synchronize_session=False)
+    db.commit()
+
+    response = authenticated_client.post("/api/build-teams", json={"selected_player_ids": player_ids, "club_id": club.id})
+    assert response.status_code == 403
+    response = authenticated_client.post("/api/build-teams/batch", json={"selections": [player_ids], "club_id": club.id})
+    assert response.status_code == 403
+
+    user = db.query(User).filter(User.username == "testuser").first()
+    with pytest.raises(HTTPException) as error:
+        load_attribute_weights(db, user.id, 10**6, None)
+    assert error.value.status_code == 404
+
+
+def test_build_teams_reports_search_stats(authenticated_client, db):
+    from app.utils.metrics import get_metrics_sink
+
+    player_ids = create_build_teams_players(db, 10)
+    response = authenticated_client.post(
+        "/api/build-teams", json={"selected_player_ids": player_ids, "include_stats": True, "seed": 5}
+    )
+    assert response.status_code == 200
+    stats = response.json()["stats"]
+    assert stats["engine"] in ("numpy", "branch_and_bound")
+    assert stats["wall_time"] > 0
+    assert stats["peak_memory"] > 0
+    assert stats["optimal"]
+
+    assert "stats" not in authenticated_client.post("/api/build-teams", json={"selected_player_ids": player_ids}).json()
+    series = {(entry["name"], entry["tags"]["players"]) for entry in get_metrics_sink().snapshot()}
+    assert ("build_teams.wall_time", 10) in series
+
+
+def test_build_teams_batch_matches_single_requests(authenticated_client, db, monkeypatch):
+    from app.routes import main_routes
+
+    queries = []
+    query_selected_players = main_routes.query_selected_players
+
+    def counting_query_selected_players(*args, **kwargs):
+        queries.append(args)
+        return query_selected_players(*args, **kwargs)
+
+    monkeypatch.setattr(main_routes, "query_selected_players", counting_query_selected_players)
+
+    player_ids = create_build_teams_players(db, 10)
+    selections = [player_ids[:8], player_ids[2:], player_ids[:8]]
+    response = authenticated_client.post(
+        "/api/build-teams/batch", json={"selections": selections, "max_options": 2, "seed": 3}
+    )
+    assert response.status_code == 200
+    results = response.json()["results"]
+    assert len(queries) == 1
+    assert len(results) == 3
+    assert results[2]["cached"]
+
+    for selected_player_ids, result in zip(selections, results):
+        single = authenticated_client.post(
+            "/api/build-teams", json={"selected_player_ids": selected_player_ids, "max_options": 2, "seed": 3}
+        )
+        assert result["teams"] == single.json()["teams"]
+
+
+def test_build_teams_batch_rejects_invalid_selections(authenticated_client, db):
+    player_ids = create_build_teams_players(db, 8)
+    for payload in (
+        {},
+        {"selections": []},
+        {"selections": [player_ids] * 100},
+        {"selections": [player_ids[:3]]},
+        {"selections": [player_ids[:6]], "num_teams": 4},
+        {"selections": [player_ids], "max_options": 0},
+    ):
+        assert authenticated_client.post("/api/build-teams/batch", json=payload).status_code == 400
+
+    response = authenticated_client.post("/api/build-teams/batch", json={"selections": [player_ids, player_ids[:4] + [10**9]]})
+    assert response.status_code == 400
+    assert response.json()["error"] == "Algunos jugadores no fueron encontrados"
+
+
+def test_selected_players_query_projects_ratings_of_own_players(authenticated_client, db):
+    from app.db.database_utils import RATING_COLUMNS, query_selected_players
+
+    player_ids = create_build_teams_players(db, 6)
+    user = db.query(User).filter(User.username == "testuser").first()
+    rows = query_selected_players(db, user.id, player_ids[1:4])
+    assert [row.id for row in rows] == player_ids[1:4]
+    assert set(rows[0]._fields) == {"id", "name", *RATING_COLUMNS}
+
+    # Los jugadores personales de otro usuario no se devuelven
+    assert query_selected_players(db, user.id + 1, player_ids) == []
+    response = authenticated_client.post(
+        "/api/build-teams", json={"selected_player_ids": player_ids[:4], "club_id": 10**6}
+    )
+    assert response.status_code == 400
@@ -1,4 +1,8 @@
-from app.db.models import Player
+import base64
+import hashlib
+
+from app.db.models import Player, PlayerPhoto
+from app.db.schemas import PlayerResponse
 
 # Test create player endpoint
 
@@ -90,6 +94,99 @@ def test_get_players(authenticated_client, db):
     assert "Player 2" in player_names
 
 
+def create_named_players(client, names):
+    for name in names:
+        response = client.post("/api/player", json={
+            "name": name, "velocidad": 3, "resistencia": 3, "control": 3, "pases": 3, "tiro": 3,
+            "defensa": 3, "habilidad_arquero": 3, "fuerza_cuerpo": 3, "vision": 3
+        })
+        assert response.status_code == 200
+
+
+def test_get_players_keyset_pagination(authenticated_client):
+    create_named_players(authenticated_client, ["Page c", "page B", "Page a", "Page b", "Other"])
+
+    names = []
+    params = {"name": "PAGE", "limit": 2, "fields": "name"}
+    while True:
+        response = authenticated_client.get("/api/players", params=params)
+        assert response.status_code == 200
+        page = response.json()
+        assert len(page) <= 2
+        assert all(set(player) == {"id", "name"} for player in page)
+        names += [player["name"] for player in page]
+        if "x-next-cursor" not in response.headers:
+            break
+        params["cursor"] = response.headers["x-next-cursor"]
+
+    # Orden por nombre sin distinguir mayúsculas, con el id como desempate
+    assert names == ["Page a", "page B", "Page b", "Page c"]
+
+    response = authenticated_client.get("/api/players", params={"name": "page", "order": "desc", "limit": 10})
+    assert [player["name"] for player in response.json()] == ["Page c", "Page b", "page B", "Page a"]
+    assert "x-next-cursor" not in response.headers
+    assert set(response.json()[0]) == set(PlayerResponse.model_json_schema(mode="serialization")["properties"])
+
+
+def test_get_players_keyset_pagination_with_accented_names(authenticated_client):
+    accented = ["Álvaro", "Ángel", "Óscar", "Beto", "Zoe"]
+    create_named_players(authenticated_client, accented)
+
+    for order in ("asc", "desc"):
+        names = []
+        params = {"limit": 1, "fields": "name", "order": order}
+        while True:
+            response = authenticated_client.get("/api/players", params=params)
+            names += [player["name"] for player in response.json()]
+            if "x-next-cursor" not in response.headers:
+                break
+            params["cursor"] = response.headers["x-next-cursor"]
+
+        # Página a página salen los mismos jugadores, en el mismo orden, que en una sola página
+        full = authenticated_client.get("/api/players", params={"limit": 200, "fields": "name", "order": order})
+        assert names == [player["name"] for player in full.json()]
+        assert set(accented) <= set(names)
+
+
+def test_get_players_rejects_bad_parameters(authenticated_client):
+    assert authenticated_client.get("/api/players", params={"fields": "name,photo_data"}).status_code == 400
+    assert authenticated_client.get("/api/players", params={"cursor": "not-a-cursor", "limit": 5}).status_code == 400
+    assert authenticated_client.get("/api/players", params={"limit": 0}).status_code == 422
+
+
+def test_get_players_conditional_get(authenticated_client):
+    create_named_players(authenticated_client, ["Etag 1"])
+    response = authenticated_client.get("/api/players")
+    etag = response.headers["etag"]
+    assert response.headers["cache-control"] == "private, no-cache"
+
+    unchanged = authenticated_client.get("/api/players", headers={"If-None-Match": etag})
+    assert unchanged.status_code == 304
+    assert unchanged.headers["etag"] == etag
+    assert unchanged.content == b""
+
+    # Cada combinación de parámetros tiene su propio ETag
+    page = authenticated_client.get("/api/players", params={"limit": 1}, headers={"If-None-Match": etag})
+    assert page.status_code == 200
+    assert page.headers["etag"] != etag
+
+    # Crear, editar o borrar un jugador invalida el ETag
+    create_named_players(authenticated_client, ["Etag 2"])
+    response = authenticated_client.get("/api/players", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    player = next(p for p in response.json() if p["name"] == "Etag 2")
+
+    etag = response.headers["etag"]
+    player["name"] = "Etag 2 editado"
+    assert authenticated_client.put("/api/player", json=player).status_code == 200
+    response = authenticated_client.get("/api/players", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+
+    etag = response.headers["etag"]
+    assert authenticated_client.delete(f"/api/players/{player['id']}").status_code == 200
+    assert authenticated_client.get("/api/players", headers={"If-None-Match": etag}).status_code == 200
+
+
 # Test update player endpoint
 
 def test_update_player(authenticated_client, db):
@@ -167,6 +264,8 @@ def test_delete_nonexistent_player(authenticated_client):
 
 # Test photo_data field
 
+PHOTO_DATA = "data:image/png;base64,iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAYAAAAfFcSJAAAADUlEQVR42mNk+M9QDwADhgGAWjR9awAAAABJRU5ErkJggg=="
+
 def test_create_player_with_photo_data(authenticated_client, db):
     # Create a player with photo data (base64)
     photo_data = "data:image/png;base64,iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAYAAAAfFcSJAAAADUlEQVR42mNk+M9QDwADhgGAWjR9awAAAABJRU5ErkJggg=="
@@ -187,11 +286,16 @@ def test_create_player_with_photo_data(authenticated_client, db):
     assert response.status_code == 200
     player_data = response.json()
     assert player_data["name"] == "Player with Photo"
-    assert player_data["photo_data"] == photo_data
+    # La foto se guarda aparte, identificada por el hash de su contenido
+    content = base64.b64decode(photo_data.split(",", 1)[1])
+    assert player_data["photo_id"] == hashlib.sha256(content).hexdigest()
+    assert player_data["photo_url"] == f"/api/photos/{player_data['photo_id']}"
+    assert "photo_data" not in player_data
     
     db_player = db.query(Player).filter(Player.name == "Player with Photo").first()
     assert db_player is not None
-    assert db_player.photo_data == photo_data
+    assert db_player.photo_data is None
+    assert db.get(PlayerPhoto, db_player.photo_id).data == content
 
 
 def test_create_player_without_photo_data(authenticated_client, db):
@@ -212,7 +316,8 @@ def test_create_player_without_photo_data(authenticated_client, db):
     assert response.status_code == 200
     player_data = response.json()
     assert player_data["name"] == "Player without Photo"
-    assert player_data["photo_data"] is None
+    assert player_data["photo_id"] is None
+    assert player_data["photo_url"] is None
 
 
 def test_update_player_photo_data(authenticated_client, db):
@@ -251,4 +356,103 @@ def test_update_player_photo_data(authenticated_client, db):
     
     assert update_response.status_code == 200
     updated_data = update_response.json()
-    assert updated_data["photo_data"] == new_photo_data
+    assert updated_data["photo_id"] is not None
+
+    # Sin foto nueva se conserva la actual, se mande su photo_id o no; solo se quita si se pide
+    player = dict(updated_data, photo_data=None)
+    assert authenticated_client.put("/api/player", json=player).json()["photo_id"] == updated_data["photo_id"]
+    player["photo_id"] = "0" * 64
+    assert authenticated_client.put("/api/player", json=player).status_code == 400
+    player["photo_id"] = None
+    assert authenticated_client.put("/api/player", json=player).json()["photo_id"] == updated_data["photo_id"]
+    player["remove_photo"] = True
+    assert authenticated_client.put("/api/player", json=player).json()["photo_id"] is None
+
+
+def test_update_player_keeps_unmigrated_inline_photo(authenticated_client, db):
+    # Jugador guardado antes del almacén de fotos: la foto sigue solo en photo_data
+    player = create_player_with_photo(authenticated_client, "Inline Photo", photo_data=None)
+    db_player = db.get(Player, player["id"])
+    db_player.photo_data = PHOTO_DATA
+    db.commit()
+
+    # El frontend edita sin mandar photo_data ni photo_id: la foto pasa al almacén
+    response = authenticated_client.put("/api/player", json=dict(player, name="Inline Photo 2"))
+    assert response.status_code == 200
+    content = base64.b64decode(PHOTO_DATA.split(",", 1)[1])
+    assert response.json()["photo_id"] == hashlib.sha256(content).hexdigest()
+    db.refresh(db_player)
+    assert db_player.photo_data is None
+    assert db.get(PlayerPhoto, db_player.photo_id).data == content
+
+
+def create_player_with_photo(client, name, photo_data=PHOTO_DATA):
+    response = client.post("/api/player", json={
+        "name": name,
+        "photo_data": photo_data,
+        "velocidad": 4,
+        "resistencia": 5,
+        "control": 5,
+        "pases": 3,
+        "tiro": 3,
+        "defensa": 2,
+        "habilidad_arquero": 3,
+        "fuerza_cuerpo": 5,
+        "vision": 1
+    })
+    assert response.status_code == 200
+    return response.json()
+
+
+def test_identical_photos_are_stored_once(authenticated_client, db):
+    first = create_player_with_photo(authenticated_client, "Photo Twin 1")
+    second = create_player_with_photo(authenticated_client, "Photo Twin 2")
+    assert first["photo_id"] == second["photo_id"]
+    assert db.query(PlayerPhoto).filter(PlayerPhoto.id == first["photo_id"]).count() == 1
+
+
+def test_invalid_photo_is_rejected(authenticated_client):
+    response = authenticated_client.post("/api/player", json={
+        "name": "Bad Photo",
+        "photo_data": "data:text/html;base64,PGgxPg==",
+        "velocidad": 4,
+        "resistencia": 5,
+        "control": 5,
+        "pases": 3,
+        "tiro": 3,
+        "defensa": 2,
+        "habilidad_arquero": 3,
+        "fuerza_cuerpo": 5,
+        "vision": 1
+    })
+    assert response.status_code == 400
+
+
+def test_get_photo_streams_with_cache_headers(authenticated_client, client, db):
+    player = create_player_with_photo(authenticated_client, "Photo Owner")
+    response = authenticated_client.get(player["photo_url"])
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "image/png"
+    assert response.content == base64.b64decode(PHOTO_DATA.split(",", 1)[1])
+    assert response.headers["etag"] == f'"{player["photo_id"]}"'
+    assert "immutable" in response.headers["cache-control"]
+    assert response.headers["content-security-policy"] == "sandbox; default-src 'none'"
+    assert response.headers["x-content-type-options"] == "nosniff"
+
+    # Con el mismo ETag no se vuelve a enviar la imagen
+    cached = authenticated_client.get(player["photo_url"], headers={"If-None-Match": response.headers["etag"]})
+    assert cached.status_code == 304
+    assert cached.content == b""
+
+    # Miniatura por variante, con su propio ETag
+    small = authenticated_client.get(player["photo_url"], params={"size": "small"})
+    assert small.status_code == 200
+    assert small.headers["content-type"] == "image/webp"
+    assert small.headers["etag"] == f'"{player["photo_id"]}-small"'
+    assert authenticated_client.get(player["photo_url"], params={"size": "huge"}).status_code == 422
+
+    # Fotos inexistentes o de jugadores ajenos no se sirven
+    assert authenticated_client.get(f"/api/photos/{'0' * 64}").status_code == 404
+    db.query(Player).filter(Player.id == player["id"]).update({"user_id": player["user_id"] + 1})
+    db.commit()
+    assert authenticated_client.get(player["photo_url"]).status_code == 404
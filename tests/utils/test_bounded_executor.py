@@ -0,0 +1,35 @@
+import asyncio
+import threading
+
+import pytest
+
+from app.utils.bounded_executor import BoundedExecutor, ExecutorBusyError
+
+
+def test_run_returns_result_off_the_event_loop():
+    executor = BoundedExecutor(max_workers=1)
+    loop_thread = threading.get_ident()
+
+    async def main():
+        return await executor.run(lambda a, b=0: (a + b, threading.get_ident()), 2, b=3)
+
+    result, worker_thread = asyncio.run(main())
+    assert result == 5
+    assert worker_thread != loop_thread
+    executor.shutdown()
+
+
+def test_submit_rejects_when_workers_and_queue_are_full():
+    executor = BoundedExecutor(max_workers=1, max_queue=1)
+    release = threading.Event()
+    running = [executor.submit(release.wait), executor.submit(release.wait)]
+
+    with pytest.raises(ExecutorBusyError):
+        executor.submit(release.wait)
+
+    # Al terminar las tareas se liberan los lugares
+    release.set()
+    for future in running:
+        future.result()
+    assert executor.submit(lambda: 1).result() == 1
+    executor.shutdown()
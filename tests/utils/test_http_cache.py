@@ -0,0 +1,16 @@
+from app.utils.http_cache import etag_matches, weak_etag
+
+
+def test_weak_etag_depends_on_every_part():
+    etag = weak_etag(1, "scale=1-5", 3, "2024-01-01 10:00:00")
+    assert etag.startswith('W/"') and etag.endswith('"')
+    assert etag == weak_etag(1, "scale=1-5", 3, "2024-01-01 10:00:00")
+    assert etag != weak_etag(1, "scale=1-5", 4, "2024-01-01 10:00:00")
+    assert etag != weak_etag(2, "scale=1-5", 3, "2024-01-01 10:00:00")
+
+
+def test_weak_etags_match_with_or_without_prefix():
+    etag = weak_etag("players")
+    assert etag_matches(etag, etag)
+    assert etag_matches(etag.removeprefix("W/"), etag)
+    assert not etag_matches(weak_etag("other"), etag)
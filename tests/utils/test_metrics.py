@@ -0,0 +1,63 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from app.utils import metrics
+from app.utils.metrics import MetricsSink, traced_peak_memory
+
+
+def test_metrics_sink_aggregates_by_name_and_tags():
+    sink = MetricsSink()
+    sink.observe("build_teams.wall_time", 0.5, engine="numpy", players=10)
+    sink.observe("build_teams.wall_time", 1.5, players=10, engine="numpy")
+    sink.observe("build_teams.wall_time", 3.0, engine="auto", players=24)
+    snapshot = sink.snapshot()
+    assert snapshot[1] == {
+        "name": "build_teams.wall_time", "tags": {"engine": "numpy", "players": 10}, "count": 2, "sum": 2.0, "max": 1.5
+    }
+    assert snapshot[0]["tags"]["engine"] == "auto"
+    sink.clear()
+    assert sink.snapshot() == []
+
+
+def test_traced_peak_memory_measures_allocations():
+    with traced_peak_memory() as memory:
+        data = bytearray(1 << 20)
+    del data
+    assert memory["peak_memory"] >= 1 << 20
+
+
+def test_traced_peak_memory_skips_concurrent_measurements():
+    inside = threading.Event()
+    release = threading.Event()
+
+    def measure():
+        with traced_peak_memory():
+            inside.set()
+            release.wait()
+
+    thread = threading.Thread(target=measure)
+    thread.start()
+    inside.wait()
+    with traced_peak_memory() as memory:
+        pass
+    release.set()
+    thread.join()
+    assert memory["peak_memory"] is None
+
+
+def test_metrics_sink_is_created_once_under_concurrency(monkeypatch):
+    created = []
+
+    class SlowSink(MetricsSink):
+        def __init__(self):
+            time.sleep(0.05)
+            super().__init__()
+            created.append(self)
+
+    monkeypatch.setattr(metrics, "MetricsSink", SlowSink)
+    monkeypatch.setattr(metrics, "_metrics_sink", None)
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        sinks = list(executor.map(lambda _: metrics.get_metrics_sink(), range(4)))
+    assert len(created) == 1
+    assert all(sink is created[0] for sink in sinks)
@@ -0,0 +1,220 @@
+"""
+Oráculo diferencial para los motores de find_best_combination.
+
+Cada motor exhaustivo tiene que devolver exactamente lo mismo que el find_best_combination
+original (copiado sin cambios, independiente de team_optimizer) sobre planteles generados
+al azar y casos borde. Si un plantel falla, se reduce (menos jugadores, puntajes más
+chicos) hasta un caso mínimo que sigue fallando, y ese es el que se informa.
+
+Para una corrida más larga antes de activar un motor nuevo:
+    OPTIMIZER_ORACLE_CASES=2000 pytest tests/utils/test_optimizer_oracle.py
+"""
+
+import os
+import random
+from itertools import combinations
+
+import pytest
+
+from app.utils.team_optimizer import ENGINES, find_best_combination
+
+ORACLE_CASES = int(os.getenv("OPTIMIZER_ORACLE_CASES", "40"))
+ORACLE_MAX_PLAYERS = 14
+
+# La búsqueda local es una heurística: se controla aparte que sus equipos sean válidos
+EXACT_ENGINES = sorted(engine for engine in ENGINES if engine != "local_search")
+
+
+def reference_key(scores, team1, team2):
+    difference = sum(
+        abs(sum(column[i] for i in team1) - sum(column[i] for i in team2)) for column in zip(*scores)
+    )
+    difference_total = abs(sum(sum(scores[i]) for i in team1) - sum(sum(scores[i]) for i in team2))
+    return difference, difference_total
+
+
+# find_best_combination original, sin cambios: su resultado depende del orden en que
+# recorre las combinaciones, y los motores tienen que reproducirlo tal cual
+def calculate_team_score(indices, scores):
+    team_score = [0] * len(scores[0])
+    for i in indices:
+        for j in range(len(scores[0])):
+            team_score[j] += scores[i][j]
+    return team_score
+
+
+def calculate_difference(team1_score, team2_score):
+    return sum(abs(team1_score[i] - team2_score[i]) for i in range(len(team1_score)))
+
+
+def reference_best_combination(scores):
+    # Validar que haya al menos 3 jugadores según la lógica de negocio
+    if len(scores) < 3:
+        raise ValueError("Se requieren al menos 3 jugadores para formar equipos")
+
+    # Calcular tamaño del equipo (división entera para equipos equilibrados)
+    team_size = len(scores) // 2
+    all_combinations = list(combinations(range(len(scores)), team_size))
+
+    min_difference = float("inf")
+    min_difference_total = float("inf")
+    mejores_equipos = list()
+
+    # Solo evaluar la mitad si los equipos tienen el mismo tamaño (evitar duplicados simétricos)
+    # Si tienen tamaños diferentes, evaluar todas las combinaciones
+    if len(scores) % 2 == 0:
+        # Número par de jugadores = equipos del mismo tamaño
+        number_of_combinations = len(all_combinations) // 2
+        if len(all_combinations) % 2 == 1:
+            number_of_combinations += 1
+    else:
+        # Número impar de jugadores = equipos de tamaños diferentes
+        number_of_combinations = len(all_combinations)
+
+    for i in range(number_of_combinations):
+        team1_indices = all_combinations[i]
+        team2_indices = [i for i in range(len(scores)) if i not in team1_indices]
+
+        team1_score = calculate_team_score(team1_indices, scores)
+        team2_score = calculate_team_score(team2_indices, scores)
+
+        difference = calculate_difference(team1_score, team2_score)
+        difference_total = abs(sum(team1_score) - sum(team2_score))
+
+        if difference < min_difference:
+            min_difference = difference
+            if difference_total < min_difference_total:
+                min_difference_total = difference_total
+                mejores_equipos = [(team1_indices, team2_indices)]
+        elif difference == min_difference:
+            if difference_total == min_difference_total:
+                mejores_equipos.append((team1_indices, team2_indices))
+
+    return (mejores_equipos, min_difference_total)
+
+
+def uniform_roster(rng, n):
+    max_score = rng.choice([5, 10])
+    return [[rng.randint(1, max_score) for _ in range(9)] for _ in range(n)]
+
+
+def equal_roster(rng, n):
+    value = rng.randint(1, 10)
+    return [[value] * 9 for _ in range(n)]
+
+
+def tied_roster(rng, n):
+    archetypes = uniform_roster(rng, 2)
+    return [list(rng.choice(archetypes)) for _ in range(n)]
+
+
+def extreme_roster(rng, n):
+    return [[rng.choice([1, 10]) for _ in range(9)] for _ in range(n)]
+
+
+GENERATORS = [uniform_roster, equal_roster, tied_roster, extreme_roster]
+
+
+def generate_roster(rng):
+    # Planteles chicos e impares aparecen tan seguido como los grandes
+    n = rng.choice([3, 3, 4, 5, 7, rng.randint(3, ORACLE_MAX_PLAYERS)])
+    return rng.choice(GENERATORS)(rng, n)
+
+
+def shrink_candidates(scores):
+    """Planteles "más simples" que `scores`: con un jugador menos o con un puntaje más chico."""
+    if len(scores) > 3:
+        for i in range(len(scores)):
+            yield scores[:i] + scores[i + 1:]
+    for i, row in enumerate(scores):
+        for j, value in enumerate(row):
+            for smaller in sorted({1, value // 2, value - 1}):
+                if 1 <= smaller < value:
+                    yield scores[:i] + [row[:j] + [smaller] + row[j + 1:]] + scores[i + 1:]
+
+
+def shrink(scores, fails):
+    """Reduce un plantel que falla hasta que ninguna simplificación siga fallando."""
+    shrunk = True
+    while shrunk:
+        shrunk = False
+        for candidate in shrink_candidates(scores):
+            if fails(candidate):
+                scores = candidate
+                shrunk = True
+                break
+    return scores
+
+
+def check_property(prop, cases=ORACLE_CASES, seed=0):
+    """Evalúa `prop` en planteles generados; si alguno falla, informa el caso reducido."""
+    rng = random.Random(seed)
+
+    def fails(scores):
+        try:
+            prop(scores)
+        except AssertionError:
+            return True
+        return False
+
+    for _ in range(cases):
+        scores = generate_roster(rng)
+        if fails(scores):
+            minimal = shrink(scores, fails)
+            pytest.fail(f"Falla con {len(minimal)} jugadores: {minimal}")
+
+
+@pytest.mark.parametrize("engine", EXACT_ENGINES)
+def test_engine_matches_reference(engine):
+    def prop(scores):
+        assert find_best_combination(scores, engine=engine) == reference_best_combination(scores)
+
+    check_property(prop, seed=engine)
+
+
+@pytest.mark.parametrize(
+    "scores",
+    [
+        [[1] * 9] * 3,
+        [[5] * 9] * 4,
+        [[1] * 9, [10] * 9, [1] * 9],
+        [[10] * 9] + [[1] * 9] * 6,
+        [[i % 3 + 1] * 9 for i in range(11)],
+    ],
+)
+@pytest.mark.parametrize("engine", EXACT_ENGINES)
+def test_engine_matches_reference_on_edge_cases(engine, scores):
+    assert find_best_combination(scores, engine=engine) == reference_best_combination(scores)
+
+
+def test_local_search_returns_valid_splits():
+    def prop(scores):
+        n = len(scores)
+        mejores_equipos, min_difference_total = find_best_combination(scores, engine="local_search")
+        assert mejores_equipos
+        for team1, team2 in mejores_equipos:
+            assert reference_key(scores, team1, team2)[1] == min_difference_total
+            assert sorted(list(team1) + team2) == list(range(n))
+            assert len(team1) == n // 2
+
+    check_property(prop, seed="local_search")
+
+
+def test_shrink_finds_a_minimal_failing_roster():
+    # Propiedad falsa a propósito: "ningún jugador tiene un 7"
+    def fails(scores):
+        return any(7 in row for row in scores)
+
+    scores = [[7, 9, 3, 7, 2, 8, 10, 1, 5]] * 5 + [[4] * 9] * 4
+    minimal = shrink(scores, fails)
+    assert len(minimal) == 3
+    assert sum(row.count(7) for row in minimal) == 1
+    assert all(value in (1, 7) for row in minimal for value in row)
+
+
+def test_check_property_reports_the_shrunk_case():
+    def prop(scores):
+        assert len(scores) < 5
+
+    with pytest.raises(pytest.fail.Exception, match=r"Falla con 5 jugadores: \[\[1, 1, 1"):
+        check_property(prop, cases=200)
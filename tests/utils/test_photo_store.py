@@ -0,0 +1,149 @@
+import hashlib
+from io import BytesIO
+
+import pytest
+from PIL import Image
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+from app.db.models import Player, PlayerPhoto, PlayerPhotoThumbnail, User
+from app.utils.http_cache import etag_matches
+from app.utils.photo_store import (
+    MAX_THUMBNAIL_SOURCE_PIXELS,
+    THUMBNAIL_SIZES,
+    backfill_inline_photos,
+    decode_data_uri,
+    load_photo_variant,
+    make_thumbnail,
+    photo_chunks,
+    store_photo,
+)
+
+PNG = "data:image/png;base64,iVBORw0KGgo="
+
+
+def test_decode_data_uri():
+    content_type, data = decode_data_uri(PNG)
+    assert content_type == "image/png"
+    assert data.startswith(b"\x89PNG")
+
+
+@pytest.mark.parametrize("data_uri", [
+    "iVBORw0KGgo=",
+    "data:text/html;base64,PGgxPg==",
+    "data:image/svg+xml;base64,PHN2Zy8+",
+    "data:image/png;base64,%%%",
+])
+def test_decode_data_uri_rejects_invalid_images(data_uri):
+    with pytest.raises(ValueError):
+        decode_data_uri(data_uri)
+
+
+def test_photo_chunks_cover_the_whole_photo():
+    data = bytes(range(256)) * 1000
+    assert b"".join(photo_chunks(data)) == data
+
+
+def test_etag_matches():
+    assert etag_matches('"abc"', '"abc"')
+    assert etag_matches('"x", W/"abc"', '"abc"')
+    assert etag_matches("*", '"abc"')
+    assert not etag_matches('"abcd"', '"abc"')
+    assert not etag_matches(None, '"abc"')
+
+
+def test_backfill_moves_inline_photos_in_batches(db):
+    user = User(username="photo-backfill", email="photo-backfill@example.com")
+    db.add(user)
+    db.commit()
+    players = [Player(name=f"Inline {i}", user_id=user.id, photo_data=PNG if i % 3 else "roto") for i in range(7)]
+    db.add_all(players)
+    db.commit()
+
+    batches = []
+    migrated, invalid = backfill_inline_photos(db, Player, batch_size=2, on_batch=lambda *counts: batches.append(counts))
+    assert (migrated, invalid) == (4, 3)
+    assert len(batches) == 4
+
+    photo_id = hashlib.sha256(decode_data_uri(PNG)[1]).hexdigest()
+    rows = db.query(Player).filter(Player.user_id == user.id).order_by(Player.id).all()
+    assert [row.photo_id for row in rows] == [None if i % 3 == 0 else photo_id for i in range(7)]
+    assert [row.photo_data for row in rows] == ["roto" if i % 3 == 0 else None for i in range(7)]
+    assert db.query(PlayerPhoto).count() == 1
+
+    # Una segunda pasada no vuelve a migrar nada
+    assert backfill_inline_photos(db, Player) == (0, 3)
+
+
+def png_bytes(width, height):
+    output = BytesIO()
+    Image.radial_gradient("L").resize((width, height)).convert("RGB").save(output, "PNG")
+    return output.getvalue()
+
+
+def test_make_thumbnail_crops_and_shrinks():
+    data = png_bytes(600, 400)
+    thumbnail = make_thumbnail(data, 64)
+    with Image.open(BytesIO(thumbnail)) as image:
+        assert image.format == "WEBP"
+        assert image.size == (64, 64)
+    assert len(thumbnail) < len(data)
+
+    # Nunca agranda una imagen chica
+    with Image.open(BytesIO(make_thumbnail(png_bytes(30, 50), 64))) as image:
+        assert image.size == (30, 30)
+
+
+def test_make_thumbnail_ignores_images_it_cannot_decode():
+    assert make_thumbnail(b"<svg xmlns='http://www.w3.org/2000/svg'/>", 64) is None
+
+
+def test_make_thumbnail_skips_images_with_too_many_pixels():
+    # Unos pocos KB en PNG, pero demasiados píxeles para decodificarla en un pedido
+    output = BytesIO()
+    Image.new("1", (MAX_THUMBNAIL_SOURCE_PIXELS // 1000 + 1, 1000)).save(output, "PNG")
+    assert len(output.getvalue()) < 64 * 1024
+    assert make_thumbnail(output.getvalue(), 64) is None
+
+
+def test_make_thumbnail_applies_exif_orientation():
+    # Degradé horizontal guardado apaisado, con orientación "rotar 90° a la derecha"
+    exif = Image.Exif()
+    exif[0x0112] = 6
+    output = BytesIO()
+    Image.linear_gradient("L").resize((400, 200)).convert("RGB").save(output, "JPEG", exif=exif)
+    with Image.open(BytesIO(make_thumbnail(output.getvalue(), 64))) as image:
+        gray = image.convert("L")
+        assert gray.getpixel((0, 32)) > 200 and gray.getpixel((63, 32)) < 50
+
+
+def test_thumbnails_are_created_when_the_photo_is_stored(db):
+    photo_id = store_photo(db, "image/png", png_bytes(300, 300))
+    variants = {t.variant: t for t in db.query(PlayerPhotoThumbnail).filter(PlayerPhotoThumbnail.photo_id == photo_id)}
+    assert set(variants) == set(THUMBNAIL_SIZES)
+    assert all(t.content_type == "image/webp" for t in variants.values())
+    assert load_photo_variant(db, photo_id, "small") is variants["small"]
+
+    # Las miniaturas que faltan se generan en el primer pedido; si no se puede, va la original
+    db.delete(variants["medium"])
+    db.flush()
+    assert load_photo_variant(db, photo_id, "medium").variant == "medium"
+    svg_id = store_photo(db, "image/svg+xml", b"<svg xmlns='http://www.w3.org/2000/svg'/>")
+    assert load_photo_variant(db, svg_id, "small").content_type == "image/svg+xml"
+
+
+def test_concurrently_generated_thumbnail_is_reused(db, monkeypatch):
+    photo_id = store_photo(db, "image/png", png_bytes(300, 300))
+    db.query(PlayerPhotoThumbnail).filter(PlayerPhotoThumbnail.photo_id == photo_id).delete()
+    # Otro pedido guarda la misma miniatura después de que este vio que faltaba
+    db.execute(insert(PlayerPhotoThumbnail).values(
+        photo_id=photo_id, variant="small", content_type="image/webp", data=b"other", size=5
+    ))
+    lookups = []
+
+    def get(model, key):
+        lookups.append(key)
+        return None if len(lookups) == 2 else Session.get(db, model, key)
+
+    monkeypatch.setattr(db, "get", get)
+    assert load_photo_variant(db, photo_id, "small").data == b"other"
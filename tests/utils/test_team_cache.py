@@ -0,0 +1,206 @@
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from app.utils import team_cache
+from app.utils.team_cache import TeamOptimizationCache, canonical_roster
+from app.utils.team_optimizer import TeamConstraints, find_best_combination, find_best_partition
+
+
+def random_scores(n, seed, max_score=5):
+    rng = random.Random(seed)
+    return [[rng.randint(1, max_score) for _ in range(9)] for _ in range(n)]
+
+
+def new_cache(**overrides):
+    options = {"max_entries": 16, "ttl": 60, "max_bytes": 1 << 20}
+    options.update(overrides)
+    return TeamOptimizationCache(**options)
+
+
+def test_canonical_roster_ignores_order():
+    scores = random_scores(8, 0)
+    shuffled = scores[::-1]
+    order, signature = canonical_roster(shuffled)
+    assert signature == canonical_roster(scores)[1]
+    assert [tuple(shuffled[i]) for i in order] == list(signature)
+
+
+def test_cached_result_matches_direct_search_in_any_order():
+    cache = new_cache()
+    scores = random_scores(10, 1)
+    for seed in range(4):
+        shuffled = scores[:]
+        random.Random(seed).shuffle(shuffled)
+        stats = {}
+        result = cache.find_best_combination(shuffled, stats=stats, engine="numpy", top_k=3)
+        assert result == find_best_combination(shuffled, top_k=3)
+        assert stats["cache_hit"] == (seed > 0)
+    assert cache.stats()["hits"] == 3
+    assert cache.stats()["misses"] == 1
+
+
+def test_tie_lists_are_cached_per_player_order():
+    # Sin `top_k` el resultado del recorrido original depende del orden de los jugadores
+    cache = new_cache()
+    scores = random_scores(10, 1)
+    for roster in [scores, scores, scores[::-1]]:
+        assert cache.find_best_combination(roster, engine="numpy") == find_best_combination(roster)
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 2
+
+
+def test_cache_tolerates_duplicate_vectors():
+    cache = new_cache()
+    scores = [[2] * 9, [3] * 9, [2] * 9, [4] * 9, [3] * 9, [1] * 9]
+    expected = find_best_combination(scores)
+    assert cache.find_best_combination(scores) == expected
+    assert cache.find_best_combination(scores) == expected
+
+
+def test_top_k_results_do_not_depend_on_input_order():
+    cache = new_cache()
+    scores = random_scores(9, 2, max_score=2)
+    first, _ = cache.find_best_combination(scores, top_k=4, seed=7)
+    shuffled = scores[3:] + scores[:3]
+    second, _ = new_cache().find_best_combination(shuffled, top_k=4, seed=7)
+    as_vectors = lambda splits, roster: [sorted(tuple(roster[i]) for i in team1) for team1, team2 in splits]
+    assert as_vectors(first, scores) == as_vectors(second, shuffled)
+
+
+def test_ties_are_stored_as_masks():
+    # Con puntajes iguales empatan todas las combinaciones: la entrada guarda una máscara por cada una
+    cache = new_cache()
+    scores = [[3] * 9 for _ in range(12)]
+    mejores_equipos = cache.find_best_combination(scores, engine="numpy")[0]
+    assert mejores_equipos == find_best_combination(scores)[0]
+    assert cache.stats()["bytes"] == 8 * (12 * 9 + len(mejores_equipos))
+
+
+def test_previous_solution_is_mapped_to_canonical_order():
+    scores = random_scores(12, 6)
+    expected = find_best_combination(scores, top_k=3)
+    # Una solución cercana a la óptima: el equipo 1 óptimo con un jugador cambiado
+    team1 = expected[0][0][0]
+    previous_team1 = team1[1:] + (11,) if 11 not in team1 else team1
+    stats = {}
+    assert new_cache().find_best_combination(scores, stats=stats, previous_team1=list(previous_team1), top_k=3) == expected
+    assert "previous_key" in stats
+
+
+def test_entries_expire_after_ttl(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(team_cache.time, "monotonic", lambda: now[0])
+    cache = new_cache(ttl=10)
+    scores = random_scores(6, 3)
+    cache.find_best_combination(scores)
+    now[0] += 11
+    stats = {}
+    cache.find_best_combination(scores, stats=stats)
+    assert not stats["cache_hit"]
+
+
+def test_least_recently_used_entries_are_evicted():
+    cache = new_cache(max_entries=2)
+    rosters = [random_scores(6, seed) for seed in range(3)]
+    cache.find_best_combination(rosters[0])
+    cache.find_best_combination(rosters[1])
+    cache.find_best_combination(rosters[0])
+    cache.find_best_combination(rosters[2])
+    assert cache.stats()["entries"] == 2
+
+    stats = {}
+    cache.find_best_combination(rosters[0], stats=stats)
+    assert stats["cache_hit"]
+    cache.find_best_combination(rosters[1], stats=stats)
+    assert not stats["cache_hit"]
+
+
+def test_memory_cap_and_non_optimal_results():
+    cache = new_cache(max_bytes=10)
+    cache.find_best_combination(random_scores(6, 4))
+    assert cache.stats()["entries"] == 0
+
+    cache = new_cache()
+    stats = {}
+    cache.find_best_combination(random_scores(40, 5), stats=stats, engine="auto", time_budget=0.05)
+    assert not stats["optimal"]
+    assert cache.stats()["entries"] == 0
+
+
+def test_constraints_are_part_of_the_key():
+    cache = new_cache()
+    scores = random_scores(10, 8)
+    constraints = TeamConstraints(together=[[1, 2]], team2=[0])
+    expected = find_best_combination(scores, engine="python", constraints=constraints)
+    assert cache.find_best_combination(scores, engine="auto", constraints=constraints) == expected
+    assert cache.find_best_combination(scores, engine="auto", constraints=constraints) == expected
+    assert cache.stats()["hits"] == 1
+    assert cache.find_best_combination(scores, engine="auto") == find_best_combination(scores)
+
+    # Con `top_k` las restricciones se pasan al orden canónico: el plantel invertido reutiliza la entrada
+    expected = cache.find_best_combination(scores, engine="auto", constraints=constraints, top_k=2)[1]
+    reversed_constraints = constraints.remap({i: 9 - i for i in range(10)})
+    assert cache.find_best_combination(scores[::-1], engine="auto", constraints=reversed_constraints, top_k=2)[1] == expected
+    assert cache.stats()["hits"] == 2
+
+
+def test_partitions_are_cached_in_any_order():
+    cache = new_cache()
+    scores = random_scores(9, 9)
+    expected = find_best_partition(scores, 3)
+    assert cache.find_best_partition(scores, 3) == expected
+    stats = {}
+    partitions, max_difference_total = cache.find_best_partition(scores[::-1], 3, stats=stats)
+    assert stats["cache_hit"]
+    assert max_difference_total == expected[1]
+    assert sorted(sorted(tuple(scores[8 - i]) for i in team) for team in partitions[0]) == \
+        sorted(sorted(tuple(scores[i]) for i in team) for team in expected[0][0])
+
+
+def test_best_effort_partitions_are_reused_with_the_same_budget():
+    # 4 equipos de 6: la búsqueda no prueba la optimalidad en el plazo y el pedido repetido
+    # no vuelve a gastarlo
+    cache = new_cache()
+    scores = random_scores(24, 10)
+    first = {}
+    expected = cache.find_best_partition(scores, 4, stats=first, time_budget=0.2)
+    assert not first["optimal"]
+    assert cache.stats()["entries"] == 1
+
+    stats = {}
+    assert cache.find_best_partition(scores[::-1], 4, stats=stats, time_budget=0.2)[1] == expected[1]
+    assert stats["cache_hit"]
+    assert not stats["optimal"]
+
+    # Con más tiempo se vuelve a buscar
+    stats = {}
+    cache.find_best_partition(scores, 4, stats=stats, time_budget=0.3)
+    assert not stats["cache_hit"]
+
+
+def test_cancelled_partitions_are_not_cached():
+    cache = new_cache()
+    cancel_event = threading.Event()
+    cancel_event.set()
+    stats = {}
+    cache.find_best_partition(random_scores(24, 11), 4, stats=stats, time_budget=1, cancel_event=cancel_event)
+    assert not stats["optimal"]
+    assert cache.stats()["entries"] == 0
+
+
+def test_shared_cache_is_created_once_under_concurrency(monkeypatch):
+    created = []
+
+    class SlowCache:
+        def __init__(self, *args):
+            time.sleep(0.05)
+            created.append(self)
+
+    monkeypatch.setattr(team_cache, "TeamOptimizationCache", SlowCache)
+    monkeypatch.setattr(team_cache, "_team_cache", None)
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        caches = list(executor.map(lambda _: team_cache.get_team_cache(), range(4)))
+    assert len(created) == 1
+    assert all(cache is created[0] for cache in caches)
@@ -0,0 +1,76 @@
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from app.utils import team_jobs
+from app.utils.team_jobs import JobRegistry, format_event
+
+
+def test_job_run_records_progress_and_result():
+    job = JobRegistry(ttl=60).create(user_id=1)
+
+    def build(value, cancel_event, on_progress):
+        on_progress({"step": 1})
+        return {"value": value}
+
+    job.run(build, 42)
+    version, status, progress, result = job.snapshot()
+    assert status == "done"
+    assert progress == {"step": 1}
+    assert result == {"value": 42}
+    assert version == 3
+
+
+def test_job_run_marks_cancelled_and_failed_jobs():
+    registry = JobRegistry(ttl=60)
+    cancelled = registry.create(user_id=1)
+    cancelled.cancel()
+    cancelled.run(lambda cancel_event, on_progress: {"stopped": cancel_event.is_set()})
+    assert cancelled.snapshot()[1:] == ("cancelled", None, {"stopped": True})
+
+    failed = registry.create(user_id=1)
+    failed.run(lambda cancel_event, on_progress: 1 / 0)
+    assert failed.snapshot()[1] == "failed"
+
+
+def test_registry_only_returns_jobs_of_the_same_user():
+    registry = JobRegistry(ttl=60)
+    job = registry.create(user_id=1)
+    assert registry.get(job.id, 1) is job
+    assert registry.get(job.id, 2) is None
+    assert registry.get("missing", 1) is None
+
+
+def test_registry_evicts_and_cancels_expired_jobs(monkeypatch):
+    registry = JobRegistry(ttl=10)
+    now = [1000.0]
+    monkeypatch.setattr(team_jobs.time, "monotonic", lambda: now[0])
+    job = registry.create(user_id=1)
+
+    now[0] += 11
+    assert registry.get(job.id, 1) is None
+    assert job.cancel_event.is_set()
+
+
+def test_format_event():
+    message = format_event("progress", {"difference": 2})
+    assert message.startswith("event: progress\ndata: ")
+    assert message.endswith("\n\n")
+    assert json.loads(message.split("data: ")[1]) == {"difference": 2}
+
+
+def test_job_registry_is_created_once_under_concurrency(monkeypatch):
+    created = []
+
+    class SlowRegistry(JobRegistry):
+        def __init__(self, ttl):
+            time.sleep(0.05)
+            super().__init__(ttl)
+            created.append(self)
+
+    monkeypatch.setattr(team_jobs, "JobRegistry", SlowRegistry)
+    monkeypatch.setattr(team_jobs, "_job_registry", None)
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        registries = list(executor.map(lambda _: team_jobs.get_job_registry(), range(4)))
+    assert len(created) == 1
+    assert all(registry is created[0] for registry in registries)
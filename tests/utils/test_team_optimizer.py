@@ -0,0 +1,508 @@
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from itertools import combinations
+
+import pytest
+
+from app.utils import team_optimizer
+from app.utils.team_optimizer import (
+    SearchControl,
+    TeamConstraints,
+    calculate_difference,
+    calculate_team_score,
+    find_best_combination,
+    find_best_partition,
+)
+
+
+def random_scores(n, seed, max_score=5):
+    rng = random.Random(seed)
+    return [[rng.randint(1, max_score) for _ in range(9)] for _ in range(n)]
+
+
+def split_key(scores, team1, team2):
+    team1_score = calculate_team_score(team1, scores)
+    team2_score = calculate_team_score(team2, scores)
+    return calculate_difference(team1_score, team2_score), abs(sum(team1_score) - sum(team2_score))
+
+
+def best_key(scores):
+    n = len(scores)
+    return min(
+        split_key(scores, team1, [i for i in range(n) if i not in team1])
+        for team1 in combinations(range(n), n // 2)
+    )
+
+
+@pytest.mark.parametrize("n", [3, 4, 5, 8, 11, 12])
+@pytest.mark.parametrize("max_score", [5, 10])
+def test_numpy_engine_matches_python(n, max_score):
+    for seed in range(10):
+        scores = random_scores(n, seed, max_score)
+        assert find_best_combination(scores, engine="numpy") == find_best_combination(scores, engine="python")
+
+
+def test_numpy_engine_matches_python_across_chunks(monkeypatch):
+    monkeypatch.setattr(team_optimizer, "NUMPY_CHUNK_SIZE", 5)
+    for seed in range(30):
+        scores = random_scores(9 + seed % 3, seed, max_score=3)
+        assert find_best_combination(scores, engine="numpy") == find_best_combination(scores, engine="python")
+
+
+def test_best_option_minimizes_difference_then_total():
+    # Con `top_k` la mejor opción es la de menor diferencia por atributo y, a igualdad, menor total
+    for seed in range(20):
+        scores = random_scores(8, seed)
+        mejores_equipos, min_difference_total = find_best_combination(scores, top_k=1)
+        expected = best_key(scores)
+        assert min_difference_total == expected[1]
+        assert split_key(scores, *mejores_equipos[0]) == expected
+
+
+@pytest.mark.parametrize("scores, original", [
+    # Misma diferencia por atributo (5) en todas: el bucle original se queda con la
+    # primera (total 3) y descarta la de total 1
+    ([[5, 1], [2, 2], [1, 1], [2, 3]], ([((0, 1), [2, 3])], 3)),
+    # El bucle original devuelve una división con diferencia por atributo 7 habiendo una de 3
+    ([[1, 3, 5], [2, 1, 4], [4, 1, 1], [2, 3, 4]], ([((0, 1), [2, 3])], 1)),
+])
+def test_best_teams_keep_the_original_criterion(scores, original):
+    # Sin `top_k` el resultado es el del find_best_combination original, que depende del
+    # orden en que recorre las combinaciones; con `top_k` las opciones se ordenan por
+    # (diferencia por atributo, diferencia total)
+    for engine in ["python", "numpy", "branch_and_bound", "meet_in_the_middle", "gray_code", "auto"]:
+        assert find_best_combination(scores, engine=engine) == original
+    best = find_best_combination(scores, top_k=1)
+    assert split_key(scores, *best[0][0]) == best_key(scores)
+    assert split_key(scores, *best[0][0]) < split_key(scores, *original[0][0])
+
+
+def test_tied_splits_do_not_depend_on_the_offer_order():
+    scores = random_scores(10, 3, max_score=2)
+    expected = find_best_combination(scores)
+    candidates = [
+        split_key(scores, team1, [i for i in range(10) if i not in team1]) + (sum(1 << i for i in team1),)
+        for team1 in combinations(range(10), 5)
+        if 0 in team1
+    ]
+    for seed in range(5):
+        random.Random(seed).shuffle(candidates)
+        best = team_optimizer._TiedSplits(10)
+        for candidate in candidates:
+            best.offer(*candidate)
+        assert best.result(10) == expected
+
+
+@pytest.mark.parametrize("n", [3, 4, 7, 10, 12])
+def test_branch_and_bound_matches_python(n):
+    for seed in range(10):
+        scores = random_scores(n, seed, max_score=3 + seed % 8)
+        assert find_best_combination(scores, engine="branch_and_bound") == find_best_combination(scores)
+
+
+def test_branch_and_bound_reports_search_stats():
+    stats = {}
+    mejores_equipos, _ = find_best_combination(random_scores(24, 1), engine="branch_and_bound", stats=stats)
+    assert mejores_equipos
+    assert stats["nodes_explored"] > 0
+    assert 0 < stats["nodes_pruned"] < stats["nodes_explored"]
+
+
+@pytest.mark.parametrize("n", [3, 4, 7, 10, 12])
+def test_meet_in_the_middle_matches_python(n):
+    for seed in range(10):
+        scores = random_scores(n, seed, max_score=1 + seed % 6)
+        assert find_best_combination(scores, engine="meet_in_the_middle") == find_best_combination(scores)
+
+
+def test_meet_in_the_middle_prunes_on_total_difference():
+    scores = random_scores(20, 3)
+    stats = {}
+    result = find_best_combination(scores, engine="meet_in_the_middle", stats=stats)
+    assert result == find_best_combination(scores, engine="branch_and_bound")
+    assert stats["candidates_pruned"] > 0
+
+
+@pytest.mark.parametrize("n", [3, 4, 5, 8, 11, 12])
+def test_gray_code_matches_python(n):
+    for seed in range(10):
+        scores = random_scores(n, seed, max_score=1 + seed % 6)
+        assert find_best_combination(scores, engine="gray_code") == find_best_combination(scores)
+
+
+@pytest.mark.parametrize("n, expected", [(3, 3), (10, 126), (11, 462)])
+def test_gray_code_visits_every_split_once(n, expected):
+    stats = {}
+    find_best_combination(random_scores(n, 0), engine="gray_code", stats=stats)
+    assert stats["candidates_evaluated"] == expected
+
+
+@pytest.mark.parametrize("n", [8, 9, 12])
+def test_shard_prefixes_partition_the_search_space(n):
+    team_size = n // 2
+    prefixes = team_optimizer._shard_prefixes(n, team_size, 8)
+    covered = [prefix + rest for prefix in prefixes for rest in team_optimizer._team1_combinations(n, team_size, prefix)[1]]
+    expected = [pinned + rest for pinned, rests in [team_optimizer._team1_combinations(n, team_size)] for rest in rests]
+    assert covered == expected
+
+
+def test_parallel_engine_matches_single_process(monkeypatch):
+    monkeypatch.setattr(team_optimizer, "PARALLEL_MIN_PLAYERS", 4)
+    scores = random_scores(12, 7, max_score=3)
+    stats = {}
+    assert find_best_combination(scores, engine="numpy", stats=stats, workers=2) == find_best_combination(scores)
+    assert stats["workers"] == 2
+    assert stats["shards"] > 1
+
+
+@pytest.mark.parametrize("top_k", [None, 5])
+def test_branch_and_bound_shards_cover_the_search(top_k):
+    scores = random_scores(16, 3, max_score=4)
+    merged = team_optimizer._TiedSplits(16) if top_k is None else team_optimizer._TopSplits(top_k)
+    for part in team_optimizer._branch_and_bound_shards(16, 6):
+        empty = team_optimizer._TiedSplits(16) if top_k is None else team_optimizer._TopSplits(top_k)
+        entries, stats = team_optimizer._solve_shard("branch_and_bound", scores, SearchControl(), empty, part)
+        assert stats["optimal"]
+        for entry in entries:
+            merged.offer(*entry)
+    assert merged.result(16) == find_best_combination(scores, top_k=top_k)
+
+
+def test_auto_engine_uses_workers_above_the_exhaustive_size():
+    scores = random_scores(24, 2)
+    stats = {}
+    result = find_best_combination(scores, engine="auto", stats=stats, workers=2, top_k=5)
+    assert stats["engine"] == "branch_and_bound"
+    assert stats["workers"] == 2
+    assert stats["shards"] > 1
+    assert stats["optimal"]
+    assert result == find_best_combination(scores, engine="branch_and_bound", top_k=5)
+
+
+def test_process_pool_is_created_once_under_concurrency(monkeypatch):
+    created = []
+
+    class SlowPool:
+        def __init__(self, **kwargs):
+            time.sleep(0.05)
+            created.append(self)
+
+    monkeypatch.setattr(team_optimizer, "ProcessPoolExecutor", SlowPool)
+    monkeypatch.setattr(team_optimizer, "_process_pool", None)
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        pools = list(executor.map(team_optimizer._get_process_pool, [2] * 4))
+    assert len(created) == 1
+    assert all(pool is created[0] for pool in pools)
+
+
+def test_small_rosters_stay_single_process():
+    stats = {}
+    find_best_combination(random_scores(8, 0), engine="numpy", stats=stats, workers=4)
+    assert "shards" not in stats
+
+
+@pytest.mark.parametrize("n", [4, 9, 12])
+def test_auto_engine_matches_python_on_small_rosters(n):
+    for seed in range(5):
+        scores = random_scores(n, seed)
+        stats = {}
+        assert find_best_combination(scores, engine="auto", stats=stats, time_budget=5) == find_best_combination(scores)
+        assert stats["optimal"]
+
+
+def test_auto_engine_proves_optimality_with_enough_time(monkeypatch):
+    monkeypatch.setattr(team_optimizer, "AUTO_EXHAUSTIVE_MAX_PLAYERS", 4)
+    scores = random_scores(12, 0)
+    stats = {}
+    assert find_best_combination(scores, engine="auto", stats=stats) == find_best_combination(scores)
+    assert stats["optimal"]
+
+
+def test_auto_engine_bounds_the_local_search_phase(monkeypatch):
+    # Con plazo, la búsqueda local previa no se queda con su parte del presupuesto si no mejora
+    monkeypatch.setattr(team_optimizer, "AUTO_EXHAUSTIVE_MAX_PLAYERS", 4)
+    monkeypatch.setattr(team_optimizer, "AUTO_LOCAL_SEARCH_MAX_SECONDS", 60)
+    monkeypatch.setattr(team_optimizer, "LOCAL_SEARCH_MAX_STALLS", 5)
+    scores = random_scores(16, 0)
+    stats = {}
+    assert find_best_combination(scores, engine="auto", stats=stats, time_budget=60) == find_best_combination(scores)
+    assert stats["optimal"]
+    assert stats["wall_time"] < 10
+
+
+def test_auto_engine_uses_workers_for_the_exhaustive_phase(monkeypatch):
+    monkeypatch.setattr(team_optimizer, "PARALLEL_MIN_PLAYERS", 4)
+    scores = random_scores(12, 7, max_score=3)
+    stats = {}
+    assert find_best_combination(scores, engine="auto", stats=stats, workers=2) == find_best_combination(scores)
+    assert stats["engine"] == "numpy"
+    assert stats["workers"] == 2
+
+
+def test_auto_engine_returns_best_effort_when_time_runs_out():
+    scores = random_scores(60, 0, max_score=10)
+    stats = {}
+    mejores_equipos, min_difference_total = find_best_combination(scores, engine="auto", stats=stats, time_budget=0.2)
+    assert not stats["optimal"]
+    for team1, team2 in mejores_equipos:
+        assert sorted(list(team1) + team2) == list(range(60))
+        assert len(team1) == 30
+        assert split_key(scores, team1, team2)[1] == min_difference_total
+
+
+def test_local_search_returns_consistent_splits():
+    for seed in range(5):
+        scores = random_scores(15, seed)
+        mejores_equipos, min_difference_total = find_best_combination(scores, engine="local_search")
+        keys = [split_key(scores, team1, team2) for team1, team2 in mejores_equipos]
+        assert all(key[1] == min_difference_total for key in keys)
+        assert min(keys) >= best_key(scores)
+
+
+def top_k_keys(scores, top_k):
+    n = len(scores)
+    return sorted(
+        split_key(scores, team1, [i for i in range(n) if i not in team1])
+        for team1 in combinations(range(n), n // 2)
+        if n % 2 or 0 in team1
+    )[:top_k]
+
+
+@pytest.mark.parametrize("engine", ["python", "numpy", "branch_and_bound", "meet_in_the_middle", "gray_code", "auto"])
+@pytest.mark.parametrize("top_k", [1, 4, 30])
+def test_top_k_returns_best_distinct_splits(engine, top_k):
+    for seed in range(5):
+        scores = random_scores(9 + seed % 2, seed, max_score=3)
+        mejores_equipos, min_difference_total = find_best_combination(scores, engine=engine, top_k=top_k, seed=seed)
+        assert [split_key(scores, team1, team2) for team1, team2 in mejores_equipos] == top_k_keys(scores, top_k)
+        assert len({team1 for team1, team2 in mejores_equipos}) == top_k
+        assert min_difference_total == split_key(scores, *mejores_equipos[0])[1]
+        assert mejores_equipos == find_best_combination(scores, engine="python", top_k=top_k, seed=seed)[0]
+
+
+def test_top_k_tie_break_depends_on_seed():
+    # Con puntajes iguales todas las combinaciones empatan: la semilla decide cuáles se devuelven
+    scores = [[3] * 9 for _ in range(10)]
+    first = find_best_combination(scores, engine="numpy", top_k=5, seed=1)
+    assert first == find_best_combination(scores, engine="gray_code", top_k=5, seed=1)
+    assert first != find_best_combination(scores, engine="numpy", top_k=5, seed=2)
+
+
+def test_parallel_engine_matches_single_process_with_top_k(monkeypatch):
+    monkeypatch.setattr(team_optimizer, "PARALLEL_MIN_PLAYERS", 4)
+    scores = random_scores(12, 3, max_score=3)
+    expected = find_best_combination(scores, engine="gray_code", top_k=7, seed=3)
+    assert find_best_combination(scores, engine="gray_code", workers=2, top_k=7, seed=3) == expected
+
+
+@pytest.mark.parametrize("engine", ["python", "numpy", "branch_and_bound", "gray_code", "auto"])
+def test_cancel_event_stops_the_search(engine):
+    cancel_event = threading.Event()
+    cancel_event.set()
+    stats = {}
+    mejores_equipos, min_difference_total = find_best_combination(
+        random_scores(30 if engine in ("branch_and_bound", "auto") else 22, 0), engine=engine, stats=stats,
+        cancel_event=cancel_event,
+    )
+    assert not stats["optimal"]
+
+
+def test_on_progress_reports_best_so_far(monkeypatch):
+    monkeypatch.setattr(team_optimizer, "PROGRESS_INTERVAL", 0)
+    scores = random_scores(24, 1)
+    reports = []
+    result = find_best_combination(
+        scores, engine="branch_and_bound", top_k=3, on_progress=lambda *progress: reports.append(progress)
+    )
+    assert reports
+    # Cada reporte trae combinaciones válidas y nunca empeora
+    differences = [split_key(scores, *mejores_equipos[0]) for mejores_equipos, _ in reports]
+    assert differences == sorted(differences, reverse=True)
+    assert differences[-1] >= split_key(scores, *result[0][0])
+
+
+@pytest.mark.parametrize("engine", ["numpy", "branch_and_bound", "auto"])
+@pytest.mark.parametrize("top_k", [None, 3])
+def test_previous_solution_does_not_change_the_result(engine, top_k):
+    for seed in range(5):
+        roster = random_scores(13, seed)
+        previous, _ = find_best_combination(roster[:12], engine=engine)
+        previous_team1 = previous[0][0]
+        expected = find_best_combination(roster[1:], engine=engine, top_k=top_k, seed=seed)
+
+        # Se baja el jugador 0 y entra el 12; se suma el 12 sin que nadie se baje
+        swapped = [i - 1 for i in previous_team1 if i != 0]
+        stats = {}
+        assert find_best_combination(roster[1:], engine=engine, stats=stats, top_k=top_k, seed=seed,
+                                     previous_team1=swapped) == expected
+        assert stats["previous_key"] >= best_key(roster[1:])
+        assert find_best_combination(roster, engine=engine, top_k=top_k, previous_team1=previous_team1) == \
+            find_best_combination(roster, engine=engine, top_k=top_k)
+
+
+def random_constraints(n, seed):
+    rng = random.Random(seed)
+    players = rng.sample(range(n), 6)
+    return TeamConstraints(
+        together=[players[:rng.randint(2, 3)]],
+        apart=[players[3:5]],
+        team1=players[5:] if seed % 2 else [],
+        team2=[],
+    )
+
+
+@pytest.mark.parametrize("engine", ["branch_and_bound", "auto"])
+@pytest.mark.parametrize("n", [7, 10, 11])
+@pytest.mark.parametrize("top_k", [None, 3])
+def test_constrained_search_matches_python(engine, n, top_k):
+    for seed in range(6):
+        scores = random_scores(n, seed)
+        constraints = random_constraints(n, seed)
+        expected = find_best_combination(scores, engine="python", top_k=top_k, constraints=constraints)
+        assert find_best_combination(scores, engine=engine, top_k=top_k, constraints=constraints) == expected
+
+        for team1, team2 in expected[0]:
+            assert len({player in team1 for player in constraints.together[0]}) == 1
+            assert (constraints.apart[0][0] in team1) != (constraints.apart[0][1] in team1)
+            assert set(constraints.team1) <= set(team1)
+
+
+def test_constraints_that_cannot_be_met_return_no_teams():
+    # Cuatro jugadores juntos no entran en un equipo de tres
+    constraints = TeamConstraints(together=[[0, 1, 2, 3]])
+    assert find_best_combination(random_scores(6, 0), engine="branch_and_bound", constraints=constraints) == \
+        ([], float("inf"))
+
+
+@pytest.mark.parametrize("constraints", [
+    TeamConstraints(together=[[0, 1]], apart=[[1, 0]]),
+    TeamConstraints(team1=[2], team2=[2]),
+    TeamConstraints(together=[[0, 1]], team1=[0], team2=[1]),
+    TeamConstraints(team1=[9]),
+])
+def test_invalid_constraints_are_rejected(constraints):
+    with pytest.raises(ValueError):
+        find_best_combination(random_scores(6, 0), engine="auto", constraints=constraints)
+
+
+def test_constraints_are_rejected_by_unsupported_engines():
+    with pytest.raises(ValueError):
+        find_best_combination(random_scores(6, 0), engine="numpy", constraints=TeamConstraints(team1=[0]))
+
+
+def weighted_key(scores, weights, team1, team2):
+    team1_score = calculate_team_score(team1, scores)
+    team2_score = calculate_team_score(team2, scores)
+    differences = [w * (a - b) for w, a, b in zip(weights, team1_score, team2_score)]
+    return sum(abs(d) for d in differences), abs(sum(differences))
+
+
+@pytest.mark.parametrize("engine", ["python", "numpy", "branch_and_bound", "meet_in_the_middle", "auto"])
+def test_weights_change_the_objective(engine):
+    for seed in range(5):
+        scores = random_scores(10, seed)
+        weights = [1, 3, 1, 1, 0, 1, 4, 1, 2]
+        result, _ = find_best_combination(scores, engine=engine, weights=weights, top_k=1)
+        expected = min(
+            weighted_key(scores, weights, team1, [i for i in range(10) if i not in team1])
+            for team1 in combinations(range(10), 5)
+        )
+        assert weighted_key(scores, weights, *result[0]) == expected
+
+
+def test_proportional_weights_give_the_same_result():
+    scores = random_scores(11, 3)
+    assert find_best_combination(scores, engine="numpy", weights=[2] * 9) == find_best_combination(scores, engine="numpy")
+    assert find_best_combination(scores, engine="numpy", weights=[3, 6] + [3] * 7) == \
+        find_best_combination(scores, engine="numpy", weights=[1, 2] + [1] * 7)
+
+
+@pytest.mark.parametrize("weights", [[1] * 8, [0] * 9, [1.5] + [1] * 8, [-1] + [1] * 8])
+def test_invalid_weights_are_rejected(weights):
+    with pytest.raises(ValueError):
+        find_best_combination(random_scores(6, 0), weights=weights)
+
+
+@pytest.mark.parametrize("engine, used", [("numpy", "numpy"), ("auto", "numpy"), ("branch_and_bound", "branch_and_bound")])
+def test_stats_report_engine_and_wall_time(engine, used):
+    stats = {}
+    find_best_combination(random_scores(10, 0), engine=engine, stats=stats)
+    assert stats["engine"] == used
+    assert stats["wall_time"] > 0
+
+
+@pytest.mark.parametrize("engine", ["python", "numpy", "branch_and_bound", "gray_code"])
+@pytest.mark.parametrize("top_k", [None, 5])
+def test_masks_are_converted_only_at_the_boundary(engine, top_k):
+    scores = random_scores(9, 2, max_score=2)
+    masks, min_difference_total = find_best_combination(scores, engine=engine, top_k=top_k, as_masks=True)
+    mejores_equipos = find_best_combination(scores, engine=engine, top_k=top_k)[0]
+    assert [sum(1 << i for i in team1) for team1, team2 in mejores_equipos] == masks
+    assert min_difference_total == find_best_combination(scores, engine=engine, top_k=top_k)[1]
+
+
+def test_find_best_combination_rejects_unknown_engine():
+    with pytest.raises(ValueError):
+        find_best_combination(random_scores(4, 0), engine="gpu")
+
+
+def test_find_best_combination_rejects_empty_top_k():
+    with pytest.raises(ValueError):
+        find_best_combination(random_scores(4, 0), top_k=0)
+
+
+def partition_key(scores, partition):
+    team_scores = [calculate_team_score(team, scores) for team in partition]
+    totals = [sum(team_score) for team_score in team_scores]
+    return (
+        max(calculate_difference(a, b) for a, b in combinations(team_scores, 2)),
+        max(totals) - min(totals),
+    )
+
+
+def all_partitions(n, sizes):
+    # Todas las asignaciones de jugadores a equipos de los tamaños dados
+    def assign(player, teams):
+        if player == n:
+            yield tuple(tuple(team) for team in teams)
+            return
+        for team, size in zip(teams, sizes):
+            if len(team) < size:
+                team.append(player)
+                yield from assign(player + 1, teams)
+                team.pop()
+
+    yield from assign(0, [[] for _ in sizes])
+
+
+@pytest.mark.parametrize("n, num_teams", [(6, 3), (8, 3), (9, 3), (8, 4), (9, 4)])
+def test_find_best_partition_matches_brute_force(n, num_teams):
+    for seed in range(4):
+        scores = random_scores(n, seed)
+        size, extra = divmod(n, num_teams)
+        sizes = [size + 1] * extra + [size] * (num_teams - extra)
+        expected = min(partition_key(scores, partition) for partition in all_partitions(n, sizes))
+        stats = {}
+        partitions, max_difference_total = find_best_partition(scores, num_teams, stats=stats, top_k=3)
+        assert stats["optimal"]
+        assert partition_key(scores, partitions[0]) == expected
+        assert max_difference_total == expected[1]
+        assert len(set(partitions)) == 3
+        for partition in partitions:
+            assert sorted(player for team in partition for player in team) == list(range(n))
+            assert [len(team) for team in partition] == sizes
+
+
+def test_find_best_partition_respects_time_budget():
+    stats = {}
+    partitions, _ = find_best_partition(random_scores(24, 0, max_score=10), 4, stats=stats, time_budget=0.5)
+    assert len(partitions) == 1
+    assert [len(team) for team in partitions[0]] == [6, 6, 6, 6]
+    assert stats["local_optima"] > 0
+
+
+def test_find_best_partition_rejects_too_few_players():
+    with pytest.raises(ValueError):
+        find_best_partition(random_scores(5, 0), 3)